@@ -1,6 +1,7 @@
 from bs4 import BeautifulSoup
 from intuned_browser import go_to_url
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import DetailsParams, ProductDetails
 
 
@@ -94,6 +95,7 @@ async def automation(
     print(f"Scraping product details from: {details_url}")
 
     # Navigate to the product page
+    await block_resources(page, params.block_resources)
     await go_to_url(page, details_url)
 
     # Wait for the product content to load - replace selector as needed
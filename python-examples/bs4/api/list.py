@@ -2,6 +2,7 @@ from bs4 import BeautifulSoup
 from intuned_browser import go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import ListParams, Product
 
 
@@ -89,6 +90,9 @@ async def automation(
     print(f"Starting scrape from: {url}")
     print(f"Max pages: {max_pages}")
 
+    # Only the HTML is parsed: skip images, fonts and trackers if requested
+    await block_resources(page, params.block_resources)
+
     all_products: list[Product] = []
     current_url: str | None = url
     current_page = 1
@@ -120,7 +124,10 @@ async def automation(
         extend_payload(
             {
                 "api": "details",
-                "parameters": product,
+                "parameters": {
+                    **dict(product),
+                    "block_resources": params.block_resources,
+                },
             }
         )
     return {
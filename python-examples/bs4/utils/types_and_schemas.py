@@ -6,12 +6,20 @@ class ListParams(BaseModel):
     max_pages: int = Field(
         default=10, description="The maximum number of pages to scrape"
     )
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 class DetailsParams(BaseModel):
     details_url: str = Field(..., description="The URL to the product details")
     title: str = Field(..., description="The title of the product")
     price: str | None = Field(default=None, description="The price of the product")
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 class Product(BaseModel):
@@ -3,6 +3,7 @@ import re
 
 from intuned_browser import Attachment, go_to_url, save_file_to_s3
 from playwright.async_api import Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import (
     DetailsSchema,
     ProductDetails,
@@ -159,6 +160,8 @@ async def automation(
     validated_params = DetailsSchema(**params)
 
     # Navigate to the product detail page using the URL from params
+    # (product images are saved, so they are never blocked)
+    await block_resources(page, validated_params.block_resources, allow_types=["image"])
     await go_to_url(
         page=page,
         url=str(validated_params.detailsUrl),
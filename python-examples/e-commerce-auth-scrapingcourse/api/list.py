@@ -3,6 +3,7 @@ from typing import TypedDict
 from intuned_browser import go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import Page
+from utils.resource_blocking import block_resources
 
 
 class Product(TypedDict):
@@ -10,7 +11,9 @@ class Product(TypedDict):
     detailsUrl: str
 
 
-async def extract_products_from_page(page: Page) -> list[Product]:
+async def extract_products_from_page(
+    page: Page, block_resources_params: bool | dict | None = None
+) -> list[Product]:
     # Wait for the product grid to be visible
     # This ensures the page has loaded before we try to extract data
     product_grid = page.locator("#product-grid")
@@ -45,7 +48,10 @@ async def extract_products_from_page(page: Page) -> list[Product]:
                 extend_payload(
                     {
                         "api": "details",
-                        "parameters": product,
+                        "parameters": {
+                            **product,
+                            "block_resources": block_resources_params,
+                        },
                     }
                 )
         except Exception as error:
@@ -66,13 +72,14 @@ async def automation(
         params = {}
 
     # Navigate to the dashboard page
+    await block_resources(page, params.get("block_resources"))
     await go_to_url(
         page=page,
         url="https://www.scrapingcourse.com/dashboard",
     )
 
     # Extract all product details from the page
-    products = await extract_products_from_page(page)
+    products = await extract_products_from_page(page, params.get("block_resources"))
 
     # Return all extracted products
     return products
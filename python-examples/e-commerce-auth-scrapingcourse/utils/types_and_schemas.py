@@ -5,6 +5,7 @@ from pydantic import BaseModel, HttpUrl, field_validator
 class DetailsSchema(BaseModel):
     name: str
     detailsUrl: HttpUrl
+    block_resources: bool | dict | None = None  # Skip fonts, media, trackers
 
     @field_validator("name")
     @classmethod
@@ -3,6 +3,7 @@ from urllib.parse import urljoin, urlparse
 from intuned_browser import go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import Category, EcommereceCategoryParams
 
 
@@ -83,6 +84,7 @@ async def automation(
     print(f"Scraping categories from: {store_url}")
 
     # Navigate to the store home page
+    await block_resources(page, params.block_resources)
     await go_to_url(page, store_url)
 
     # Handle cookie consent banner
@@ -102,7 +104,10 @@ async def automation(
         extend_payload(
             {
                 "api": "list",
-                "parameters": dict(category),
+                "parameters": {
+                    **dict(category),
+                    "block_resources": params.block_resources,
+                },
             }
         )
 
@@ -1,5 +1,6 @@
 from intuned_browser import go_to_url
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import EcommereceDetailsParams, ProductDetails, Size
 
 
@@ -140,6 +141,7 @@ async def automation(
     details_url = params.details_url
     print(f"Fetching product details: {details_url}")
 
+    await block_resources(page, params.block_resources)
     await find_entity(page, details_url)
 
     # Dismiss any modals - replace with appropriate action for your store
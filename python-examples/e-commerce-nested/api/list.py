@@ -3,6 +3,7 @@ from urllib.parse import urljoin
 from intuned_browser import click_until_exhausted, go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import EcommereceListParams, Product
 
 
@@ -114,6 +115,7 @@ async def automation(
     print(f"Category URL: {category_url}")
 
     # Navigate to the category page
+    await block_resources(page, params.block_resources)
     await find_entity(page, category_url)
 
     # Handle country/language modal if present
@@ -136,7 +138,10 @@ async def automation(
         extend_payload(
             {
                 "api": "details",
-                "parameters": dict(product),
+                "parameters": {
+                    **dict(product),
+                    "block_resources": params.block_resources,
+                },
             }
         )
 
@@ -0,0 +1,388 @@
+"""
+Run a job locally, end to end: the job's payloads and every payload they
+extend, on a pool of browser pages, without deploying.
+
+    uv run python -m utils.local_job intuned-resources/jobs/default.job.jsonc
+
+`persistent_store` is kept in memory (or in a JSON file with `--store-file`),
+`extend_payload` and `attempt_store` work as on Intuned, and the job's
+`maxConcurrentRequests` and `retry.maximumAttempts` are respected.
+"""
+
+import argparse
+import asyncio
+import functools
+import importlib
+import json
+import re
+import socket
+import sys
+import time
+import uuid
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, TypedDict
+from urllib.request import urlopen
+
+from intuned_runtime import IntunedContext, persistent_store
+from playwright.async_api import Page, async_playwright
+from pydantic import BaseModel
+
+ImportFunction = Callable[[str], Callable[..., Awaitable[Any]]]
+
+SETUP_CONTEXT_HOOK = Path("hooks/setup_context.py")
+
+# Strings (kept), comments and trailing commas (removed) in JSONC
+_JSONC_TOKENS = re.compile(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/|,(?=\s*[}\]])', re.S)
+
+
+class UnsupportedHookError(RuntimeError):
+    """The `setup_context` hook returned its own browser context."""
+
+
+class Payload(TypedDict):
+    api: str
+    parameters: dict[str, Any]
+
+
+class JobConfig(TypedDict):
+    max_concurrent_requests: int
+    maximum_attempts: int
+
+
+class PayloadRun(TypedDict):
+    api: str
+    parameters: dict[str, Any]
+    result: Any
+    error: str | None  # Error of the last attempt, if every attempt failed
+    attempts: int
+    seconds: float  # All attempts, not counting time spent queued
+
+
+def load_job(path: str | Path) -> tuple[list[Payload], JobConfig]:
+    """Read the payloads and run settings of a `*.job.jsonc` file."""
+    text = _JSONC_TOKENS.sub(
+        lambda m: m.group(0) if m.group(0).startswith('"') else "",
+        Path(path).read_text(),
+    )
+    job = json.loads(text)
+    configuration = job.get("configuration", {})
+    payloads: list[Payload] = [
+        {"api": payload["apiName"], "parameters": payload.get("parameters", {})}
+        for payload in job.get("payload", [])
+    ]
+    return payloads, {
+        "max_concurrent_requests": configuration.get("maxConcurrentRequests", 1),
+        "maximum_attempts": configuration.get("retry", {}).get("maximumAttempts", 1),
+    }
+
+
+class MemoryStore:
+    """
+    In-process stand-in for `persistent_store`, counting operations.
+
+    Values are JSON round-tripped like the hosted store. `latency_ms` is added
+    to every call to model the network round trip. With `path`, the store is
+    loaded from and saved to a JSON file, so state (e.g. incremental crawl
+    indexes) survives between local job runs.
+    """
+
+    def __init__(self, latency_ms: float = 0, path: str | Path | None = None):
+        self.latency = latency_ms / 1000
+        self.path = Path(path) if path else None
+        self.data: dict[str, str] = {}
+        if self.path and self.path.exists():
+            self.data = json.loads(self.path.read_text())
+        self.gets = 0
+        self.sets = 0
+
+    @staticmethod
+    def _validate(key: str) -> None:
+        if not key or ":" in key or "#" in key:
+            raise ValueError(f"Invalid persistent_store key: {key!r}")
+
+    async def get(self, key: str) -> Any:
+        self._validate(key)
+        self.gets += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        value = self.data.get(key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        self._validate(key)
+        self.sets += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.data[key] = json.dumps(value, default=_json_default)
+
+    def save(self) -> None:
+        if self.path:
+            self.path.write_text(json.dumps(self.data))
+
+
+@contextmanager
+def use_store(store: MemoryStore) -> Iterator[MemoryStore]:
+    """Route `intuned_runtime.persistent_store` calls to `store` inside the block."""
+    original = persistent_store.__dict__.copy()
+    persistent_store.get = store.get
+    persistent_store.set = store.set
+    try:
+        yield store
+    finally:
+        persistent_store.__dict__.clear()
+        persistent_store.__dict__.update(original)
+        store.save()
+
+
+def _import_function(file_path: str, name: str) -> Callable[..., Awaitable[Any]]:
+    """Function `name` of the project module at `file_path` (no `.py`)."""
+    return getattr(importlib.import_module(file_path.replace("/", ".")), name)
+
+
+@functools.cache
+def import_api(api: str) -> Callable[..., Awaitable[Any]]:
+    """The `automation` function of `api/{api}.py`, loaded like the runtime does."""
+    return _import_function(f"api/{api}", "automation")
+
+
+def load_setup_context_hook() -> Callable[..., Awaitable[Any]] | None:
+    """The project's `setup_context` hook, if it has one."""
+    if not SETUP_CONTEXT_HOOK.exists():
+        return None
+    return _import_function(
+        SETUP_CONTEXT_HOOK.with_suffix("").as_posix(), "setup_context"
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize pydantic models in results and store values, as the runtime does."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _to_json(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def _websocket_cdp_url(port: int) -> str:
+    """The browser's DevTools websocket URL, from its remote debugging port."""
+    with urlopen(f"http://localhost:{port}/json/version") as response:
+        return json.load(response)["webSocketDebuggerUrl"]
+
+
+async def _fresh_page(page: Page) -> Page:
+    """A page in a new browser context, replacing `page` (closed)."""
+    browser = page.context.browser
+    await page.context.close()
+    return await (await browser.new_context()).new_page()
+
+
+async def run_job(
+    payloads: list[Payload],
+    pages: list[Page],
+    maximum_attempts: int = 1,
+    job_run_id: str | None = None,
+    import_function: ImportFunction = import_api,
+    setup_context: Callable[..., Awaitable[Any]] | None = None,
+    cdp_url: str | None = None,
+) -> list[PayloadRun]:
+    """
+    Run `payloads` and every payload they extend, each on one of `pages` (so
+    at most `len(pages)` payloads run at a time).
+
+    Each attempt runs in its own `IntunedContext`, so `extend_payload`,
+    `attempt_store` and the job run ID behave as on Intuned: payloads extended
+    by a failed attempt are dropped, and a failed attempt is retried (up to
+    `maximum_attempts`) on a page in a new browser context. `setup_context`
+    (the project's hook) runs before every attempt with `cdp_url`; hooks
+    returning their own browser context are not supported, which is checked
+    once before any payload runs.
+
+    Raises:
+        UnsupportedHookError: If `setup_context` returns a browser context.
+    """
+    job_run_id = job_run_id or f"local-{uuid.uuid4()}"
+    queue: asyncio.Queue[Payload] = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    runs: list[PayloadRun] = []
+
+    def new_context() -> IntunedContext:
+        return IntunedContext(
+            run_context={"job_run_id": job_run_id, "run_id": str(uuid.uuid4())}
+        )
+
+    async def run_setup_context(payload: Payload) -> None:
+        if setup_context and await setup_context(
+            api_name=payload["api"],
+            api_parameters=payload["parameters"],
+            cdp_url=cdp_url,
+        ):
+            raise UnsupportedHookError(
+                "setup_context hooks returning a browser context"
+            )
+
+    if setup_context and payloads:
+        with new_context():
+            await run_setup_context(payloads[0])
+
+    async def run_payload(page: Page, payload: Payload) -> Page:
+        started = time.perf_counter()
+        result, error, attempts = None, None, 0
+        while attempts < maximum_attempts:
+            attempts += 1
+            context = new_context()
+            try:
+                with context:
+                    await run_setup_context(payload)
+                    automation = import_function(payload["api"])
+                    result = _to_json(await automation(page, payload["parameters"]))
+            except UnsupportedHookError as e:
+                # Retrying cannot help: fail the payload without another attempt
+                error = f"{type(e).__name__}: {e}"
+                print(f"[local_job] {payload['api']} failed: {error}")
+                break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                print(
+                    f"[local_job] {payload['api']} attempt {attempts} failed: {error}"
+                )
+                try:
+                    page = await _fresh_page(page)
+                except Exception as e:
+                    # Reported with this payload; the next payload tries again
+                    error = f"{error} (no new page: {type(e).__name__}: {e})"
+                    print(f"[local_job] {payload['api']} not retried: {error}")
+                    break
+                continue
+
+            error = None
+            for extended in context.extended_payloads:
+                queue.put_nowait(
+                    {
+                        "api": extended["api"],
+                        "parameters": _to_json(extended["parameters"]),
+                    }
+                )
+            break
+
+        runs.append(
+            {
+                "api": payload["api"],
+                "parameters": payload["parameters"],
+                "result": result if error is None else None,
+                "error": error,
+                "attempts": attempts,
+                "seconds": time.perf_counter() - started,
+            }
+        )
+        return page
+
+    async def worker(page: Page) -> None:
+        while True:
+            payload = await queue.get()
+            try:
+                page = await run_payload(page, payload)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker(page)) for page in pages]
+    try:
+        await queue.join()
+    finally:
+        for task in workers:
+            task.cancel()
+    return runs
+
+
+async def run_job_file(
+    path: str | Path,
+    concurrency: int | None = None,
+    maximum_attempts: int | None = None,
+    store: MemoryStore | None = None,
+    headless: bool = True,
+) -> list[PayloadRun]:
+    """Run a `*.job.jsonc` file on a local Chromium (see `run_job`)."""
+    payloads, config = load_job(path)
+    concurrency = concurrency or config["max_concurrent_requests"]
+    setup_context = load_setup_context_hook()
+    port = _free_port() if setup_context else None
+    with use_store(store or MemoryStore()):
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(
+                headless=headless,
+                args=[f"--remote-debugging-port={port}"] if port else None,
+            )
+            cdp_url = (
+                await asyncio.to_thread(_websocket_cdp_url, port) if port else None
+            )
+            pages = [
+                await (await browser.new_context()).new_page()
+                for _ in range(concurrency)
+            ]
+            try:
+                return await run_job(
+                    payloads,
+                    pages,
+                    maximum_attempts=maximum_attempts or config["maximum_attempts"],
+                    setup_context=setup_context,
+                    cdp_url=cdp_url,
+                )
+            finally:
+                await browser.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("job", help="Path to a *.job.jsonc file")
+    parser.add_argument(
+        "--concurrency", type=int, help="Override maxConcurrentRequests"
+    )
+    parser.add_argument("--attempts", type=int, help="Override retry.maximumAttempts")
+    parser.add_argument("--store-file", help="JSON file persisting persistent_store")
+    parser.add_argument(
+        "--store-latency-ms", type=float, default=0, help="Added per store call"
+    )
+    parser.add_argument("--output", help="Write one JSON line per payload here")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(Path.cwd()))
+    store = MemoryStore(args.store_latency_ms, args.store_file)
+    started = time.perf_counter()
+    runs = asyncio.run(
+        run_job_file(
+            args.job,
+            concurrency=args.concurrency,
+            maximum_attempts=args.attempts,
+            store=store,
+            headless=not args.headed,
+        )
+    )
+    seconds = time.perf_counter() - started
+
+    if args.output:
+        with open(args.output, "w") as output:
+            for run in runs:
+                output.write(json.dumps(run) + "\n")
+
+    failed = sum(1 for run in runs if run["error"])
+    retried = sum(1 for run in runs if run["attempts"] > 1)
+    print(
+        f"[local_job] {len(runs)} payloads in {seconds:.1f}s: "
+        f"{len(runs) - failed} succeeded, {failed} failed, {retried} retried, "
+        f"{store.gets} store gets, {store.sets} store sets"
+    )
+
+
+if __name__ == "__main__":
+    main()
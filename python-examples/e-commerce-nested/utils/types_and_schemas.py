@@ -3,17 +3,29 @@ from pydantic import BaseModel, Field
 
 class EcommereceCategoryParams(BaseModel):
     store_url: str = Field(..., description="The URL of the store to scrape")
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 class EcommereceListParams(BaseModel):
     category_name: str = Field(..., description="The name of the category")
     category_url: str = Field(..., description="The URL of the category")
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 class EcommereceDetailsParams(BaseModel):
     name: str = Field(..., description="The name of the product")
     price: str = Field(..., description="The price of the product")
     details_url: str = Field(..., description="The URL of the product details")
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 class Category(BaseModel):
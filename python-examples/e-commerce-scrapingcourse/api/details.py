@@ -6,6 +6,7 @@ from typing import TypedDict
 from intuned_browser import Attachment, go_to_url, save_file_to_s3
 from playwright.async_api import Page
 from pydantic import HttpUrl
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import (
     DetailsSchema,
     ProductDetails,
@@ -160,6 +161,8 @@ async def automation(page: Page, params: Params, **_kwargs) -> ProductDetails:
     validated_params = DetailsSchema(**params)
 
     # Navigate to the product detail page using the URL from params
+    # (product images are saved, so they are never blocked)
+    await block_resources(page, validated_params.block_resources, allow_types=["image"])
     await go_to_url(
         page=page,
         url=str(validated_params.detailsUrl),
@@ -4,6 +4,7 @@ from typing import TypedDict
 from intuned_browser import go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import Page
+from utils.resource_blocking import block_resources
 from utils.types_and_schemas import ListSchema
 
 
@@ -28,7 +29,9 @@ async def has_next_page(page: Page) -> bool:
     return count > 0
 
 
-async def extract_products_from_page(page: Page) -> list[Product]:
+async def extract_products_from_page(
+    page: Page, block_resources_params: bool | dict | None = None
+) -> list[Product]:
     # Wait for the product list container to be visible on the page
     # This ensures the page has fully loaded before we try to scrape
     products_container = page.locator("#product-list")
@@ -66,7 +69,10 @@ async def extract_products_from_page(page: Page) -> list[Product]:
                 extend_payload(
                     {
                         "api": "details",
-                        "parameters": product,
+                        "parameters": {
+                            **product,
+                            "block_resources": block_resources_params,
+                        },
                     }
                 )
         except Exception as error:
@@ -94,6 +100,7 @@ async def automation(page: Page, params: Params, **_kwargs) -> list[Product]:
     page_limit = validated_params.limit or 50
 
     # Navigate to the e-commerce website
+    await block_resources(page, validated_params.block_resources)
     await go_to_url(
         page=page,
         url="https://www.scrapingcourse.com/ecommerce/",
@@ -108,7 +115,9 @@ async def automation(page: Page, params: Params, **_kwargs) -> list[Product]:
         print(f"Scraping page {current_page}...")
 
         # Extract all products from the current page
-        products = await extract_products_from_page(page)
+        products = await extract_products_from_page(
+            page, validated_params.block_resources
+        )
 
         # Add the products from this page to our complete list
         all_products.extend(products)
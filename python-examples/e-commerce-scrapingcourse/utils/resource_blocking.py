@@ -0,0 +1,120 @@
+import weakref
+from collections.abc import Awaitable, Callable
+from typing import TypedDict
+from urllib.parse import urlsplit
+
+from playwright.async_api import BrowserContext, Page, Route
+
+# Resource types blocked by default: none of them are needed to read HTML or text
+DEFAULT_BLOCKED_TYPES = ["image", "media", "font"]
+
+# Analytics, ads and session-recording hosts (subdomains included)
+TRACKER_HOSTS = {
+    "google-analytics.com",
+    "googletagmanager.com",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "doubleclick.net",
+    "connect.facebook.net",
+    "analytics.tiktok.com",
+    "bat.bing.com",
+    "clarity.ms",
+    "snap.licdn.com",
+    "static.ads-twitter.com",
+    "hotjar.com",
+    "fullstory.com",
+    "segment.com",
+    "segment.io",
+    "mixpanel.com",
+    "amplitude.com",
+    "heap.io",
+    "heapanalytics.com",
+    "js-agent.newrelic.com",
+    "bam.nr-data.net",
+    "scorecardresearch.com",
+    "quantserve.com",
+    "criteo.com",
+    "criteo.net",
+    "taboola.com",
+    "outbrain.com",
+}
+
+
+class BlockResourcesParams(TypedDict, total=False):
+    resource_types: list[str]  # Playwright resource types to block (default: above)
+    block_trackers: bool  # Block TRACKER_HOSTS (default: True)
+    allow_types: list[str]  # Resource types never blocked (per-API allowlist)
+    allow_hosts: list[str]  # Hosts (and subdomains) never blocked
+
+
+# Pages/contexts with a blocking route: the settings it was installed with
+# and its handler, so it is installed once per settings and replaced when a
+# later call (e.g. another API on a reused page) asks for other settings
+_routes: weakref.WeakKeyDictionary[
+    Page | BrowserContext,
+    tuple[tuple, Callable[[Route], Awaitable[None]]],
+] = weakref.WeakKeyDictionary()
+
+
+def _matches_host(host: str, hosts: set[str]) -> bool:
+    """True if `host` is one of `hosts` or a subdomain of one."""
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in hosts for i in range(len(parts) - 1))
+
+
+async def block_resources(
+    target: Page | BrowserContext,
+    params: BlockResourcesParams | bool | None,
+    allow_types: list[str] | None = None,
+) -> None:
+    """
+    Abort requests for images, media, fonts and tracker scripts on `target`.
+
+    The route is kept per `target`: calling again with the same settings is a
+    no-op, with other settings (or `params=False`) it replaces the route.
+
+    Args:
+        target: Page (or whole browser context) to install the route on
+        params: The API's `block_resources` param. None or False disables it,
+            `True` uses the defaults
+        allow_types: Resource types the calling API needs (e.g. `["image"]`
+            for an API that saves product images), merged with
+            `params["allow_types"]`
+    """
+    installed = _routes.get(target)
+    if params is None or params is False:
+        if installed:
+            await target.unroute("**/*", installed[1])
+            del _routes[target]
+        return
+    options: BlockResourcesParams = params if isinstance(params, dict) else {}
+
+    allowed_types = {*options.get("allow_types", []), *(allow_types or [])}
+    blocked_types = set(options.get("resource_types", DEFAULT_BLOCKED_TYPES))
+    blocked_types -= allowed_types
+    blocked_hosts = TRACKER_HOSTS if options.get("block_trackers", True) else set()
+    allowed_hosts = {host.lower() for host in options.get("allow_hosts", [])}
+
+    settings = (
+        frozenset(blocked_types),
+        bool(blocked_hosts),
+        frozenset(allowed_hosts),
+    )
+    if installed:
+        if installed[0] == settings:
+            return
+        await target.unroute("**/*", installed[1])
+
+    async def handle(route: Route) -> None:
+        request = route.request
+        host = (urlsplit(request.url).hostname or "").lower()
+        blocked = request.resource_type in blocked_types or _matches_host(
+            host, blocked_hosts
+        )
+        if blocked and not _matches_host(host, allowed_hosts):
+            await route.abort("blockedbyclient")
+        else:
+            await route.fallback()
+
+    await target.route("**/*", handle)
+    _routes[target] = (settings, handle)
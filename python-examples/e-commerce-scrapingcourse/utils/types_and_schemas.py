@@ -4,11 +4,13 @@ from pydantic import BaseModel, HttpUrl, field_validator
 
 class ListSchema(BaseModel):
     limit: int | None = None
+    block_resources: bool | dict | None = None  # Skip images, fonts, trackers
 
 
 class DetailsSchema(BaseModel):
     name: str
     detailsUrl: HttpUrl
+    block_resources: bool | dict | None = None  # Skip fonts, media, trackers
 
     @field_validator("name")
     @classmethod
@@ -1,8 +1,9 @@
 import re
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 
 from intuned_browser import go_to_url
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import BlockResourcesParams, block_resources
 
 
 class Params(TypedDict):
@@ -11,6 +12,7 @@ class Params(TypedDict):
     product_type: str
     tags: list[str]
     details_url: str
+    block_resources: NotRequired[BlockResourcesParams | bool]
 
 
 class ProductVariant(TypedDict):
@@ -115,6 +117,7 @@ async def automation(
         raise ValueError("Params are required for this automation")
 
     details_url = params["details_url"]
+    await block_resources(page, params.get("block_resources"))
     await go_to_url(page, details_url)
     # Build JSON endpoint URL
     json_url = f"{details_url}.json"
@@ -4,11 +4,13 @@ from urllib.parse import urlparse
 from intuned_browser import go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
+from utils.resource_blocking import BlockResourcesParams, block_resources
 
 
 class Params(TypedDict, total=False):
     store_url: str  # The Shopify store URL (e.g., "https://the-outrage.com")
     max_pages: int  # Maximum number of pages to scrape (default: 10)
+    block_resources: BlockResourcesParams | bool  # Skip images, fonts, trackers
 
 
 class Product(TypedDict):
@@ -83,6 +85,7 @@ async def automation(
     max_pages = params.get("max_pages", 10)
 
     # Navigate to the store home page
+    await block_resources(page, params.get("block_resources"))
     await go_to_url(page, store_url)
 
     all_products: list[Product] = []
@@ -111,7 +114,10 @@ async def automation(
         extend_payload(
             {
                 "api": "shopify-details",
-                "parameters": dict(product),
+                "parameters": {
+                    **product,
+                    "block_resources": params.get("block_resources"),
+                },
             }
         )
     return {"products": all_products}
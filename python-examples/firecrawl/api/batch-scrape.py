@@ -0,0 +1,147 @@
+"""
+Scrape many webpages in one run, with multiple output formats.
+
+Firecrawl-compatible /batch/scrape endpoint using crawl4ai.
+https://docs.firecrawl.dev/api-reference/endpoint/batch-scrape
+"""
+
+from typing import Any, TypedDict
+from urllib.parse import urlparse
+
+from playwright.async_api import BrowserContext, Page
+from utils import (
+    FormatType,
+    LocationParams,
+    ResponseBuilder,
+    build_css_selector,
+    create_browser_config,
+    get_excluded_tags,
+    get_locale_settings,
+    get_runtime_cdp_url,
+    pooled_crawler,
+)
+
+from crawl4ai import MemoryAdaptiveDispatcher
+from crawl4ai.async_configs import CacheMode, CrawlerRunConfig
+
+
+class Params(TypedDict, total=False):
+    urls: list[str]
+    formats: list[FormatType]
+    onlyMainContent: bool
+    includeTags: list[str]
+    excludeTags: list[str]
+    waitFor: int
+    mobile: bool
+    skipTlsVerification: bool
+    timeout: int
+    headers: dict[str, str]
+    removeBase64Images: bool
+    location: LocationParams
+    maxConcurrency: int
+    ignoreInvalidURLs: bool
+    useRuntimeBrowser: bool  # Crawl in the browser Intuned started for this run
+
+
+def is_valid_url(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+
+
+async def automation(
+    page: Page,
+    params: Params,
+    context: BrowserContext | None = None,
+    **_kwargs,
+):
+    urls = params.get("urls") or []
+    if not urls:
+        return {"success": False, "error": "urls parameter is required"}
+
+    formats = params.get("formats", ["markdown"])
+    only_main_content = params.get("onlyMainContent", True)
+    include_tags = params.get("includeTags", [])
+    exclude_tags = params.get("excludeTags", [])
+    wait_for = params.get("waitFor", 0)
+    mobile = params.get("mobile", False)
+    skip_tls = params.get("skipTlsVerification", True)
+    timeout = params.get("timeout", 30000)
+    headers = params.get("headers", {})
+    remove_base64 = params.get("removeBase64Images", True)
+    location = params.get("location", {})
+    max_concurrency = params.get("maxConcurrency", 5)
+    ignore_invalid = params.get("ignoreInvalidURLs", True)
+    use_runtime_browser = params.get("useRuntimeBrowser", False)
+
+    invalid_urls = [url for url in urls if not is_valid_url(url)]
+    if invalid_urls and not ignore_invalid:
+        return {
+            "success": False,
+            "error": "Invalid URLs",
+            "invalidURLs": invalid_urls,
+        }
+    valid_urls = [url for url in urls if is_valid_url(url)]
+
+    excluded_tags = get_excluded_tags(exclude_tags, only_main_content)
+    css_selector = build_css_selector(include_tags)
+    locale, timezone_id = get_locale_settings(
+        location.get("country", "US"),
+        location.get("languages"),
+    )
+    browser_config = create_browser_config(
+        mobile=mobile,
+        headers=headers if headers else None,
+        skip_tls_verification=skip_tls,
+        cdp_url=get_runtime_cdp_url() if use_runtime_browser else None,
+    )
+
+    run_config = CrawlerRunConfig(
+        stream=True,
+        screenshot="screenshot" in formats,
+        cache_mode=CacheMode.BYPASS,
+        excluded_tags=excluded_tags if excluded_tags else None,
+        css_selector=css_selector,
+        delay_before_return_html=wait_for / 1000.0 if wait_for else 0,
+        page_timeout=timeout,
+        locale=locale,
+        timezone_id=timezone_id,
+        verbose=True,
+    )
+
+    # Pages load up to maxConcurrency at a time, fewer while memory is high
+    dispatcher = MemoryAdaptiveDispatcher(max_session_permit=max_concurrency)
+
+    # Screenshots upload in the background while the next pages load
+    builder = ResponseBuilder(formats, remove_base64_images=remove_base64)
+    errors: list[dict[str, Any]] = []
+
+    async with pooled_crawler(browser_config) as crawler:
+        # Results arrive as each page finishes, not in `urls` order
+        async for result in await crawler.arun_many(
+            urls=valid_urls, config=run_config, dispatcher=dispatcher
+        ):
+            if not result.success:
+                errors.append(
+                    {
+                        "url": result.url,
+                        "error": result.error_message,
+                        "statusCode": result.status_code,
+                    }
+                )
+            else:
+                await builder.submit(result)
+            print(
+                f"[batch-scrape] {builder.submitted + len(errors)}/{len(valid_urls)} "
+                f"done, {len(errors)} failed"
+            )
+
+    data = await builder.results()
+    return {
+        "success": True,
+        "status": "completed",
+        "total": len(valid_urls),
+        "completed": len(data),
+        "data": data,
+        "errors": errors,
+        "invalidURLs": invalid_urls,
+    }
@@ -5,26 +5,30 @@ Firecrawl-compatible /crawl endpoint using crawl4ai.
 https://docs.firecrawl.dev/api-reference/endpoint/crawl-post
 """
 
+import asyncio
 import re
-from typing import Any, Literal, TypedDict
-from urllib.parse import urlparse
+import time
+from contextlib import aclosing
+from typing import Literal, TypedDict
+from urllib.parse import urljoin
 
 from playwright.async_api import BrowserContext, Page
 from utils import (
+    CrawlFrontier,
     FormatType,
     LocationParams,
-    build_response_item,
+    ResponseBuilder,
     create_browser_config,
-    fetch_sitemap_urls,
     get_excluded_tags,
     get_locale_settings,
+    get_runtime_cdp_url,
     is_child_path,
     is_same_domain,
-    normalize_url,
+    iter_sitemap_entries,
+    pooled_crawler,
 )
 
-from crawl4ai import AsyncWebCrawler, CacheMode, CrawlerRunConfig
-from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
+from crawl4ai import CacheMode, CrawlerRunConfig, CrawlResult
 from crawl4ai.deep_crawling.filters import (
     ContentTypeFilter,
     FilterChain,
@@ -59,6 +63,7 @@ class Params(TypedDict, total=False):
     delay: int  # milliseconds
     scrapeOptions: ScrapeOptions
     maxConcurrency: int
+    useRuntimeBrowser: bool  # Crawl in the browser Intuned started for this run
 
 
 async def automation(
@@ -83,6 +88,7 @@ async def automation(
     delay_ms = params.get("delay", 0)
     max_concurrency = params.get("maxConcurrency", 5)
     scrape_options = params.get("scrapeOptions", {})
+    use_runtime_browser = params.get("useRuntimeBrowser", False)
 
     # Build scrape config from options
     formats = scrape_options.get("formats", ["markdown"])
@@ -110,32 +116,23 @@ async def automation(
         include_patterns = [re.compile(p) for p in include_paths]
         filters.append(URLPatternFilter(patterns=include_patterns, reverse=False))
 
-    if not crawl_entire_domain:
-        # Restrict to child paths only (URLs must start with the base path)
-        base_path = urlparse(url).path.rstrip("/")
-        if base_path:
-            base_pattern = re.escape(base_path)
-            filters.append(
-                URLPatternFilter(
-                    patterns=[re.compile(f"^{base_pattern}(/.*)?$")], reverse=False
-                )
-            )
+    filter_chain = FilterChain(filters)
 
-    strategy = BFSDeepCrawlStrategy(
-        max_depth=max_depth,
-        max_pages=limit,
-        include_external=allow_external,
-        filter_chain=FilterChain(filters),
-    )
+    async def is_allowed(link: str) -> bool:
+        """Domain, child path (unless crawlEntireDomain) and path pattern rules."""
+        return (
+            (allow_external or is_same_domain(link, url, allow_subdomains))
+            and (crawl_entire_domain or is_child_path(link, url))
+            and await filter_chain.apply(link)
+        )
 
     browser_config = create_browser_config(
         mobile=scrape_options.get("mobile", False),
         headers=scrape_options.get("headers"),
+        cdp_url=get_runtime_cdp_url() if use_runtime_browser else None,
     )
 
     run_config = CrawlerRunConfig(
-        deep_crawl_strategy=strategy,
-        stream=True,
         cache_mode=CacheMode.BYPASS,
         screenshot="screenshot" in formats,
         excluded_tags=excluded_tags if excluded_tags else None,
@@ -144,54 +141,69 @@ async def automation(
         locale=locale,
         timezone_id=timezone_id,
         verbose=True,
-        semaphore_count=max_concurrency,
     )
 
-    seen_urls: set[str] = set()
-    data: list[dict[str, Any]] = []
-
-    async with AsyncWebCrawler(config=browser_config) as crawler:
-        seed_urls = [url]
-        if sitemap_mode == "include":
-            sitemap_urls = await fetch_sitemap_urls(page, url)
-            filtered_sitemap = [
-                sitemap_url
-                for sitemap_url in sitemap_urls
-                if (
-                    allow_external or is_same_domain(sitemap_url, url, allow_subdomains)
-                )
-                and (crawl_entire_domain or is_child_path(sitemap_url, url))
-            ]
-            seed_urls.extend(filtered_sitemap[:limit])
-
-        for seed in seed_urls:
-            if len(data) >= limit:
-                break
-
-            normalized = normalize_url(seed, ignore_query)
-            if normalized in seen_urls:
-                continue
-
-            async for result in await crawler.arun(url=seed, config=run_config):
-                if len(data) >= limit:
+    # One breadth-first frontier for the start URL and every sitemap URL, so
+    # pages reachable from several seeds are queued (and fetched) once
+    frontier = CrawlFrontier(max_depth, ignore_query)
+    frontier.add(url)
+    if sitemap_mode == "include":
+        # Sitemap URLs are crawled first, so at most `limit` of them are needed
+        seeded = 0
+        async with aclosing(iter_sitemap_entries(url)) as entries:
+            async for entry in entries:
+                if await is_allowed(entry["url"]) and frontier.add(entry["url"]):
+                    seeded += 1
+                    if seeded >= limit:
+                        break
+
+    # Screenshots upload in the background while the next pages load
+    builder = ResponseBuilder(formats, remove_base64_images=remove_base64)
+
+    async def fetch(target: str, depth: int) -> tuple[CrawlResult, int, float]:
+        started = time.perf_counter()
+        result = await crawler.arun(url=target, config=run_config)
+        return result, depth, round(time.perf_counter() - started, 3)
+
+    async with pooled_crawler(browser_config) as crawler:
+        in_flight: set[asyncio.Task[tuple[CrawlResult, int, float]]] = set()
+        try:
+            while frontier or in_flight:
+                # Keep up to maxConcurrency pages loading, never more than
+                # the pages still needed to reach `limit`
+                while (
+                    frontier
+                    and len(in_flight) < max_concurrency
+                    and builder.submitted + len(in_flight) < limit
+                ):
+                    in_flight.add(asyncio.create_task(fetch(*frontier.pop())))
+                if not in_flight:
                     break
 
-                if not result.success:
-                    continue
-
-                result_normalized = normalize_url(result.url, ignore_query)
-                if result_normalized in seen_urls:
-                    continue
-
-                seen_urls.add(result_normalized)
-
-                item = await build_response_item(
-                    result,
-                    formats,
-                    remove_base64_images=remove_base64,
+                done, in_flight = await asyncio.wait(
+                    in_flight, return_when=asyncio.FIRST_COMPLETED
                 )
-
-                data.append(item)
+                for task in done:
+                    result, depth, crawl_seconds = task.result()
+                    if not result.success or builder.submitted >= limit:
+                        continue
+                    # Redirects can land on a page already crawled
+                    redirected = result.redirected_url or result.url
+                    if redirected != result.url and not frontier.mark_seen(redirected):
+                        continue
+
+                    await builder.submit(result, crawl_seconds)
+
+                    if depth < max_depth:
+                        for link in page_links(result, allow_external):
+                            if await is_allowed(link):
+                                frontier.add(link, depth + 1)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    # Uploads still running do not need the crawler
+    data = await builder.results()
 
     return {
         "success": True,
@@ -200,3 +212,12 @@ async def automation(
         "completed": len(data),
         "data": data,
     }
+
+
+def page_links(result: CrawlResult, include_external: bool) -> list[str]:
+    """Absolute URLs of the links found on a crawled page."""
+    links = list(result.links.get("internal", []))
+    if include_external:
+        links += result.links.get("external", [])
+    base = result.redirected_url or result.url
+    return [urljoin(base, link["href"].strip()) for link in links if link.get("href")]
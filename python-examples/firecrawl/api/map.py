@@ -5,19 +5,22 @@ Firecrawl-compatible /map endpoint using crawl4ai.
 https://docs.firecrawl.dev/api-reference/endpoint/map
 """
 
+from contextlib import aclosing
 from typing import Any, Literal, TypedDict
 
 from playwright.async_api import BrowserContext, Page
 from utils import (
     LocationParams,
     create_browser_config,
-    fetch_sitemap_urls,
+    dedup_key,
     get_locale_settings,
+    get_runtime_cdp_url,
     is_subdomain_of,
-    normalize_url,
+    iter_sitemap_entries,
+    pooled_crawler,
 )
 
-from crawl4ai import AsyncWebCrawler, CacheMode, CrawlerRunConfig, LinkPreviewConfig
+from crawl4ai import CacheMode, CrawlerRunConfig, LinkPreviewConfig
 
 
 class Params(TypedDict, total=False):
@@ -29,6 +32,7 @@ class Params(TypedDict, total=False):
     limit: int
     timeout: int
     location: LocationParams
+    useRuntimeBrowser: bool  # Crawl in the browser Intuned started for this run
 
 
 async def automation(
@@ -48,12 +52,15 @@ async def automation(
     limit = params.get("limit", 5000)
     timeout = params.get("timeout", 30000)
     location = params.get("location", {})
+    use_runtime_browser = params.get("useRuntimeBrowser", False)
 
     locale, timezone_id = get_locale_settings(
         location.get("country", "US"),
         location.get("languages"),
     )
-    browser_config = create_browser_config()
+    browser_config = create_browser_config(
+        cdp_url=get_runtime_cdp_url() if use_runtime_browser else None,
+    )
 
     config = CrawlerRunConfig(
         link_preview_config=LinkPreviewConfig(
@@ -68,21 +75,27 @@ async def automation(
         verbose=True,
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
+    async with pooled_crawler(browser_config) as crawler:
         seen_urls: set[str] = set()
         links: list[dict[str, Any]] = []
 
         # Get sitemap URLs if mode is "include" or "only"
         if sitemap_mode in ("include", "only"):
-            sitemap_urls = await fetch_sitemap_urls(page, url)
-            for sitemap_url in sitemap_urls:
-                normalized = normalize_url(sitemap_url, ignore_query)
-                if normalized in seen_urls:
-                    continue
-                if not include_subdomains and not is_subdomain_of(sitemap_url, url):
-                    continue
-                seen_urls.add(normalized)
-                links.append({"url": sitemap_url, "title": None, "description": None})
+            async with aclosing(iter_sitemap_entries(url)) as entries:
+                async for entry in entries:
+                    # Without `search`, links past `limit` are never returned
+                    if not search and len(links) >= limit:
+                        break
+                    sitemap_url = entry["url"]
+                    normalized = dedup_key(sitemap_url, ignore_query)
+                    if normalized in seen_urls:
+                        continue
+                    if not include_subdomains and not is_subdomain_of(sitemap_url, url):
+                        continue
+                    seen_urls.add(normalized)
+                    links.append(
+                        {"url": sitemap_url, "title": None, "description": None}
+                    )
 
         # Get page links if mode is "include" or "skip"
         if sitemap_mode in ("include", "skip"):
@@ -95,7 +108,7 @@ async def automation(
             if result.success:
                 for link in result.links.get("internal", []):
                     link_url = link.get("href", "")
-                    normalized = normalize_url(link_url, ignore_query)
+                    normalized = dedup_key(link_url, ignore_query)
 
                     if normalized in seen_urls:
                         continue
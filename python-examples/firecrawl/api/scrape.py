@@ -5,6 +5,7 @@ Firecrawl-compatible /scrape endpoint using crawl4ai.
 https://docs.firecrawl.dev/api-reference/endpoint/scrape
 """
 
+import time
 from typing import TypedDict
 
 from playwright.async_api import BrowserContext, Page
@@ -16,9 +17,10 @@ from utils import (
     create_browser_config,
     get_excluded_tags,
     get_locale_settings,
+    get_runtime_cdp_url,
+    pooled_crawler,
 )
 
-from crawl4ai import AsyncWebCrawler
 from crawl4ai.async_configs import CacheMode, CrawlerRunConfig
 
 
@@ -35,6 +37,7 @@ class Params(TypedDict, total=False):
     headers: dict[str, str]
     removeBase64Images: bool
     location: LocationParams
+    useRuntimeBrowser: bool  # Crawl in the browser Intuned started for this run
 
 
 async def automation(
@@ -58,6 +61,7 @@ async def automation(
     headers = params.get("headers", {})
     remove_base64 = params.get("removeBase64Images", True)
     location = params.get("location", {})
+    use_runtime_browser = params.get("useRuntimeBrowser", False)
 
     excluded_tags = get_excluded_tags(exclude_tags, only_main_content)
     css_selector = build_css_selector(include_tags)
@@ -69,6 +73,7 @@ async def automation(
         mobile=mobile,
         headers=headers if headers else None,
         skip_tls_verification=skip_tls,
+        cdp_url=get_runtime_cdp_url() if use_runtime_browser else None,
     )
 
     run_config = CrawlerRunConfig(
@@ -83,8 +88,10 @@ async def automation(
         verbose=True,
     )
 
-    async with AsyncWebCrawler(config=browser_config) as crawler:
+    async with pooled_crawler(browser_config) as crawler:
+        started = time.perf_counter()
         result = await crawler.arun(url=url, config=run_config)
+        crawl_seconds = round(time.perf_counter() - started, 3)
 
         if not result.success:
             return {"success": False, "error": result.error_message}
@@ -93,6 +100,7 @@ async def automation(
             result,
             formats,
             remove_base64_images=remove_base64,
+            crawl_seconds=crawl_seconds,
         )
 
         return {"success": True, "data": data}
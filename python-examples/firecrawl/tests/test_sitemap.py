@@ -0,0 +1,53 @@
+import gzip
+
+from utils.sitemap import SitemapParser
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1"
+        xmlns:video="http://www.google.com/schemas/sitemap-video/1.1">
+  <url>
+    <loc>https://ex.com/page-1</loc>
+    <lastmod>2024-05-01</lastmod>
+    <image:image>
+      <image:loc>https://ex.com/wp-content/a.jpg</image:loc>
+    </image:image>
+  </url>
+  <url>
+    <image:image><image:loc>https://ex.com/wp-content/b.jpg</image:loc></image:image>
+    <video:video>
+      <video:content_loc>https://ex.com/v.mp4</video:content_loc>
+      <video:player_loc>https://ex.com/player</video:player_loc>
+    </video:video>
+    <loc>https://ex.com/page-2</loc>
+  </url>
+</urlset>
+"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://ex.com/sitemap-1.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+
+def parse(body: bytes, chunk_size: int = 7) -> list:
+    parser = SitemapParser()
+    items = []
+    for start in range(0, len(body), chunk_size):
+        for chunk_items in parser.feed(body[start : start + chunk_size]):
+            items.extend(chunk_items)
+    return items + parser.close()
+
+
+def test_extension_locs_do_not_replace_page_loc():
+    assert parse(URLSET) == [
+        ("url", {"url": "https://ex.com/page-1", "lastmod": "2024-05-01"}),
+        ("url", {"url": "https://ex.com/page-2", "lastmod": None}),
+    ]
+
+
+def test_gzipped_sitemap_index():
+    assert parse(gzip.compress(INDEX)) == [
+        ("sitemap", {"url": "https://ex.com/sitemap-1.xml", "lastmod": None}),
+    ]
@@ -0,0 +1,13 @@
+from utils.url import dedup_key, normalize_url
+
+URL = "https://EX.com:443/jobs?utm_source=x&page=2&sort=new"
+
+
+def test_normalize_url_keeps_the_url():
+    assert normalize_url(URL) == URL
+    assert normalize_url(URL, ignore_query=True) == "https://EX.com:443/jobs"
+
+
+def test_dedup_key_is_canonical():
+    assert dedup_key(URL) == "https://ex.com/jobs?page=2&sort=new"
+    assert dedup_key(URL, ignore_query=True) == "https://ex.com/jobs"
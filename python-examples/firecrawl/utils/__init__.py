@@ -4,17 +4,31 @@ from .browser import (
     MOBILE_VIEWPORT,
     create_browser_config,
 )
+from .canonical import UrlRules, get_canonicalizer
 from .content import (
     MAIN_CONTENT_EXCLUDED_TAGS,
     build_css_selector,
     get_excluded_tags,
     remove_base64_images,
 )
+from .crawler_pool import (
+    CrawlerPool,
+    get_crawler_pool,
+    get_runtime_cdp_url,
+    pooled_crawler,
+)
+from .frontier import CrawlFrontier
 from .location import get_locale_settings
-from .response import build_response_item, extract_metadata
-from .sitemap import fetch_sitemap_urls
+from .response import ResponseBuilder, build_response_item, extract_metadata
+from .sitemap import (
+    SitemapEntry,
+    discover_sitemaps,
+    iter_sitemap_entries,
+    sitemap_client,
+)
 from .types import FormatType, LocationParams
 from .url import (
+    dedup_key,
     is_child_path,
     is_same_domain,
     is_subdomain_of,
@@ -32,6 +46,11 @@ __all__ = [
     "MOBILE_USER_AGENT",
     "MOBILE_VIEWPORT",
     "DESKTOP_VIEWPORT",
+    # Crawler pool
+    "CrawlerPool",
+    "get_crawler_pool",
+    "get_runtime_cdp_url",
+    "pooled_crawler",
     # Content
     "get_excluded_tags",
     "remove_base64_images",
@@ -40,11 +59,20 @@ __all__ = [
     # Response
     "extract_metadata",
     "build_response_item",
+    "ResponseBuilder",
     # URL
     "normalize_url",
+    "dedup_key",
+    "get_canonicalizer",
+    "UrlRules",
     "is_subdomain_of",
     "is_same_domain",
     "is_child_path",
     # Sitemap
-    "fetch_sitemap_urls",
+    "SitemapEntry",
+    "discover_sitemaps",
+    "iter_sitemap_entries",
+    "sitemap_client",
+    # Frontier
+    "CrawlFrontier",
 ]
@@ -17,6 +17,7 @@ def create_browser_config(
     skip_tls_verification: bool = True,
     headless: bool = True,
     verbose: bool = True,
+    cdp_url: str | None = None,
 ) -> BrowserConfig:
     viewport = MOBILE_VIEWPORT if mobile else DESKTOP_VIEWPORT
 
@@ -34,4 +35,11 @@ def create_browser_config(
     if headers:
         config_kwargs["headers"] = headers
 
+    if cdp_url:
+        # Crawl in an existing browser: a context per run config, so pages do
+        # not share navigation with the browser's own, and disconnect on close
+        config_kwargs["cdp_url"] = cdp_url
+        config_kwargs["create_isolated_context"] = True
+        config_kwargs["cdp_cleanup_on_close"] = True
+
     return BrowserConfig(**config_kwargs)
@@ -0,0 +1,161 @@
+import json
+import re
+from fnmatch import translate
+from functools import lru_cache
+from typing import TypedDict
+from urllib.parse import quote, unquote_plus, urlsplit, urlunsplit
+
+
+class UrlRules(TypedDict, total=False):
+    keep_query: bool  # Keep the query string (default: True)
+    sort_query: bool  # Sort query parameters by name (default: True)
+    strip_tracking_params: bool  # Drop utm_*, fbclid, ... (default: True)
+    drop_params: list[str]  # Extra query params to drop, glob patterns allowed
+    keep_fragment: bool  # Keep #fragment, e.g. for hash routers (default: False)
+    strip_trailing_slash: bool  # "/docs/" -> "/docs" (default: True)
+
+
+TRACKING_PARAMS = [
+    "utm_*",
+    "fbclid",
+    "gclid",
+    "dclid",
+    "gbraid",
+    "wbraid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+    "_hsenc",
+    "_hsmi",
+    "mkt_tok",
+    "ref_src",
+    "s_cid",
+]
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Characters that never need percent-encoding (RFC 3986 "unreserved")
+_UNRESERVED = frozenset(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~"
+)
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_PATH_SAFE = "/:@!$&'()*+,;=-._~%"
+_QUERY_SAFE = "/?:@!$'()*+,;=-._~%"
+
+CANONICAL_CACHE_SIZE = 100_000
+
+
+def _normalize_escape(match: re.Match) -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else f"%{match.group(1).upper()}"
+
+
+def _normalize_percent(value: str, safe: str) -> str:
+    """Decode escaped unreserved chars, uppercase other escapes, encode the rest."""
+    return quote(_PERCENT_ESCAPE.sub(_normalize_escape, value), safe=safe)
+
+
+def _canonical_host(hostname: str) -> str:
+    if hostname.isascii():
+        return hostname
+    try:
+        return hostname.encode("idna").decode("ascii")
+    except UnicodeError:
+        return hostname
+
+
+class UrlCanonicalizer:
+    """
+    Canonical form of a URL, used as its deduplication key.
+
+    Rules are compiled once (see `get_canonicalizer`) and every result is
+    memoised, so repeated links on a page cost a dict lookup.
+    """
+
+    def __init__(self, rules: UrlRules | None = None):
+        rules = rules or {}
+        self.keep_query = rules.get("keep_query", True)
+        self.sort_query = rules.get("sort_query", True)
+        self.keep_fragment = rules.get("keep_fragment", False)
+        self.strip_trailing_slash = rules.get("strip_trailing_slash", True)
+
+        drop_params = list(rules.get("drop_params", []))
+        if rules.get("strip_tracking_params", True):
+            drop_params.extend(TRACKING_PARAMS)
+        self._drop_param = (
+            re.compile("|".join(translate(p) for p in drop_params), re.IGNORECASE)
+            if drop_params
+            else None
+        )
+
+        self.canonicalize = lru_cache(maxsize=CANONICAL_CACHE_SIZE)(self._canonicalize)
+
+    def __call__(self, url: str) -> str:
+        return self.canonicalize(url)
+
+    def _canonicalize(self, url: str) -> str:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+
+        return urlunsplit(
+            (
+                scheme,
+                self._netloc(parts, scheme),
+                self._path(parts.path),
+                self._query(parts.query) if self.keep_query else "",
+                parts.fragment if self.keep_fragment else "",
+            )
+        )
+
+    def _netloc(self, parts, scheme: str) -> str:
+        if not parts.hostname:
+            return parts.netloc.lower()
+
+        host = _canonical_host(parts.hostname)
+        if ":" in host:
+            host = f"[{host}]"
+
+        try:
+            port = parts.port
+        except ValueError:
+            return parts.netloc.lower()
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            host = f"{host}:{port}"
+
+        userinfo = parts.netloc.rpartition("@")[0]
+        return f"{userinfo}@{host}" if userinfo else host
+
+    def _path(self, path: str) -> str:
+        path = _normalize_percent(path, _PATH_SAFE)
+        if self.strip_trailing_slash:
+            path = path.rstrip("/")
+        return path or "/"
+
+    def _query(self, query: str) -> str:
+        params = []
+        for param in query.split("&"):
+            if not param:
+                continue
+            name = param.split("=", 1)[0]
+            if self._drop_param and self._drop_param.match(unquote_plus(name)):
+                continue
+            params.append(_normalize_percent(param, _QUERY_SAFE))
+
+        if self.sort_query:
+            params.sort(key=lambda p: p.split("=", 1)[0])
+        return "&".join(params)
+
+
+_canonicalizers: dict[str, UrlCanonicalizer] = {}
+
+
+def get_canonicalizer(rules: UrlRules | None = None) -> UrlCanonicalizer:
+    """Return the (process-wide, compiled once) canonicalizer for these rules."""
+    cache_key = json.dumps(rules or {}, sort_keys=True)
+    if cache_key not in _canonicalizers:
+        _canonicalizers[cache_key] = UrlCanonicalizer(rules)
+    return _canonicalizers[cache_key]
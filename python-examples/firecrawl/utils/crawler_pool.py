@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import signal
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from intuned_runtime import attempt_store
+
+from crawl4ai import AsyncWebCrawler
+from crawl4ai.async_configs import BrowserConfig
+
+# Crawlers unused for this long are closed
+IDLE_SECONDS = 300
+IDLE_CHECK_SECONDS = 30
+
+# Crawlers (one browser each) kept open; past this, the least recently used
+# idle one is closed
+MAX_CRAWLERS = 4
+
+
+class PooledCrawler:
+    """A started crawler, and the runs currently using it."""
+
+    def __init__(self, crawler: AsyncWebCrawler):
+        self.crawler = crawler
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+    def healthy(self) -> bool:
+        """Started, and its browser (if it has a separate one) still connected."""
+        if not self.crawler.ready:
+            return False
+        manager = getattr(self.crawler.crawler_strategy, "browser_manager", None)
+        browser = getattr(manager, "browser", None)
+        return browser is None or browser.is_connected()
+
+    async def close(self) -> None:
+        try:
+            await self.crawler.close()
+        except Exception as e:
+            print(f"[crawler_pool] Failed to close crawler: {e}")
+
+    def kill(self) -> None:
+        """
+        Kill the processes the crawler started, for a crawler whose event loop
+        is closed (`close` cannot run there): its Playwright driver, which the
+        browser it launched exits with, and crawl4ai's managed browser if any.
+        A browser it only connected to (CDP URL) is left running.
+        """
+        manager = getattr(self.crawler.crawler_strategy, "browser_manager", None)
+        managed_browser = getattr(manager, "managed_browser", None)
+        processes = [getattr(managed_browser, "browser_process", None)]
+        try:
+            processes.append(manager.playwright._impl_obj._connection._transport._proc)
+        except AttributeError:
+            pass
+        for process in processes:
+            if process is None or process.returncode is not None:
+                continue
+            try:
+                os.kill(process.pid, signal.SIGKILL)
+            except OSError as e:
+                print(f"[crawler_pool] Failed to kill process {process.pid}: {e}")
+
+
+class CrawlerPool:
+    """
+    Started crawlers of one event loop, keyed by browser config.
+
+    Runs with the same browser settings (mobile, headers, TLS, CDP URL) share
+    one crawler and its browser, so only the first run pays for launching
+    Chromium. The browser contexts crawl4ai caches per run config stay open
+    between runs. A crawler is checked before it is leased and replaced if its
+    browser is gone; idle crawlers are closed after IDLE_SECONDS.
+    """
+
+    def __init__(self):
+        self.crawlers: dict[str, PooledCrawler] = {}
+        self._lock = asyncio.Lock()
+        self._reaper: asyncio.Task | None = None
+
+    async def acquire(self, config: BrowserConfig) -> PooledCrawler:
+        key = json.dumps(config.to_dict(), sort_keys=True, default=str)
+        async with self._lock:
+            entry = self.crawlers.get(key)
+            if entry and not entry.healthy():
+                print("[crawler_pool] Browser disconnected, starting a new one")
+                del self.crawlers[key]
+                if not entry.leases:
+                    await entry.close()
+                entry = None
+            if entry is None:
+                await self._make_room()
+                entry = PooledCrawler(await AsyncWebCrawler(config=config).start())
+                self.crawlers[key] = entry
+            entry.leases += 1
+            entry.last_used = time.monotonic()
+
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._close_idle_loop())
+        return entry
+
+    async def release(self, entry: PooledCrawler) -> None:
+        entry.leases -= 1
+        entry.last_used = time.monotonic()
+        # Replaced while in use (its browser went away): close it once unused
+        if not entry.leases and entry not in self.crawlers.values():
+            await entry.close()
+
+    async def _make_room(self) -> None:
+        idle = [
+            (entry.last_used, key)
+            for key, entry in self.crawlers.items()
+            if not entry.leases
+        ]
+        for _, key in sorted(idle)[: max(0, len(self.crawlers) + 1 - MAX_CRAWLERS)]:
+            await self.crawlers.pop(key).close()
+
+    async def close_idle(self, idle_seconds: float = IDLE_SECONDS) -> None:
+        """Close unused crawlers idle for `idle_seconds` or no longer healthy."""
+        async with self._lock:
+            now = time.monotonic()
+            for key, entry in list(self.crawlers.items()):
+                if not entry.leases and (
+                    now - entry.last_used >= idle_seconds or not entry.healthy()
+                ):
+                    await self.crawlers.pop(key).close()
+
+    async def _close_idle_loop(self) -> None:
+        while self.crawlers:
+            await asyncio.sleep(IDLE_CHECK_SECONDS)
+            await self.close_idle()
+
+    def kill(self) -> None:
+        """Kill every crawler's processes, once the pool's event loop is closed."""
+        while self.crawlers:
+            self.crawlers.popitem()[1].kill()
+
+    async def close(self) -> None:
+        """Close every crawler, e.g. before the event loop ends."""
+        if self._reaper:
+            self._reaper.cancel()
+        async with self._lock:
+            while self.crawlers:
+                await self.crawlers.popitem()[1].close()
+
+
+# One pool per event loop: crawlers cannot be used from another loop
+_pools: dict[asyncio.AbstractEventLoop, CrawlerPool] = {}
+
+
+def get_crawler_pool() -> CrawlerPool:
+    loop = asyncio.get_running_loop()
+    # A runtime using a new event loop per run leaves the previous loop's
+    # browsers running: kill them, as they cannot be closed from this loop
+    for stale in [other for other in _pools if other.is_closed()]:
+        _pools.pop(stale).kill()
+    return _pools.setdefault(loop, CrawlerPool())
+
+
+@asynccontextmanager
+async def pooled_crawler(config: BrowserConfig) -> AsyncIterator[AsyncWebCrawler]:
+    """
+    A started crawler for `config`, shared with other runs in this process.
+    Use instead of `async with AsyncWebCrawler(config=config)`; the crawler
+    stays open when the block exits.
+    """
+    pool = get_crawler_pool()
+    entry = await pool.acquire(config)
+    try:
+        yield entry.crawler
+    finally:
+        await pool.release(entry)
+
+
+def get_runtime_cdp_url() -> str | None:
+    """CDP URL of the browser Intuned started for this run (see hooks/setup_context.py)."""
+    cdp_url = attempt_store.get("cdp_url")
+    if not cdp_url:
+        print("[crawler_pool] No runtime CDP URL, launching a separate browser")
+    return cdp_url
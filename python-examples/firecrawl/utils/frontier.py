@@ -0,0 +1,49 @@
+from collections import deque
+from urllib.parse import urldefrag
+
+from .url import dedup_key
+
+
+class CrawlFrontier:
+    """
+    Breadth-first queue of the URLs left to crawl, shared by every seed.
+
+    URLs are deduplicated by canonical form (`dedup_key`) as they are
+    added, before anything is fetched, so a page listed in the sitemap and
+    linked from other pages is crawled once. Seeds (the start URL and the
+    sitemap URLs) have depth 0, like Firecrawl's discovery depth.
+    """
+
+    def __init__(self, max_depth: int, ignore_query: bool = False):
+        self.max_depth = max_depth
+        self.ignore_query = ignore_query
+        self._queue: deque[tuple[str, int]] = deque()
+        self._seen: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def mark_seen(self, url: str) -> bool:
+        """Record `url` as seen. Returns False if it already was."""
+        key = dedup_key(url, self.ignore_query)
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """
+        Queue `url` (without #fragment) unless it is too deep or already seen.
+        Returns whether it was queued.
+        """
+        if depth > self.max_depth:
+            return False
+        url = urldefrag(url).url
+        if not url.startswith(("http://", "https://")) or not self.mark_seen(url):
+            return False
+        self._queue.append((url, depth))
+        return True
+
+    def pop(self) -> tuple[str, int]:
+        """The next URL to crawl (shallowest first) and its depth."""
+        return self._queue.popleft()
@@ -1,4 +1,6 @@
+import asyncio
 import base64
+import time
 from typing import Any
 
 from intuned_browser import upload_file_to_s3
@@ -7,6 +9,9 @@ from crawl4ai import CrawlResult
 
 from .content import remove_base64_images as _remove_base64_images
 
+# Screenshots uploaded (and their URLs signed) at a time by a ResponseBuilder
+UPLOAD_WORKERS = 8
+
 
 def extract_metadata(result: CrawlResult, source_url: str) -> dict[str, Any]:
     """Extract Firecrawl-compatible metadata from CrawlResult."""
@@ -27,12 +32,12 @@ def extract_metadata(result: CrawlResult, source_url: str) -> dict[str, Any]:
     }
 
 
-async def build_response_item(
+def _build_fields(
     result: CrawlResult,
     formats: list[str],
-    remove_base64_images: bool = True,
+    remove_base64_images: bool,
 ) -> dict[str, Any]:
-    """Build a Firecrawl-compatible response item from CrawlResult."""
+    """Response item fields read from the result (everything but the screenshot)."""
     item: dict[str, Any] = {"metadata": extract_metadata(result, result.url)}
 
     if "markdown" in formats:
@@ -55,14 +60,121 @@ async def build_response_item(
     if "images" in formats:
         item["images"] = [img.get("src") for img in result.media.get("images", [])]
 
+    return item
+
+
+async def _upload_screenshot(screenshot: str) -> str:
+    """Upload a base64 PNG screenshot to S3 and return its signed URL."""
+    screenshot_bytes = await asyncio.to_thread(base64.b64decode, screenshot)
+    uploaded = await upload_file_to_s3(
+        file=screenshot_bytes,
+        file_name_override="screenshot.png",
+        content_type="image/png",
+    )
+    return await uploaded.get_signed_url()
+
+
+def _crawl_seconds(result: CrawlResult) -> float | None:
+    """Time spent crawling the page, when the crawler dispatcher recorded it."""
+    dispatch = getattr(result, "dispatch_result", None)
+    if not dispatch or not dispatch.end_time:
+        return None
+    return round(dispatch.end_time - dispatch.start_time, 3)
+
+
+async def build_response_item(
+    result: CrawlResult,
+    formats: list[str],
+    remove_base64_images: bool = True,
+    crawl_seconds: float | None = None,
+) -> dict[str, Any]:
+    """Build a Firecrawl-compatible response item from CrawlResult."""
+    started = time.perf_counter()
+    item = _build_fields(result, formats, remove_base64_images)
+    built = time.perf_counter()
+
     if "screenshot" in formats and result.screenshot:
-        screenshot_bytes = base64.b64decode(result.screenshot)
-        uploaded = await upload_file_to_s3(
-            file=screenshot_bytes,
-            file_name_override="screenshot.png",
-            content_type="image/png",
-        )
-        signed_url = await uploaded.get_signed_url()
-        item["screenshot"] = signed_url
+        item["screenshot"] = await _upload_screenshot(result.screenshot)
 
+    finished = time.perf_counter()
+    item["timing"] = {
+        "crawl_seconds": crawl_seconds or _crawl_seconds(result),
+        "build_seconds": round(built - started, 3),
+        "upload_seconds": round(finished - built, 3),
+    }
     return item
+
+
+class ResponseBuilder:
+    """
+    Builds response items next to a crawl loop instead of inside it.
+
+    `submit` reads the result's fields right away and leaves the slow part
+    (screenshot decoding, S3 upload and URL signing) to at most `max_workers`
+    concurrent uploads, so crawling continues while screenshots upload. Items
+    are collected once their upload finishes. `submit` waits while
+    `max_pending` items are unfinished, so screenshots waiting for upload do
+    not pile up in memory.
+
+    A failed upload does not fail the item: it is kept without `screenshot`
+    and with a `warning`.
+    """
+
+    def __init__(
+        self,
+        formats: list[str],
+        remove_base64_images: bool = True,
+        max_workers: int = UPLOAD_WORKERS,
+        max_pending: int | None = None,
+    ):
+        self.formats = formats
+        self.remove_base64_images = remove_base64_images
+        self.items: list[dict[str, Any]] = []  # Finished, in completion order
+        self.submitted = 0
+        self._workers = asyncio.Semaphore(max_workers)
+        self._pending = asyncio.Semaphore(max_pending or 4 * max_workers)
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, result: CrawlResult, crawl_seconds: float | None = None):
+        """Start building the item of a successful `result`."""
+        self.submitted += 1
+        submitted = time.perf_counter()
+        item = _build_fields(result, self.formats, self.remove_base64_images)
+        item["timing"] = {
+            "crawl_seconds": crawl_seconds or _crawl_seconds(result),
+            "build_seconds": round(time.perf_counter() - submitted, 3),
+            "queued_seconds": 0.0,
+            "upload_seconds": 0.0,
+        }
+        if "screenshot" not in self.formats or not result.screenshot:
+            self.items.append(item)
+            return
+
+        await self._pending.acquire()
+        task = asyncio.create_task(self._upload(item, result.screenshot))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _upload(self, item: dict[str, Any], screenshot: str) -> None:
+        queued = time.perf_counter()
+        try:
+            async with self._workers:
+                started = time.perf_counter()
+                try:
+                    item["screenshot"] = await _upload_screenshot(screenshot)
+                except Exception as e:
+                    print(f"[response] Screenshot upload failed: {e}")
+                    item["warning"] = f"Screenshot upload failed: {e}"
+                item["timing"]["queued_seconds"] = round(started - queued, 3)
+                item["timing"]["upload_seconds"] = round(
+                    time.perf_counter() - started, 3
+                )
+            self.items.append(item)
+        finally:
+            self._pending.release()
+
+    async def results(self) -> list[dict[str, Any]]:
+        """Wait for pending uploads and return every item."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+        return self.items
@@ -1,36 +1,263 @@
-import xml.etree.ElementTree as ET
+import asyncio
+import zlib
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager
+from typing import Literal, TypedDict
 from urllib.parse import urlparse
+from xml.etree import ElementTree
 
-from intuned_browser import go_to_url
-from playwright.async_api import Page
+import httpx
 
+SITEMAP_TIMEOUT_SECONDS = 30
+
+# Sitemap files fetched at a time, and at most per crawl (indexes included)
+SITEMAP_CONCURRENCY = 8
+MAX_SITEMAPS = 500
+
+# Read, decompressed and parsed in chunks of this size
+CHUNK_SIZE = 64 * 1024
+
+# Sitemaps larger than this are truncated (50 MB uncompressed, per sitemaps.org)
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+# Parsed chunks of entries waiting for the consumer. Fetching pauses when the
+# buffer is full, so memory stays bounded however many URLs the sitemaps list.
+ENTRY_BUFFER_CHUNKS = 16
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+
+
+class SitemapEntry(TypedDict):
+    url: str
+    lastmod: str | None  # As written in the sitemap (W3C datetime)
 
-async def fetch_sitemap_urls(page: Page, base_url: str) -> list[str]:
-    """Fetch and parse sitemap.xml to extract URLs"""
-    parsed = urlparse(base_url)
-    sitemap_url = f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"
 
+# ("url", page) or ("sitemap", child sitemap of an index)
+SitemapItem = tuple[Literal["url", "sitemap"], SitemapEntry]
+
+
+def sitemap_client(headers: dict[str, str] | None = None) -> httpx.AsyncClient:
+    """HTTP client whose connection pool is shared by every sitemap fetch of a run."""
+    return httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT, **(headers or {})},
+        timeout=SITEMAP_TIMEOUT_SECONDS,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=SITEMAP_CONCURRENCY,
+            max_keepalive_connections=SITEMAP_CONCURRENCY,
+        ),
+    )
+
+
+@asynccontextmanager
+async def _client_scope(client: httpx.AsyncClient | None):
+    if client is not None:
+        yield client
+        return
+    async with sitemap_client() as owned:
+        yield owned
+
+
+async def discover_sitemaps(client: httpx.AsyncClient, base_url: str) -> list[str]:
+    """Sitemaps listed in the site's robots.txt, or `/sitemap.xml` if none are."""
+    parsed = urlparse(base_url)
+    origin = f"{parsed.scheme}://{parsed.netloc}"
+    sitemaps = []
     try:
-        await go_to_url(page, sitemap_url)
-        content = await page.content()
+        response = await client.get(f"{origin}/robots.txt")
+        if response.is_success:
+            for line in response.text.splitlines():
+                field, _, value = line.partition(":")
+                if field.strip().lower() == "sitemap" and value.strip():
+                    sitemaps.append(value.strip())
+    except httpx.HTTPError as e:
+        print(f"[sitemap] Failed to fetch robots.txt of {origin}: {e}")
+    return list(dict.fromkeys(sitemaps)) or [f"{origin}/sitemap.xml"]
+
 
-        if not content:
+class SitemapParser:
+    """
+    Incremental parser for `<urlset>` and `<sitemapindex>` documents, fed the
+    raw (optionally gzipped) body a chunk at a time.
+
+    Gzip is detected from the first bytes, not the file name or headers.
+    Elements are dropped as soon as they are read, so memory does not grow
+    with the number of entries. Only `<loc>` and `<lastmod>` directly inside
+    `<url>` / `<sitemap>` are read, not those of extensions nested deeper
+    (`<image:loc>`, `<video:loc>`, ...).
+    """
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self._root: ElementTree.Element | None = None
+        self._depth = 0  # Of the element being read, the root is 1
+        self._decompressor = None
+        self._head = b""
+        self._loc: str | None = None  # Of the entry being read
+        self._lastmod: str | None = None
+        self.size = 0  # Uncompressed bytes parsed
+
+    @property
+    def truncated(self) -> bool:
+        return self.size >= SITEMAP_MAX_BYTES
+
+    def feed(self, chunk: bytes) -> Iterator[list[SitemapItem]]:
+        """
+        Yields:
+            The entries read from each (at most CHUNK_SIZE) piece of XML:
+            ("url", entry) for pages, ("sitemap", entry) for index entries
+        """
+        if self._decompressor is None and self._head is not None:
+            # Wait for enough bytes to recognise gzip
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            chunk, self._head = self._head, None
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        for data in self._decompress(chunk):
+            data = data[: SITEMAP_MAX_BYTES - self.size]
+            self.size += len(data)
+            self._parser.feed(data)
+            yield list(self._read_entries())
+            if self.truncated:
+                return
+
+    def close(self) -> list[SitemapItem]:
+        """Parse what is left of a body shorter than the gzip magic."""
+        if not self._head:
             return []
+        self._parser.feed(self._head)
+        self._head = None
+        return list(self._read_entries())
+
+    def _decompress(self, chunk: bytes) -> Iterator[bytes]:
+        if self._decompressor is None:
+            yield chunk
+            return
+        # Inflate at most CHUNK_SIZE bytes at a time, so a small compressed
+        # chunk cannot expand into one huge buffer
+        data = chunk
+        while data and not self._decompressor.eof and not self.truncated:
+            yield self._decompressor.decompress(data, CHUNK_SIZE)
+            data = self._decompressor.unconsumed_tail
+
+    def _read_entries(self) -> Iterator[SitemapItem]:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = element
+                self._depth += 1
+                continue
+
+            depth = self._depth
+            self._depth -= 1
+            tag = element.tag
+            kind = tag[tag.rfind("}") + 1 :]
+            if depth == 3 and kind == "loc":
+                self._loc = element.text
+            elif depth == 3 and kind == "lastmod":
+                self._lastmod = element.text
+            elif depth == 2 and kind in ("url", "sitemap"):
+                loc = (self._loc or "").strip()
+                if loc:
+                    lastmod = (self._lastmod or "").strip() or None
+                    yield kind, {"url": loc, "lastmod": lastmod}
+                self._loc = self._lastmod = None
+                self._root.clear()
+
+
+async def _stream_sitemap(
+    client: httpx.AsyncClient, sitemap_url: str
+) -> AsyncIterator[list[SitemapItem]]:
+    """Entries of one sitemap file, parsed while it downloads, a chunk at a time."""
+    parser = SitemapParser()
+    try:
+        async with client.stream("GET", sitemap_url) as response:
+            if not response.is_success:
+                print(f"[sitemap] {sitemap_url} returned HTTP {response.status_code}")
+                return
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                for items in parser.feed(chunk):
+                    yield items
+                if parser.truncated:
+                    print(
+                        f"[sitemap] {sitemap_url} truncated at {SITEMAP_MAX_BYTES} bytes"
+                    )
+                    return
+        yield parser.close()
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        print(f"[sitemap] Failed to fetch {sitemap_url}: {e}")
+    except (ElementTree.ParseError, zlib.error) as e:
+        print(f"[sitemap] Invalid sitemap {sitemap_url}: {e}")
+
+
+async def iter_sitemap_entries(
+    base_url: str,
+    sitemap_urls: list[str] | None = None,
+    client: httpx.AsyncClient | None = None,
+    max_sitemaps: int = MAX_SITEMAPS,
+    concurrency: int = SITEMAP_CONCURRENCY,
+) -> AsyncIterator[SitemapEntry]:
+    """
+    Yield every page listed in the site's sitemaps, as they are parsed.
+
+    Sitemaps are `sitemap_urls`, or those found in robots.txt (`/sitemap.xml`
+    if there are none). Sitemap indexes are followed recursively, with up to
+    `concurrency` files downloading at a time over one connection pool, and
+    each sitemap fetched once (at most `max_sitemaps` in total). Entries are
+    yielded in the order they are parsed, not in sitemap order.
+
+    Stop iterating (or `aclose()` the iterator) to cancel pending downloads.
+    """
+    async with _client_scope(client) as http:
+        roots = sitemap_urls or await discover_sitemaps(http, base_url)
+        sitemaps: asyncio.Queue[str] = asyncio.Queue()
+        chunks: asyncio.Queue[list[SitemapEntry] | None] = asyncio.Queue(
+            maxsize=ENTRY_BUFFER_CHUNKS
+        )
+        queued: set[str] = set()
 
-        root = ET.fromstring(content)
-        ns = {"sm": "http://www.sitemaps.org/schemas/sitemap/0.9"}
+        def queue_sitemap(sitemap_url: str) -> None:
+            if sitemap_url not in queued and len(queued) < max_sitemaps:
+                queued.add(sitemap_url)
+                sitemaps.put_nowait(sitemap_url)
 
-        urls = []
-        for loc in root.findall(".//sm:loc", ns):
-            if loc.text:
-                urls.append(loc.text.strip())
+        async def worker() -> None:
+            while True:
+                sitemap_url = await sitemaps.get()
+                try:
+                    async for items in _stream_sitemap(http, sitemap_url):
+                        pages = []
+                        for kind, entry in items:
+                            if kind == "sitemap":
+                                queue_sitemap(entry["url"])
+                            else:
+                                pages.append(entry)
+                        if pages:
+                            await chunks.put(pages)
+                finally:
+                    sitemaps.task_done()
 
-        # Fallback without namespace
-        if not urls:
-            for loc in root.iter():
-                if loc.tag.endswith("loc") and loc.text:
-                    urls.append(loc.text.strip())
+        async def finish() -> None:
+            await sitemaps.join()
+            await chunks.put(None)
 
-        return urls
-    except Exception:
-        return []
+        for sitemap_url in roots:
+            queue_sitemap(sitemap_url)
+        tasks = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        tasks.append(asyncio.create_task(finish()))
+        try:
+            while (pages := await chunks.get()) is not None:
+                for entry in pages:
+                    yield entry
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
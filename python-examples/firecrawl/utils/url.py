@@ -1,5 +1,7 @@
 from urllib.parse import urlparse, urlunparse
 
+from .canonical import get_canonicalizer
+
 
 def normalize_url(url: str, ignore_query: bool = False) -> str:
     parsed = urlparse(url)
@@ -8,6 +10,11 @@ def normalize_url(url: str, ignore_query: bool = False) -> str:
     return url
 
 
+def dedup_key(url: str, ignore_query: bool = False) -> str:
+    """Canonical dedup key for a URL (tracking params stripped, query sorted)."""
+    return get_canonicalizer({"keep_query": not ignore_query})(url)
+
+
 def is_subdomain_of(url: str, base_url: str) -> bool:
     url_domain = urlparse(url).netloc.lower()
     base_domain = urlparse(base_url).netloc.lower()
@@ -1,19 +1,41 @@
 import re
 from typing import TypedDict
 
-from intuned_browser import go_to_url, save_file_to_s3
+from intuned_browser import go_to_url
 from intuned_browser.ai import extract_structured_data
-from intuned_runtime import extend_payload, persistent_store
+from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
 from pydantic import BaseModel
 from utils.crawler import (
-    extract_links,
+    AttachmentPipeline,
+    FieldMap,
+    Frontier,
+    PriorityBudget,
+    ScoringParams,
+    SectionBudget,
+    SectionBudgetParams,
+    TemplateCache,
+    UrlRules,
+    UrlScorer,
+    crawl_key,
+    extract_fields,
+    extract_link_texts,
     get_base_domain,
+    get_canonicalizer,
     is_file_url,
-    normalize_url,
-    sanitize_key,
+    layout_fingerprint,
 )
-from utils.crawler.helpers import get_job_run_id
+from utils.crawler.claims import claim_page, new_claim_token, page_slots
+from utils.crawler.helpers import get_job_run_id, legacy_crawl_key
+from utils.crawler.telemetry import collect, count, persistent_store, span
+from utils.resource_blocking import BlockResourcesParams, block_resources
+
+# Result `reason` of a page re-queued by `section_budget`
+DEFERRED = "deferred by section budget"
+
+# Result `reason` of a normal-priority page re-queued until the reserve of
+# `reserved_budget` is released
+DEFERRED_BY_PRIORITY = "deferred by reserved budget"
 
 # JSON schema for AI extraction of job postings
 JOB_POSTING_SCHEMA = {
@@ -58,6 +80,19 @@ LEVER_JOB_PATTERN = re.compile(
 )
 
 
+# Default link scoring: job postings first; application forms, legal and
+# auth pages last
+DEFAULT_SCORING: ScoringParams = {
+    "rules": [
+        {"pattern": LEVER_JOB_PATTERN.pattern, "score": 10},
+        {"pattern": r"/jobs?/[0-9a-zA-Z-]*\d", "score": 10},  # Greenhouse & co.
+        {"anchor_keywords": ["job", "career", "opening", "position"], "score": 2},
+        {"pattern": r"/apply/?$", "score": -10},
+        {"pattern": r"/(privacy|terms|legal|cookies?|login|signin)\b", "score": -5},
+    ],
+}
+
+
 def is_lever_job_posting(url: str) -> bool:
     """Check if URL is a Lever job posting (not a listing page)."""
     return bool(LEVER_JOB_PATTERN.match(url))
@@ -69,108 +104,55 @@ def get_lever_company(url: str) -> str | None:
     return match.group(1) if match else None
 
 
+# Lever posting page fields (see utils/crawler/fields.py)
+LEVER_JOB_FIELDS: FieldMap = {
+    "title": ".posting-headline h2",
+    "location": ".posting-categories .location",
+    "department": ".posting-categories .department",
+    "team": ".posting-categories .team",
+    "commitment": ".posting-categories .commitment",  # Full-time, Part-time, etc.
+    "workplace_type": ".posting-categories .workplaceTypes",  # Remote, On-site, ...
+    "intro": '[data-qa="job-description"]',
+    # Posting sections (responsibilities, requirements, etc.)
+    "sections": {
+        "selector": ".section.page-centered",
+        "all": True,
+        "fields": {"title": "h3", "items": {"selector": "li", "all": True}},
+    },
+    "apply_href": {"selector": 'a.postings-btn[href*="apply"]', "attribute": "href"},
+}
+
+
+def strip_or_none(text: str | None) -> str | None:
+    return text.strip() if text else None
+
+
 async def extract_lever_job(page: Page, url: str) -> JobPosting:
-    """Extract job details from Lever job posting page using Playwright."""
-    company = get_lever_company(url)
-
-    # Extract job title from the posting headline
-    title = "Unknown Title"
-    try:
-        title_el = page.locator(".posting-headline h2").first
-        title = await title_el.text_content() or title
-    except Exception:
-        pass
-
-    # Extract location from posting categories
-    location = None
-    try:
-        location_el = page.locator(".posting-categories .location").first
-        location = await location_el.text_content()
-    except Exception:
-        pass
-
-    # Extract department
-    department = None
-    try:
-        dept_el = page.locator(".posting-categories .department").first
-        department = await dept_el.text_content()
-    except Exception:
-        pass
-
-    # Extract team
-    team = None
-    try:
-        team_el = page.locator(".posting-categories .team").first
-        team = await team_el.text_content()
-    except Exception:
-        pass
-
-    # Extract commitment (Full-time, Part-time, etc.)
-    commitment = None
-    try:
-        commitment_el = page.locator(".posting-categories .commitment").first
-        commitment = await commitment_el.text_content()
-    except Exception:
-        pass
-
-    # Extract workplace type (Remote, On-site, Hybrid)
-    workplace_type = None
-    try:
-        workplace_el = page.locator(".posting-categories .workplaceTypes").first
-        workplace_type = await workplace_el.text_content()
-    except Exception:
-        pass
-
-    # Extract job description sections
+    """Extract job details from Lever job posting page in a single page.evaluate."""
+    fields = await extract_fields(page, LEVER_JOB_FIELDS)
+
+    # Build the job description from the intro and the posting sections
     description_parts = []
+    if fields["intro"]:
+        description_parts.append(fields["intro"].strip())
 
-    # Get the main description/intro
-    try:
-        intro_el = page.locator('[data-qa="job-description"]').first
-        intro_text = await intro_el.text_content()
-        if intro_text:
-            description_parts.append(intro_text.strip())
-    except Exception:
-        pass
-
-    # Get all posting sections (responsibilities, requirements, etc.)
-    try:
-        sections = await page.locator(".section.page-centered").all()
-        for section in sections:
-            # Get section title
-            section_title = await section.locator("h3").text_content()
-            if section_title:
-                description_parts.append(f"\n**{section_title.strip()}**")
-
-            # Get list items in this section
-            items = await section.locator("li").all()
-            for item in items:
-                item_text = await item.text_content()
-                if item_text and len(item_text.strip()) > 5:
-                    description_parts.append(f"• {item_text.strip()}")
-    except Exception:
-        pass
-
-    # Get apply URL
-    apply_url = url
-    try:
-        apply_el = page.locator('a.postings-btn[href*="apply"]').first
-        apply_href = await apply_el.get_attribute("href")
-        if apply_href:
-            apply_url = apply_href
-    except Exception:
-        pass
+    for section in fields["sections"]:
+        if section["title"]:
+            description_parts.append(f"\n**{section['title'].strip()}**")
+        for item_text in section["items"]:
+            if item_text and len(item_text.strip()) > 5:
+                description_parts.append(f"• {item_text.strip()}")
 
     return JobPosting(
-        title=title.strip() if title else "Unknown Title",
-        location=location.strip() if location else None,
-        department=department.strip() if department else None,
-        team=team.strip() if team else None,
-        commitment=commitment.strip() if commitment else None,
-        workplace_type=workplace_type.strip() if workplace_type else None,
+        title=strip_or_none(fields["title"]) or "Unknown Title",
+        location=strip_or_none(fields["location"]),
+        department=strip_or_none(fields["department"]),
+        team=strip_or_none(fields["team"]),
+        commitment=strip_or_none(fields["commitment"]),
+        workplace_type=strip_or_none(fields["workplace_type"]),
         description="\n".join(description_parts) if description_parts else None,
-        apply_url=apply_url,
-        company=company,
+        apply_url=fields["apply_href"] or url,
+        company=get_lever_company(url),
     )
 
 
@@ -180,7 +162,16 @@ class Params(TypedDict, total=False):
     max_pages: int
     include_external: bool
     include_attachments: bool
+    url_rules: UrlRules  # URL canonicalization rules (see utils/crawler/canonical.py)
+    scoring: ScoringParams  # Link scoring rules (see utils/crawler/scoring.py)
+    block_resources: BlockResourcesParams | bool  # Skip images, fonts, trackers
+    telemetry: bool  # Per-stage timings and counters in the result
+    section_budget: SectionBudgetParams | bool  # Share max_pages across sub-trees
     depth: int  # Current depth (internal, set by extend_payload)
+    priority: str  # "high" or "normal" (internal, set by extend_payload)
+    claim_token: str  # Token holding the URL's claim (internal, deferred pages)
+    deferrals: int  # Times the URL was deferred by section_budget (internal)
+    priority_deferrals: int  # Times the URL waited for the reserve (internal)
 
 
 async def automation(
@@ -195,15 +186,28 @@ async def automation(
     This API:
     1. Navigates to the given URL
     2. Extracts job posting data:
-       - Lever job postings: uses Playwright selectors (static, fast)
+       - Lever job postings: uses a declarative field spec, read in one
+         page.evaluate (static, fast)
        - Other job pages: uses AI extraction with JobPosting schema
     3. Extracts all internal links
     4. For each new link, extends payload to crawl it (if under depth limit)
-    5. Uses persistent_store to deduplicate URLs across all job payloads
+    5. Uses persistent_store to deduplicate URLs across all job payloads,
+       checking all discovered links in one concurrent batch (see
+       utils/crawler/frontier.py)
+    6. Scores links and queues the best first; with `reserved_budget`, part of
+       `max_pages` is kept for high-priority links (job postings) while any
+       are pending, see utils/crawler/scoring.py
+    7. With `telemetry`, the result has per-stage timings and counters
+       (see utils/crawler/telemetry.py)
+    8. With `section_budget`, `max_pages` is shared across the site's
+       sections (top-level path prefixes) instead of going to whichever
+       sub-tree is reached first (see utils/crawler/budget.py)
 
     Extraction strategy:
     - Lever (jobs.lever.co/{company}/{uuid}): Static Playwright extraction
-    - Greenhouse, other job boards: AI-powered extraction using JobPosting schema
+    - Greenhouse, other job boards: AI-powered extraction using JobPosting schema,
+      until a layout has been learned from LEARN_PAGES AI-extracted pages; later
+      pages with the same layout are read with the learned selectors
 
     Example params:
     {
@@ -224,15 +228,77 @@ async def automation(
     - Payloads 2-51: crawl(link) → each finds more links → extend_payload x N
     - All payloads share the same persistent_store, preventing duplicate work
     """
+    with collect(params.get("telemetry", False)) as telemetry:
+        result = None
+        try:
+            result = await crawl_url(page, params)
+        finally:
+            # A failed page is done too; a deferred one is not (yet)
+            if result is None or result.get("reason") not in (
+                DEFERRED,
+                DEFERRED_BY_PRIORITY,
+            ):
+                await mark_done(params)
+    if telemetry:
+        result["telemetry"] = telemetry.summary()
+    return result
+
+
+def get_section_budget(params: Params) -> SectionBudget | None:
+    """The job's SectionBudget, if `section_budget` is set."""
+    if not params.get("section_budget"):
+        return None
+    return SectionBudget(
+        str(get_job_run_id()), params.get("max_pages", 50), params["section_budget"]
+    )
+
+
+def get_priority_budget(params: Params) -> PriorityBudget:
+    """The job's high / normal priority buckets (see `reserved_budget`)."""
+    return PriorityBudget(
+        str(get_job_run_id()),
+        params.get("max_pages", 50),
+        params.get("scoring", DEFAULT_SCORING),
+    )
+
+
+async def mark_done(params: Params) -> None:
+    """
+    Count a queued URL as done in its section and, if high priority, in the
+    priority buckets (the seed page is not queued).
+    """
+    if params.get("depth", 0) == 0:
+        return
+    canonicalize = get_canonicalizer(params.get("url_rules"))
+    url = canonicalize(params["url"])
+    budget = get_section_budget(params)
+    if budget:
+        await budget.mark_done(url)
+    if params.get("priority") == "high":
+        await get_priority_budget(params).mark_done(url)
+
+
+async def crawl_url(page: Page, params: Params) -> dict:
+    """Crawl one URL (see `automation`)."""
     url = params["url"]
     max_depth = params.get("max_depth", 2)
     max_pages = params.get("max_pages", 50)
     include_external = params.get("include_external", False)
     include_attachments = params.get("include_attachments", False)
     depth = params.get("depth", 0)
+    url_rules = params.get("url_rules")
+    scoring = params.get("scoring", DEFAULT_SCORING)
+    priority = params.get("priority", "high")
+    blocking = params.get("block_resources")
+    telemetry = params.get("telemetry", False)
+    section_budget = params.get("section_budget")
 
     key_prefix = str(get_job_run_id())
-    normalized_url = normalize_url(url)
+    canonicalize = get_canonicalizer(url_rules)
+    normalized_url = canonicalize(url)
+    frontier = Frontier(key_prefix)
+    sections = get_section_budget(params)
+    priorities = get_priority_budget(params)
 
     # Store config for child payloads (only on first call)
     base_domain = get_base_domain(url)
@@ -243,9 +309,32 @@ async def automation(
             await persistent_store.get(f"{key_prefix}__base_domain__") or base_domain
         )
 
-    # Deduplicate
-    visited_key = sanitize_key(f"{key_prefix}_visited_{normalized_url}")
-    if await persistent_store.get(visited_key):
+    # Claim the URL, a page of its section's share (with section_budget) and a
+    # unit of page budget, in a single claim round. Claims are best-effort
+    # under maxConcurrentRequests > 1: of N payloads racing, one wins unless
+    # a store write is delayed past the settle window (see
+    # utils/crawler/claims.py).
+    claim_token = params.get("claim_token") or new_claim_token()
+    visited_key = crawl_key(key_prefix, "visited", normalized_url)
+    budget = await priorities.budget(priority)
+    pages = page_slots(key_prefix, budget)
+    with span("claim"):
+        # A full section is retried with fresh stats (its cached share may be
+        # stale) before the page is deferred
+        for fresh in (False, True):
+            ranges = [pages]
+            if sections:
+                ranges.insert(0, await sections.slots(normalized_url, fresh))
+            claimed, full = await claim_page(
+                visited_key,
+                claim_token,
+                ranges,
+                legacy_key=legacy_crawl_key(key_prefix, "visited", normalized_url),
+            )
+            if not (sections and full == 0):
+                break
+    # A full page budget is reported below, even if the URL was not claimed
+    if not claimed and full is None:
         return {
             "success": True,
             "url": url,
@@ -253,9 +342,55 @@ async def automation(
             "reason": "already visited",
         }
 
-    # Page limit check
-    page_count = await persistent_store.get(f"{key_prefix}__page_count__") or 0
-    if page_count >= max_pages:
+    # A section over its share defers the page while other sections are still
+    # crawling: it is re-queued with its claim, to run again once finished
+    # sections may have freed budget
+    if sections and full == 0:
+        deferrals = params.get("deferrals", 0)
+        deferred = deferrals < sections.max_deferrals and await sections.may_grow(
+            normalized_url
+        )
+        if deferred:
+            extend_payload(
+                {
+                    "api": "crawler/crawl",
+                    "parameters": {
+                        **params,
+                        "claim_token": claim_token,
+                        "deferrals": deferrals + 1,
+                    },
+                }
+            )
+        return {
+            "success": True,
+            "url": url,
+            "skipped": True,
+            "reason": DEFERRED if deferred else "section budget reached",
+            "section": await sections.resolve(normalized_url),
+        }
+    # A normal-priority page held to the unreserved budget waits for the
+    # high-priority pages queued before it: it is re-queued with its claim, to
+    # run again once they are done and the reserve is released
+    if full is not None and budget < max_pages:
+        deferrals = params.get("priority_deferrals", 0)
+        if deferrals < priorities.max_deferrals and await priorities.may_grow():
+            extend_payload(
+                {
+                    "api": "crawler/crawl",
+                    "parameters": {
+                        **params,
+                        "claim_token": claim_token,
+                        "priority_deferrals": deferrals + 1,
+                    },
+                }
+            )
+            return {
+                "success": True,
+                "url": url,
+                "skipped": True,
+                "reason": DEFERRED_BY_PRIORITY,
+            }
+    if full is not None:
         return {
             "success": True,
             "url": url,
@@ -263,72 +398,117 @@ async def automation(
             "reason": "max_pages limit reached",
         }
 
-    # Mark as visited and increment counter
-    await persistent_store.set(visited_key, True)
-    await persistent_store.set(f"{key_prefix}__page_count__", page_count + 1)
+    await frontier.mark_seen([normalized_url])
 
-    # Navigate
+    # Navigate (without images, fonts and trackers if `block_resources` is set)
+    await block_resources(page, blocking)
     print(f"[crawl] Depth {depth}/{max_depth}: {url}")
-    await go_to_url(page, url)
+    with span("navigation"):
+        await go_to_url(page, url)
 
     # Extract page content
-    # Lever job postings: use Playwright selectors (static extraction)
+    # Lever job postings: use CSS selectors in one page.evaluate (static extraction)
     # Other job pages: use AI extraction with JobPosting schema
     job_posting: JobPosting | None = None
     if is_lever_job_posting(url):
         print(f"[crawl] Detected Lever job posting: {url}")
-        job_posting = await extract_lever_job(page, url)
+        with span("extraction"):
+            job_posting = await extract_lever_job(page, url)
+        count("extraction_static")
         content = {
             "title": job_posting.title,
             "type": "job_posting",
             "job_data": job_posting.model_dump(),
         }
     else:
-        print(f"[crawl] Using AI extraction for: {url}")
-        job_data = await extract_structured_data(
-            source=page, data_schema=JOB_POSTING_SCHEMA, model="gpt-5-mini"
-        )
+        # Pages sharing a learned layout skip AI (see utils/crawler/templates.py)
+        templates = TemplateCache(key_prefix)
+        with span("extraction"):
+            fingerprint = await layout_fingerprint(page)
+            job_data = await templates.extract(page, fingerprint)
+        extraction = "template"
+        if job_data is None:
+            print(f"[crawl] Using AI extraction for: {url}")
+            with span("ai_extraction"):
+                job_data = await extract_structured_data(
+                    source=page, data_schema=JOB_POSTING_SCHEMA, model="gpt-5-mini"
+                )
+            extraction = "ai"
+            with span("template_learning"):
+                await templates.learn(page, fingerprint, job_data)
+        else:
+            print(f"[crawl] Using learned layout {fingerprint[:8]} for: {url}")
+        count(f"extraction_{extraction}")
         content = {
             "title": job_data.get("title", "Unknown"),
             "type": "job_posting",
             "job_data": job_data,
+            "extraction": extraction,
         }
 
     # Find all internal links
-    links = await extract_links(page, base_domain, include_external=include_external)
+    with span("links"):
+        link_texts = await extract_link_texts(
+            page,
+            base_domain,
+            include_external=include_external,
+            normalize=canonicalize,
+        )
+    links = list(link_texts)
     print(f"[crawl] Found {len(links)} links on {url}")
+    count("links_found", len(links))
     attachments = []
+    attachment_stats = []
 
     # Queue new links for crawling (if under depth limit)
     links_queued = 0
     next_depth = depth + 1
 
     if next_depth <= max_depth:
-        for link in links:
-            if not is_file_url(link):
-                # Only queue if not already visited
-                link_key = sanitize_key(f"{key_prefix}_visited_{link}")
-                if not await persistent_store.get(link_key):
-                    extend_payload(
-                        {
-                            "api": "crawler/crawl",
-                            "parameters": {
-                                "url": link,
-                                "depth": next_depth,
-                                "include_external": include_external,
-                            },
-                        }
-                    )
-                    links_queued += 1
-            elif include_attachments:
-                try:
-                    uploaded = await save_file_to_s3(
-                        page=page,
-                        trigger=link,
-                    )
-                    attachments.append(uploaded)
-                except Exception as e:
-                    print(f"[crawl] Failed to download {link}: {e}")
+        # Queue links best score first, so postings are picked up first
+        scorer = UrlScorer(scoring)
+        page_links = {
+            link: text for link, text in link_texts.items() if not is_file_url(link)
+        }
+        with span("enqueue"):
+            ranked = dict(scorer.rank(page_links))
+            # Only queue links not queued or visited yet, checked in one batch
+            new_links = await frontier.claim_new(ranked)
+            payloads = [
+                {
+                    "api": "crawler/crawl",
+                    "parameters": {
+                        "url": link,
+                        "depth": next_depth,
+                        "max_depth": max_depth,
+                        "max_pages": max_pages,
+                        "include_external": include_external,
+                        "url_rules": url_rules,
+                        "scoring": scoring,
+                        "priority": ranked[link],
+                        "block_resources": blocking,
+                        "telemetry": telemetry,
+                        "section_budget": section_budget,
+                    },
+                }
+                for link in new_links
+            ]
+            if sections:
+                await sections.add_queued(
+                    [payload["parameters"]["url"] for payload in payloads]
+                )
+            await priorities.add_queued([ranked[link] for link in new_links])
+            if payloads:
+                extend_payload(*payloads)
+            links_queued = len(payloads)
+        count("links_queued", links_queued)
+
+        if include_attachments:
+            file_links = [link for link in links if is_file_url(link)]
+            pipeline = AttachmentPipeline(page, key_prefix)
+            with span("attachments"):
+                attachments, attachment_stats = await pipeline.save_all(file_links)
+            count("attachments", len(attachments))
 
     return {
         "success": True,
@@ -338,4 +518,5 @@ async def automation(
         "links_found": len(links),
         "links_queued": links_queued,
         "attachments": attachments,
+        "attachment_stats": attachment_stats,
     }
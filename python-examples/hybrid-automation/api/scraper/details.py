@@ -2,12 +2,17 @@ from intuned_browser import go_to_url
 from intuned_browser.ai import extract_structured_data
 from playwright.async_api import BrowserContext, Page
 from pydantic import BaseModel, Field
+from utils.resource_blocking import block_resources
 
 
 class EcommereceDetailsParams(BaseModel):
     name: str = Field(..., description="The name of the product")
     price: str = Field(..., description="The price of the product")
     details_url: str = Field(..., description="The URL of the product details")
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 class Size(BaseModel):
@@ -253,6 +258,7 @@ async def automation(
     details_url = params.details_url
     print(f"Fetching product details: {details_url}")
 
+    await block_resources(page, params.block_resources)
     await find_entity(page, details_url)
 
     # Dismiss any modals - replace with appropriate action for your store
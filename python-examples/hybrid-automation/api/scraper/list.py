@@ -4,6 +4,7 @@ from intuned_browser import click_until_exhausted, go_to_url
 from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
 from pydantic import BaseModel, Field
+from utils.resource_blocking import block_resources
 
 
 class Product(BaseModel):
@@ -15,6 +16,10 @@ class Product(BaseModel):
 class EcommereceListParams(BaseModel):
     category_name: str = Field(..., description="The name of the category")
     category_url: str = Field(..., description="The URL of the category")
+    block_resources: bool | dict | None = Field(
+        default=None,
+        description="Block images, fonts, media and trackers (True, or options)",
+    )
 
 
 async def handle_modal(page: Page) -> None:
@@ -125,6 +130,7 @@ async def automation(
     print(f"Category URL: {category_url}")
 
     # Navigate to the category page
+    await block_resources(page, params.block_resources)
     await find_entity(page, category_url)
 
     # Handle country/language modal if present
@@ -147,7 +153,10 @@ async def automation(
         extend_payload(
             {
                 "api": "scraper/details",
-                "parameters": dict(product),
+                "parameters": {
+                    **dict(product),
+                    "block_resources": params.block_resources,
+                },
             }
         )
 
@@ -1,11 +1,43 @@
-from .helpers import get_job_run_id, sanitize_key
-from .links import extract_links, get_base_domain, is_file_url, normalize_url
+from .attachments import AttachmentPipeline, AttachmentReport
+from .budget import SectionBudget, SectionBudgetParams, section_of
+from .canonical import UrlRules, get_canonicalizer
+from .fields import FieldMap, FieldSpec, extract_fields
+from .frontier import Frontier
+from .helpers import crawl_key, get_job_run_id, sanitize_key
+from .links import (
+    extract_link_texts,
+    extract_links,
+    get_base_domain,
+    is_file_url,
+    normalize_url,
+)
+from .scoring import PriorityBudget, ScoringParams, UrlScorer, page_budget
+from .templates import TemplateCache, layout_fingerprint
 
 __all__ = [
     "extract_links",
+    "extract_link_texts",
+    "extract_fields",
+    "FieldMap",
+    "FieldSpec",
+    "Frontier",
     "normalize_url",
+    "get_canonicalizer",
+    "UrlRules",
     "get_base_domain",
     "is_file_url",
+    "AttachmentPipeline",
+    "AttachmentReport",
+    "ScoringParams",
+    "PriorityBudget",
+    "UrlScorer",
+    "page_budget",
+    "SectionBudget",
+    "SectionBudgetParams",
+    "section_of",
+    "TemplateCache",
+    "layout_fingerprint",
+    "crawl_key",
     "sanitize_key",
     "get_job_run_id",
 ]
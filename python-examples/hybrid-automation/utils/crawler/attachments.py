@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from typing import TypedDict
+from urllib.parse import unquote, urlsplit
+
+from intuned_browser import Attachment, save_file_to_s3, upload_file_to_s3
+from playwright.async_api import Page
+
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+# Max downloads in flight per crawled page, and per host within it
+ATTACHMENT_CONCURRENCY = 8
+ATTACHMENT_HOST_CONCURRENCY = 2
+
+# Files larger than this are not uploaded from page.request (they are held in
+# memory until uploaded) and go through the browser download instead. Sizes
+# announced in Content-Length are rejected before the body is read; page.request
+# cannot stream, so a larger body without it is read whole, then dropped.
+MAX_FETCH_BYTES = 50 * 1024 * 1024
+
+FETCH_TIMEOUT_MS = 60_000
+
+
+class AttachmentReport(TypedDict, total=False):
+    url: str
+    status: str  # "uploaded", "duplicate" (same URL/content already saved), "failed"
+    bytes: int
+    fetch_seconds: float
+    upload_seconds: float
+    error: str
+
+
+class AttachmentPipeline:
+    """
+    Concurrent attachment downloads for one page's file links.
+
+    Files are fetched through `page.request` (sharing the browser context's
+    cookies) with a global and a per-host concurrency limit, then uploaded with
+    `upload_file_to_s3`. Files are deduplicated across the job by URL and by
+    content hash, so a PDF linked from many pages is uploaded once.
+
+    Files that cannot be fetched this way (errors, non-2xx, too large) fall
+    back to `save_file_to_s3`, one at a time since it drives the page.
+    """
+
+    def __init__(
+        self,
+        page: Page,
+        key_prefix: str,
+        concurrency: int = ATTACHMENT_CONCURRENCY,
+        host_concurrency: int = ATTACHMENT_HOST_CONCURRENCY,
+    ):
+        self.page = page
+        self.key_prefix = key_prefix
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.host_semaphores: defaultdict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(host_concurrency)
+        )
+        self.browser_lock = asyncio.Lock()
+        # Uploads by content digest, so identical files fetched at the same
+        # time are uploaded once
+        self.uploads: dict[str, asyncio.Task[Attachment]] = {}
+
+    async def save_all(
+        self, urls: list[str]
+    ) -> tuple[list[Attachment], list[AttachmentReport]]:
+        """
+        Save every file URL to S3.
+
+        Returns:
+            The attachments (one per URL saved, in order) and a per-file report
+        """
+        results = await asyncio.gather(*(self.save(url) for url in urls))
+        attachments = [attachment for attachment, _ in results if attachment]
+        return attachments, [report for _, report in results]
+
+    async def save(self, url: str) -> tuple[Attachment | None, AttachmentReport]:
+        report: AttachmentReport = {"url": url}
+        url_key = crawl_key(self.key_prefix, "attachment", url)
+
+        saved = await persistent_store.get(url_key)
+        if saved:
+            report["status"] = "duplicate"
+            return Attachment.from_dict(saved), report
+
+        try:
+            attachment = await self._fetch_and_upload(url, report)
+            if attachment is None:
+                attachment = await self._save_with_browser(url, report)
+        except Exception as e:
+            print(f"[attachments] Failed to save {url}: {e}")
+            report.update(status="failed", error=str(e))
+            return None, report
+
+        await persistent_store.set(url_key, attachment.to_dict())
+        return attachment, report
+
+    async def _fetch_and_upload(
+        self, url: str, report: AttachmentReport
+    ) -> Attachment | None:
+        """Download with page.request and upload. None if the browser is needed."""
+        host = urlsplit(url).netloc
+        async with self.semaphore, self.host_semaphores[host]:
+            started = time.perf_counter()
+            try:
+                response = await self.page.request.get(url, timeout=FETCH_TIMEOUT_MS)
+            except Exception as e:
+                print(f"[attachments] Request failed for {url}, using browser: {e}")
+                return None
+
+            try:
+                size = int(response.headers.get("content-length") or 0)
+                if not response.ok or size > MAX_FETCH_BYTES:
+                    return None
+                body = await response.body()
+            finally:
+                await response.dispose()
+            if len(body) > MAX_FETCH_BYTES:
+                return None
+            report["fetch_seconds"] = round(time.perf_counter() - started, 3)
+            report["bytes"] = len(body)
+
+        # Same content under another URL (e.g. query-string variants)
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        upload = self.uploads.get(digest)
+        if upload is None:
+            content_type = response.headers.get("content-type")
+            upload = self.uploads[digest] = asyncio.create_task(
+                self._upload(digest, body, _file_name(url), content_type, report)
+            )
+        else:
+            report["status"] = "duplicate"
+        return await upload
+
+    async def _upload(
+        self,
+        digest: str,
+        body: bytes,
+        file_name: str | None,
+        content_type: str | None,
+        report: AttachmentReport,
+    ) -> Attachment:
+        digest_key = crawl_key(self.key_prefix, "attachment_digest", digest)
+        saved = await persistent_store.get(digest_key)
+        if saved:
+            report["status"] = "duplicate"
+            return Attachment.from_dict(saved)
+
+        started = time.perf_counter()
+        attachment = await upload_file_to_s3(
+            body, file_name_override=file_name, content_type=content_type
+        )
+        report["upload_seconds"] = round(time.perf_counter() - started, 3)
+        report["status"] = "uploaded"
+        await persistent_store.set(digest_key, attachment.to_dict())
+        return attachment
+
+    async def _save_with_browser(
+        self, url: str, report: AttachmentReport
+    ) -> Attachment:
+        async with self.browser_lock:
+            started = time.perf_counter()
+            attachment = await save_file_to_s3(page=self.page, trigger=url)
+            report["upload_seconds"] = round(time.perf_counter() - started, 3)
+        report["status"] = "uploaded"
+        return attachment
+
+
+def _file_name(url: str) -> str | None:
+    name = unquote(urlsplit(url).path.rsplit("/", 1)[-1])
+    return name or None
@@ -0,0 +1,244 @@
+import asyncio
+import random
+import time
+import uuid
+from collections import deque
+from collections.abc import Callable
+from typing import NamedTuple
+
+from .telemetry import persistent_store
+
+# Longest a claimer waits before reading its claims back. Competing writes
+# issued before the read-back usually land within this window, so all
+# claimers agree on the same (last) writer.
+CLAIM_SETTLE_SECONDS = 0.25
+
+# Shortest wait, and the wait as a multiple of the slowest recent claim write:
+# a competitor that read a key as free before our write landed has issued its
+# own write by then, and it lands within about one write of ours
+MIN_SETTLE_SECONDS = 0.02
+SETTLE_WRITE_FACTOR = 4
+
+# Slot keys read at once when looking for a free slot
+SCAN_BATCH = 32
+
+# Durations of the recent claim writes of this process
+_write_seconds: deque[float] = deque(maxlen=64)
+
+
+class SlotRange(NamedTuple):
+    """Budget slots `0..stop-1`: slot i is the key `key(i)`."""
+
+    key: Callable[[int], str]
+    hint_key: str  # Next slot to probe (a hint: slots below may be free again)
+    stop: int
+
+
+def new_claim_token() -> str:
+    return uuid.uuid4().hex
+
+
+def settle_seconds() -> float:
+    """
+    How long claimers wait before reading their claims back: SETTLE_WRITE_FACTOR
+    times the slowest recent claim write, between MIN_SETTLE_SECONDS and
+    CLAIM_SETTLE_SECONDS (the maximum until a write has been timed).
+    """
+    if not _write_seconds:
+        return CLAIM_SETTLE_SECONDS
+    wait = SETTLE_WRITE_FACTOR * max(_write_seconds)
+    return min(CLAIM_SETTLE_SECONDS, max(MIN_SETTLE_SECONDS, wait))
+
+
+async def claim_keys(keys: list[str], token: str) -> list[bool]:
+    """
+    Claim each of `keys` for `token` on top of persistent_store (get/set only).
+
+    Uses a lease-token write-then-verify: write our token on the free keys,
+    wait `settle_seconds()` for concurrent writers to settle, then read them
+    back. A key is ours if our token survived. All keys share one wait, which
+    is sized from the store's write latency, so a fast store waits little.
+
+    This is best-effort, not compare-and-set: persistent_store has no atomic
+    primitive, so a competing write landing after the wait (a write much
+    slower than the recent ones, a stalled event loop) lets both claimers win.
+
+    Returns:
+        For each key, True if it is (now) held by `token`.
+    """
+    held = dict(
+        zip(keys, await asyncio.gather(*(persistent_store.get(k) for k in keys)))
+    )
+    free = [key for key, value in held.items() if value is None]
+    if free:
+        started = time.monotonic()
+        await asyncio.gather(*(persistent_store.set(key, token) for key in free))
+        _write_seconds.append(time.monotonic() - started)
+        await asyncio.sleep(settle_seconds())
+        held.update(
+            zip(free, await asyncio.gather(*(persistent_store.get(k) for k in free)))
+        )
+    return [held[key] == token for key in keys]
+
+
+async def claim_key(key: str, token: str, legacy_key: str | None = None) -> bool:
+    """
+    Claim `key` for `token` (see `claim_keys`).
+
+    If `legacy_key` is given, it is read alongside `key` and the claim fails
+    when it is already set (state written before the key format changed).
+
+    Returns:
+        True if the key is (now) held by `token`.
+    """
+    if legacy_key and await persistent_store.get(legacy_key):
+        return False
+    return (await claim_keys([key], token))[0]
+
+
+async def release_key(key: str, token: str) -> None:
+    """Free `key` if `token` holds it."""
+    if await persistent_store.get(key) == token:
+        await persistent_store.set(key, None)
+
+
+def page_slots(key_prefix: str, max_pages: int) -> SlotRange:
+    """The job's page budget, sharded into `max_pages` slot keys."""
+    return SlotRange(
+        lambda slot: f"{key_prefix}__page_slot_{slot}__",
+        f"{key_prefix}__page_count__",
+        max_pages,
+    )
+
+
+async def page_slots_claimed(key_prefix: str) -> int:
+    """Approximate number of page budget slots claimed so far in the job."""
+    return await persistent_store.get(f"{key_prefix}__page_count__") or 0
+
+
+async def free_slots(slots: SlotRange, start: int = 0) -> list[int]:
+    """
+    Free slots of `slots`, read SCAN_BATCH at a time from `start` to the end,
+    then from slot 0 up to `start`.
+
+    Returns:
+        The free slots of the first batch that has any (none if all are held)
+    """
+    order = [*range(min(start, slots.stop), slots.stop), *range(min(start, slots.stop))]
+    for i in range(0, len(order), SCAN_BATCH):
+        batch = order[i : i + SCAN_BATCH]
+        values = await asyncio.gather(
+            *(persistent_store.get(slots.key(slot)) for slot in batch)
+        )
+        free = [slot for slot, value in zip(batch, values) if value is None]
+        if free:
+            return free
+    return []
+
+
+async def claim_page(
+    visited_key: str,
+    token: str,
+    slot_ranges: list[SlotRange],
+    legacy_key: str | None = None,
+) -> tuple[bool, int | None]:
+    """
+    Claim a page: its visited key, and one slot of each budget in
+    `slot_ranges`, with `claim_keys`.
+
+    The visited key and the hinted slot of every range are claimed in the
+    same round, so an uncontended page waits for a single settle. A slot lost
+    to another payload is replaced by a free one read from the store (from
+    the hint on, wrapping around to slot 0), picked at random among a batch
+    after a loss so racing payloads spread over different slots. Each range
+    is sharded into slot keys, so (up to the `claim_keys` caveat) at most
+    `stop` payloads hold one of its slots.
+
+    A range is only reported full when every slot is held, twice, two settle
+    windows apart: slots held by payloads that are about to lose a race (and
+    release them) are free by the second read.
+
+    If the visited key is lost or a range is full, the slots already won are
+    released (the visited key, once won, is kept).
+
+    Returns:
+        Whether `visited_key` is held by `token`, and the index of the range
+        that is full (None if a slot of every range is held). A range can be
+        full before the visited key is claimed.
+    """
+    if legacy_key and await persistent_store.get(legacy_key):
+        return False, None
+
+    hints = await asyncio.gather(
+        *(persistent_store.get(slots.hint_key) for slots in slot_ranges)
+    )
+    starts = [min(hint or 0, slots.stop) for hint, slots in zip(hints, slot_ranges)]
+    # Slot to claim next per range (None: read the store for a free one)
+    candidates: list[int | None] = [
+        start if start < slots.stop else None
+        for start, slots in zip(starts, slot_ranges)
+    ]
+    lost = [False] * len(slot_ranges)
+    won: list[int | None] = [None] * len(slot_ranges)
+    visited = None
+
+    async def release_won() -> None:
+        await asyncio.gather(
+            *(
+                release_slot(slots, slot, token)
+                for slots, slot in zip(slot_ranges, won)
+                if slot is not None
+            )
+        )
+
+    while True:
+        pending = [i for i, slot in enumerate(won) if slot is None]
+        for i in pending:
+            if candidates[i] is not None:
+                continue
+            free = await free_slots(slot_ranges[i], starts[i])
+            if not free:
+                await asyncio.sleep(2 * settle_seconds())
+                free = await free_slots(slot_ranges[i], starts[i])
+            if not free:
+                await release_won()
+                return bool(visited), i
+            candidates[i] = random.choice(free) if lost[i] else free[0]
+
+        keys = [slot_ranges[i].key(candidates[i]) for i in pending]
+        if visited is None:
+            keys.append(visited_key)
+        results = await claim_keys(keys, token)
+
+        for i, claimed in zip(pending, results):
+            if claimed:
+                won[i] = candidates[i]
+            else:
+                lost[i] = True
+                starts[i] = candidates[i] + 1
+                candidates[i] = None
+        if visited is None:
+            visited = results[-1]
+        if not visited:
+            await release_won()
+            return False, None
+        if all(slot is not None for slot in won):
+            await asyncio.gather(
+                *(
+                    persistent_store.set(slots.hint_key, slot + 1)
+                    for slots, slot in zip(slot_ranges, won)
+                )
+            )
+            return True, None
+
+
+async def release_slot(slots: SlotRange, slot: int, token: str) -> None:
+    """
+    Free a slot won by `token`, and move the hint back so it is probed again.
+    A concurrent claim can move the hint past it again; later claims still
+    find the slot when they read the store for free slots.
+    """
+    await release_key(slots.key(slot), token)
+    hint = await persistent_store.get(slots.hint_key) or 0
+    if hint > slot:
+        await persistent_store.set(slots.hint_key, slot)
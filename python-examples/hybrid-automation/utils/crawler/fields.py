@@ -0,0 +1,64 @@
+from typing import Any, TypedDict
+
+from playwright.async_api import Page
+
+
+class FieldSpec(TypedDict, total=False):
+    selector: str  # CSS selector, relative to the parent match for nested fields
+    attribute: str  # Read this attribute instead of the text content
+    all: bool  # Every match as a list instead of the first match
+    fields: "FieldMap"  # Extract these fields from each match instead of its text
+
+
+# A plain string is shorthand for {"selector": ...}
+FieldMap = dict[str, "FieldSpec | str"]
+
+
+# Runs the whole spec inside the page, so extraction is a single round trip
+# however many fields and list items there are
+_EXTRACT_FIELDS_JS = """
+(spec) => {
+    const readFields = (root, fields) => {
+        const result = {};
+        for (const [name, field] of Object.entries(fields)) {
+            result[name] = readField(root, typeof field === "string" ? { selector: field } : field);
+        }
+        return result;
+    };
+    const readValue = (element, field) => {
+        if (field.fields) return readFields(element, field.fields);
+        if (field.attribute) return element.getAttribute(field.attribute);
+        return element.textContent;
+    };
+    const readField = (root, field) => {
+        if (field.all) {
+            return Array.from(root.querySelectorAll(field.selector), (e) => readValue(e, field));
+        }
+        const element = root.querySelector(field.selector);
+        return element ? readValue(element, field) : null;
+    };
+    return readFields(document, spec);
+}
+"""
+
+
+async def extract_fields(page: Page, spec: FieldMap) -> dict[str, Any]:
+    """
+    Extract a declarative field spec from the current page in one `page.evaluate`.
+
+    Example:
+        await extract_fields(page, {
+            "title": "h1",
+            "apply_url": {"selector": "a.apply", "attribute": "href"},
+            "sections": {
+                "selector": "section",
+                "all": True,
+                "fields": {"heading": "h3", "items": {"selector": "li", "all": True}},
+            },
+        })
+
+    Returns:
+        Dict with the same keys as `spec`. Single fields are the text (or
+        attribute) of the first match, or None; `all` fields are lists.
+    """
+    return await page.evaluate(_EXTRACT_FIELDS_JS, spec)
@@ -1,8 +1,12 @@
-from urllib.parse import urlparse
+from typing import Callable
+from urllib.parse import ParseResult, quote, urljoin, urlparse
 
-from intuned_browser import resolve_url
 from playwright.async_api import Page
 
+from .canonical import get_canonicalizer
+
+SKIPPED_HREF_PREFIXES = ("javascript:", "mailto:", "tel:", "#")
+
 
 def get_base_domain(url: str) -> str:
     parsed = urlparse(url)
@@ -11,21 +15,96 @@ def get_base_domain(url: str) -> str:
 
 def normalize_url(url: str) -> str:
     """
-    Normalize URL to prevent duplicates.
+    Normalize URL to prevent duplicates, using the default `UrlRules`.
 
-    - Removes fragments (#section)
-    - Normalizes trailing slashes
-    - Lowercases domain
+    - Removes fragments (#section) and tracking params (utm_*, fbclid, ...)
+    - Sorts the remaining query params
+    - Normalizes trailing slashes, default ports and percent-encoding
+    - Lowercases scheme and domain (IDNA-encoded)
     """
-    parsed = urlparse(url)
-    path = parsed.path.rstrip("/") or "/"
-    return f"{parsed.scheme}://{parsed.netloc.lower()}{path}"
+    return get_canonicalizer()(url)
+
+
+def _resolve_href(href: str, base_url: str) -> ParseResult:
+    """
+    Resolve `href` against `base_url`, same rules as `intuned_browser.resolve_url`:
+    absolute URLs are kept as-is, relative ones are joined and have their
+    path and query percent-encoded.
+    """
+    parsed = urlparse(href)
+    if parsed.scheme and parsed.netloc:
+        return parsed
+
+    full = urlparse(urljoin(base_url, href))
+    return full._replace(
+        path=quote(full.path, safe="/%"),
+        query=quote(full.query, safe="=&%"),
+    )
+
+
+def resolve_hrefs(
+    hrefs: list[str | None],
+    base_url: str,
+    base_domain: str,
+    include_external: bool = False,
+    normalize: Callable[[str], str] = normalize_url,
+) -> dict[str, str | None]:
+    """
+    Resolve, filter and normalize raw hrefs in one synchronous pass.
+
+    Each distinct href is resolved and parsed once (pages repeat nav links
+    many times), and `normalize` is only called for links that pass the filter.
+
+    Returns:
+        Map of each distinct href to its normalized URL, or None if filtered out
+    """
+    resolved: dict[str, str | None] = {}
+
+    for href in hrefs:
+        if not href or href in resolved:
+            continue
+
+        if href.startswith(SKIPPED_HREF_PREFIXES):
+            resolved[href] = None
+            continue
+
+        try:
+            parsed = _resolve_href(href, base_url)
+        except ValueError:
+            print(f"Failed to resolve URL: {href}")
+            resolved[href] = None
+            continue
+
+        if parsed.netloc.lower() == base_domain or include_external:
+            resolved[href] = normalize(parsed.geturl())
+        else:
+            resolved[href] = None
+
+    return resolved
+
+
+def resolve_links(
+    hrefs: list[str | None],
+    base_url: str,
+    base_domain: str,
+    include_external: bool = False,
+    normalize: Callable[[str], str] = normalize_url,
+) -> list[str]:
+    """
+    Resolve, filter and normalize raw hrefs (see `resolve_hrefs`).
+
+    Returns:
+        List of normalized, deduplicated URLs
+    """
+    resolved = resolve_hrefs(hrefs, base_url, base_domain, include_external, normalize)
+    return list({link for link in resolved.values() if link})
 
 
 async def extract_links(
     page: Page,
     base_domain: str,
     include_external: bool = False,
+    normalize: Callable[[str], str] = normalize_url,
 ) -> list[str]:
     """
     Extract all links from the current page.
@@ -34,36 +113,50 @@ async def extract_links(
         page: Playwright page object (already navigated)
         base_domain: Domain to filter links
         include_external: Whether to include external links (ignores base_domain)
+        normalize: URL canonicalizer, e.g. `get_canonicalizer(params["url_rules"])`
 
     Returns:
         List of normalized, deduplicated URLs
     """
-    current_url = page.url
-
     hrefs = await page.eval_on_selector_all(
         "a[href]", "elements => elements.map(e => e.getAttribute('href'))"
     )
 
-    links = []
-    for href in hrefs:
-        if not href:
-            continue
+    return resolve_links(hrefs, page.url, base_domain, include_external, normalize)
 
-        if href.startswith(("javascript:", "mailto:", "tel:", "#")):
-            continue
 
-        try:
-            full_url = await resolve_url(url=href, base_url=current_url)
-        except Exception:
-            print(f"Failed to resolve URL: {href}")
-            continue
+async def extract_link_texts(
+    page: Page,
+    base_domain: str,
+    include_external: bool = False,
+    normalize: Callable[[str], str] = normalize_url,
+) -> dict[str, str]:
+    """
+    Extract all links from the current page, with their link text.
+
+    Same filtering and normalization as `extract_links`.
 
-        link_domain = get_base_domain(full_url)
-        if link_domain == base_domain or include_external:
-            normalized = normalize_url(full_url)
-            links.append(normalized)
+    Returns:
+        Map of normalized URL to the text of every anchor pointing at it
+    """
+    anchors = await page.eval_on_selector_all(
+        "a[href]",
+        "elements => elements.map(e => [e.getAttribute('href'), e.innerText])",
+    )
+    resolved = resolve_hrefs(
+        [href for href, _ in anchors],
+        page.url,
+        base_domain,
+        include_external,
+        normalize,
+    )
 
-    return list(set(links))
+    texts: dict[str, list[str]] = {}
+    for href, text in anchors:
+        link = resolved.get(href) if href else None
+        if link:
+            texts.setdefault(link, []).append((text or "").strip())
+    return {link: " ".join(filter(None, parts)) for link, parts in texts.items()}
 
 
 FILE_EXTENSIONS = {
@@ -0,0 +1,168 @@
+import asyncio
+import re
+from typing import Literal, TypedDict
+from urllib.parse import urlparse
+
+from .claims import page_slots_claimed
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+Priority = Literal["high", "normal"]
+
+
+class ScoreRule(TypedDict, total=False):
+    pattern: str  # Regex searched in the URL
+    anchor_keywords: list[str]  # Case-insensitive keywords searched in the link text
+    score: float  # Added to the URL's score when the rule matches
+
+
+class ScoringParams(TypedDict, total=False):
+    rules: list[ScoreRule]
+    depth_penalty: float  # Subtracted per URL path segment (default: 0.1)
+    high_priority_score: float  # Min score of a high-priority URL (default: 5)
+    min_score: float  # URLs scoring below this are not queued (default: unset)
+    reserved_budget: float  # Share of max_pages kept for high priority (default: 0)
+    max_deferrals: int  # Times a normal page waits for the reserve (default: 2)
+
+
+class UrlScorer:
+    """
+    Scores discovered links so the crawl spends its page budget on the
+    most promising ones first.
+
+    A URL's score is the sum of the scores of every rule it matches (URL regex
+    and/or link-text keywords), minus `depth_penalty` per path segment.
+    """
+
+    def __init__(self, params: ScoringParams):
+        self.rules = [
+            (
+                re.compile(rule["pattern"]) if rule.get("pattern") else None,
+                [keyword.lower() for keyword in rule.get("anchor_keywords", [])],
+                rule.get("score", 1.0),
+            )
+            for rule in params.get("rules", [])
+        ]
+        self.depth_penalty = params.get("depth_penalty", 0.1)
+        self.high_priority_score = params.get("high_priority_score", 5.0)
+        self.min_score = params.get("min_score")
+
+    def score(self, url: str, anchor_text: str = "") -> float:
+        text = anchor_text.lower()
+        total = 0.0
+        for pattern, keywords, score in self.rules:
+            if pattern and not pattern.search(url):
+                continue
+            if keywords and not any(keyword in text for keyword in keywords):
+                continue
+            total += score
+
+        path_depth = len([part for part in urlparse(url).path.split("/") if part])
+        return total - self.depth_penalty * path_depth
+
+    def priority(self, score: float) -> Priority:
+        return "high" if score >= self.high_priority_score else "normal"
+
+    def rank(self, links: dict[str, str]) -> list[tuple[str, Priority]]:
+        """
+        Score and order links, highest score first.
+
+        Args:
+            links: Map of URL to its link text
+
+        Returns:
+            (url, priority) pairs, without the URLs scoring below `min_score`
+        """
+        scored = [(self.score(url, text), url) for url, text in links.items()]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [
+            (url, self.priority(score))
+            for score, url in scored
+            if self.min_score is None or score >= self.min_score
+        ]
+
+
+def page_budget(
+    max_pages: int,
+    priority: Priority,
+    reserved_budget: float = 0,
+    high_pending: bool = True,
+) -> int:
+    """
+    Number of page-budget slots a URL of `priority` may claim.
+
+    While high-priority URLs are pending (`high_pending`), normal-priority URLs
+    can only use the unreserved part of `max_pages`, so high-priority URLs
+    discovered late still find budget left. Once none is pending, the reserve
+    is released and normal-priority URLs may use all of `max_pages`.
+    """
+    if priority == "high" or not high_pending:
+        return max_pages
+    return max_pages - int(max_pages * reserved_budget)
+
+
+class PriorityBudget:
+    """
+    Crawl-wide high / normal priority buckets over a job's `max_pages`.
+
+    High-priority URLs may claim any page slot; normal-priority ones only the
+    unreserved part while high-priority URLs are queued and not done yet. A
+    normal page that finds its part full is deferred (re-queued, at most
+    `max_deferrals` times), so the high-priority pages queued before it claim
+    the shared pool first, and it runs again once they are done and the
+    reserve is released.
+
+    The queued / done counts of high-priority pages are read-modify-write
+    counters in `persistent_store`, like the section counters of
+    `SectionBudget`: a lost update only releases the reserve early or late.
+    """
+
+    def __init__(self, key_prefix: str, max_pages: int, params: ScoringParams):
+        self.key_prefix = key_prefix
+        self.max_pages = max_pages
+        self.reserved_budget = params.get("reserved_budget", 0)
+        self.max_deferrals = params.get("max_deferrals", 2)
+
+    async def high_pending(self) -> bool:
+        """Whether high-priority pages are queued and not done yet."""
+        if not self.reserved_budget:
+            return False
+        queued, done = await asyncio.gather(
+            *(
+                persistent_store.get(f"{self.key_prefix}__high_{kind}__")
+                for kind in ("queued", "done")
+            )
+        )
+        return (queued or 0) > (done or 0)
+
+    async def budget(self, priority: Priority) -> int:
+        """Page-budget slots a URL of `priority` may claim now (see `page_budget`)."""
+        high_pending = priority == "normal" and await self.high_pending()
+        return page_budget(self.max_pages, priority, self.reserved_budget, high_pending)
+
+    async def may_grow(self) -> bool:
+        """Whether the reserve can still be released: `max_pages` is not used up."""
+        return await page_slots_claimed(self.key_prefix) < self.max_pages
+
+    async def add_queued(self, priorities: list[Priority]) -> None:
+        """Count the high-priority pages among those just queued."""
+        high = priorities.count("high")
+        if self.reserved_budget and high:
+            await self._add("queued", high)
+
+    async def mark_done(self, url: str) -> None:
+        """
+        Count a queued high-priority page as done (crawled, skipped or failed),
+        once per URL: a retried payload does not count its page again.
+        """
+        if not self.reserved_budget:
+            return
+        done_key = crawl_key(self.key_prefix, "high_done", url)
+        if await persistent_store.get(done_key):
+            return
+        await persistent_store.set(done_key, True)
+        await self._add("done", 1)
+
+    async def _add(self, kind: str, value: int) -> None:
+        key = f"{self.key_prefix}__high_{kind}__"
+        await persistent_store.set(key, (await persistent_store.get(key) or 0) + value)
@@ -0,0 +1,193 @@
+import json
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, TypedDict
+
+from intuned_runtime import persistent_store as _store
+
+
+class StageStats(TypedDict):
+    calls: int
+    seconds: float  # Summed over calls: concurrent calls can exceed wall time
+    max_seconds: float
+
+
+class TelemetrySummary(TypedDict):
+    total_seconds: float
+    stages: dict[str, StageStats]
+    counters: dict[str, int]
+
+
+class Telemetry:
+    """Span timings and counters of one crawl payload (see `collect`)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: dict[str, list[float]] = {}  # stage -> [calls, seconds, max]
+        self.counters: dict[str, int] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            self.stages[stage] = [1, seconds, seconds]
+        else:
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def summary(self) -> TelemetrySummary:
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": {
+                stage: {
+                    "calls": int(calls),
+                    "seconds": round(seconds, 4),
+                    "max_seconds": round(max_seconds, 4),
+                }
+                for stage, (calls, seconds, max_seconds) in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+class _Span:
+    __slots__ = ("telemetry", "stage", "started")
+
+    def __init__(self, telemetry: Telemetry, stage: str):
+        self.telemetry = telemetry
+        self.stage = stage
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *_exc) -> None:
+        self.telemetry.record(self.stage, time.perf_counter() - self.started)
+
+
+# Telemetry of the payload running in the current task (None when disabled).
+# asyncio tasks copy the context, so concurrent payloads never share one.
+_current: ContextVar[Telemetry | None] = ContextVar("crawl_telemetry", default=None)
+_NO_SPAN = nullcontext()
+
+
+@contextmanager
+def collect(enabled: bool) -> Iterator[Telemetry | None]:
+    """
+    Record the spans and counters of the code run inside the block.
+
+    Yields:
+        The payload's Telemetry, or None when disabled (spans and counters
+        are then no-ops: one context variable lookup each)
+    """
+    if not enabled:
+        yield None
+        return
+    telemetry = Telemetry()
+    token = _current.set(telemetry)
+    try:
+        yield telemetry
+    finally:
+        _current.reset(token)
+
+
+def span(stage: str) -> AbstractContextManager:
+    """
+    Time the block as one call of `stage`.
+
+    Stages can nest (e.g. store ops inside `enqueue`), so stage times are
+    not meant to add up to `total_seconds`.
+    """
+    telemetry = _current.get()
+    if telemetry is None:
+        return _NO_SPAN
+    return _Span(telemetry, stage)
+
+
+def count(name: str, value: int = 1) -> None:
+    """Add `value` to the counter `name`."""
+    telemetry = _current.get()
+    if telemetry is not None:
+        telemetry.counters[name] = telemetry.counters.get(name, 0) + value
+
+
+class _TimedStore:
+    """`intuned_runtime.persistent_store`, with calls recorded as store spans."""
+
+    async def get(self, key: str) -> Any:
+        with span("store_get"):
+            return await _store.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        with span("store_set"):
+            await _store.set(key, value)
+
+
+persistent_store = _TimedStore()
+
+
+def merge_summaries(summaries: Iterable[TelemetrySummary]) -> TelemetrySummary:
+    """Add up the telemetry of several payloads (e.g. a batch, or a whole job)."""
+    merged: TelemetrySummary = {"total_seconds": 0.0, "stages": {}, "counters": {}}
+    for summary in summaries:
+        merged["total_seconds"] += summary["total_seconds"]
+        for stage, stats in summary["stages"].items():
+            total = merged["stages"].setdefault(
+                stage, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0}
+            )
+            total["calls"] += stats["calls"]
+            total["seconds"] += stats["seconds"]
+            total["max_seconds"] = max(total["max_seconds"], stats["max_seconds"])
+        for name, value in summary["counters"].items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + value
+    return merged
+
+
+def to_json_lines(results: Iterable[dict]) -> str:
+    """One JSON line per crawl result that has telemetry (e.g. a job's results)."""
+    lines = []
+    for result in results:
+        if "telemetry" not in result:
+            continue
+        target = {key: result[key] for key in ("url", "urls") if key in result}
+        lines.append(json.dumps({**target, **result["telemetry"]}))
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def to_openmetrics(results: Iterable[dict], prefix: str = "crawl") -> str:
+    """The telemetry of crawl results, added up, in OpenMetrics text format."""
+    summaries = [result["telemetry"] for result in results if "telemetry" in result]
+    merged = merge_summaries(summaries)
+    stages = sorted(merged["stages"].items())
+    lines = [
+        f"# TYPE {prefix}_payloads counter",
+        f"{prefix}_payloads_total {len(summaries)}",
+        f"# TYPE {prefix}_payload_seconds counter",
+        f"# UNIT {prefix}_payload_seconds seconds",
+        f"{prefix}_payload_seconds_total {merged['total_seconds']:.4f}",
+        f"# TYPE {prefix}_stage_calls counter",
+        *(
+            f'{prefix}_stage_calls_total{{stage="{stage}"}} {stats["calls"]}'
+            for stage, stats in stages
+        ),
+        f"# TYPE {prefix}_stage_seconds counter",
+        f"# UNIT {prefix}_stage_seconds seconds",
+        *(
+            f'{prefix}_stage_seconds_total{{stage="{stage}"}} {stats["seconds"]:.4f}'
+            for stage, stats in stages
+        ),
+        f"# TYPE {prefix}_stage_max_seconds gauge",
+        f"# UNIT {prefix}_stage_max_seconds seconds",
+        *(
+            f'{prefix}_stage_max_seconds{{stage="{stage}"}} {stats["max_seconds"]:.4f}'
+            for stage, stats in stages
+        ),
+        f"# TYPE {prefix}_events counter",
+        *(
+            f'{prefix}_events_total{{counter="{name}"}} {value}'
+            for name, value in sorted(merged["counters"].items())
+        ),
+        "# EOF",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,242 @@
+import hashlib
+import re
+from typing import Any, NotRequired, TypedDict
+
+from playwright.async_api import Page
+
+from .fields import FieldMap, extract_fields
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+# Pages of a layout extracted with AI before its learned mapping is trusted
+LEARN_PAGES = 2
+
+# Share of a template's fields that must be found for a template extraction
+# to be accepted (the title is always required)
+MIN_FIELD_RATIO = 0.75
+
+# Values longer than this are matched by prefix (AI output may be trimmed)
+PREFIX_MATCH_CHARS = 120
+
+_SPACES = re.compile(r"\s+")
+
+
+class LayoutTemplate(TypedDict):
+    fields: FieldMap  # Field name -> selector, verified against AI output
+    confirmations: int  # AI-extracted pages that agreed on these selectors
+    unmapped: NotRequired[list[str]]  # Fields AI extracted that no selector reads
+
+
+# DOM skeleton of the page: tag + stable classes of every element that has a
+# class or id, with repeated siblings collapsed, so pages built from the same
+# template (but with different text and list lengths) get the same skeleton
+_LAYOUT_SKELETON_JS = """
+() => {
+    const MAX_DEPTH = 16;
+    const MAX_NODES = 3000;
+    let nodes = 0;
+    const signature = (element) => {
+        const classes = Array.from(element.classList)
+            .filter((name) => !/\\d/.test(name))
+            .sort();
+        return [element.tagName.toLowerCase(), ...classes].join(".");
+    };
+    const walk = (element, depth) => {
+        if (depth > MAX_DEPTH || nodes > MAX_NODES) return "";
+        const parts = [];
+        let previous = null;
+        for (const child of element.children) {
+            const tag = child.tagName.toLowerCase();
+            if (["script", "style", "noscript", "svg"].includes(tag)) continue;
+            const structural = child.classList.length > 0 || child.id;
+            const part = structural
+                ? signature(child) + "(" + walk(child, depth + 1) + ")"
+                : walk(child, depth + 1);
+            if (part && part !== previous) parts.push(part);
+            previous = part;
+            nodes++;
+        }
+        return parts.join(",");
+    };
+    return walk(document.body, 0);
+}
+"""
+
+# For each value, find the deepest element whose text matches it and build the
+# shortest ancestor-class selector whose first match is that element
+_DERIVE_SELECTORS_JS = """
+([values, prefixChars]) => {
+    const normalize = (text) => (text || "").replace(/\\s+/g, " ").trim();
+    const matches = (text, value) =>
+        value.length > prefixChars ? text.startsWith(value.slice(0, prefixChars)) : text === value;
+    const step = (element) => {
+        const attribute = ["data-qa", "data-testid", "itemprop"].find((name) =>
+            element.hasAttribute(name)
+        );
+        if (attribute) {
+            const value = CSS.escape(element.getAttribute(attribute));
+            return `${element.tagName.toLowerCase()}[${attribute}="${value}"]`;
+        }
+        const classes = Array.from(element.classList).filter((name) => /^[a-zA-Z_-]+$/.test(name));
+        return [element.tagName.toLowerCase(), ...classes.map((name) => CSS.escape(name))].join(".");
+    };
+    const selectorFor = (element) => {
+        const steps = [];
+        for (let current = element; current && current !== document.body; current = current.parentElement) {
+            steps.unshift(step(current));
+            const selector = steps.join(" ");
+            if (document.querySelector(selector) === element) return selector;
+            if (steps.length >= 5) break;
+        }
+        return null;
+    };
+    const elements = Array.from(document.body.querySelectorAll("*"));
+    const texts = elements.map((e) => normalize(e.textContent));
+    const result = {};
+    for (const [name, raw] of Object.entries(values)) {
+        const value = normalize(raw);
+        if (!value) continue;
+        const candidates = elements.filter((e, i) => matches(texts[i], value));
+        const deepest = candidates.filter((e) => !candidates.some((c) => c !== e && e.contains(c)));
+        for (const element of deepest) {
+            const selector = selectorFor(element);
+            if (selector) {
+                result[name] = selector;
+                break;
+            }
+        }
+    }
+    return result;
+}
+"""
+
+
+def _normalize(value: Any) -> str:
+    return _SPACES.sub(" ", str(value or "")).strip()
+
+
+def _agrees(extracted: Any, expected: Any) -> bool:
+    extracted, expected = _normalize(extracted), _normalize(expected)
+    if len(expected) > PREFIX_MATCH_CHARS:
+        return extracted.startswith(expected[:PREFIX_MATCH_CHARS])
+    return extracted == expected
+
+
+async def layout_fingerprint(page: Page) -> str:
+    """Hash of the page's DOM skeleton (see `_LAYOUT_SKELETON_JS`)."""
+    skeleton = await page.evaluate(_LAYOUT_SKELETON_JS)
+    return hashlib.blake2b(skeleton.encode(), digest_size=16).hexdigest()
+
+
+async def derive_field_map(page: Page, data: dict[str, Any]) -> FieldMap:
+    """
+    Learn a selector for each string field of `data` (e.g. AI extraction output)
+    on the current page, keeping only selectors that read the same value back.
+    """
+    values = {
+        name: value
+        for name, value in data.items()
+        if isinstance(value, str) and value.strip()
+    }
+    if not values:
+        return {}
+
+    selectors = await page.evaluate(_DERIVE_SELECTORS_JS, [values, PREFIX_MATCH_CHARS])
+    if not selectors:
+        return {}
+
+    extracted = await extract_fields(page, selectors)
+    return {
+        name: selector
+        for name, selector in selectors.items()
+        if _agrees(extracted[name], values[name])
+    }
+
+
+class TemplateCache:
+    """
+    Job-wide cache of learned page layouts, keyed by layout fingerprint.
+
+    The first LEARN_PAGES pages of a layout are extracted with AI; each one
+    derives a selector mapping from the AI output, and only selectors every
+    page agrees on are kept. After that, pages of the layout are extracted by
+    the mapping in one `page.evaluate`, and AI only runs again when the
+    mapping stops finding the fields.
+    """
+
+    def __init__(self, key_prefix: str, required_field: str = "title"):
+        self.key_prefix = key_prefix
+        self.required_field = required_field
+
+    def _key(self, fingerprint: str) -> str:
+        return crawl_key(self.key_prefix, "template", fingerprint)
+
+    async def extract(self, page: Page, fingerprint: str) -> dict[str, Any] | None:
+        """
+        Extract the page with the learned mapping of its layout.
+
+        Fields the AI extracted on the learning pages but the mapping does not
+        cover are logged and returned as None.
+
+        Returns:
+            Extracted fields, or None if the layout is not learned yet or the
+            mapping failed validation (the caller should fall back to AI)
+        """
+        template: LayoutTemplate | None = await persistent_store.get(
+            self._key(fingerprint)
+        )
+        if not template or template["confirmations"] < LEARN_PAGES:
+            return None
+
+        fields = template["fields"]
+        data = await extract_fields(page, fields)
+        found = {name for name, value in data.items() if _normalize(value)}
+        enough = len(found) >= MIN_FIELD_RATIO * len(fields)
+        if self.required_field not in found or not enough:
+            print(f"[templates] Layout {fingerprint[:8]} mapping failed validation")
+            return None
+        unmapped = template.get("unmapped", [])
+        if unmapped:
+            print(
+                f"[templates] Layout {fingerprint[:8]} does not cover: "
+                + ", ".join(unmapped)
+            )
+        return {
+            **dict.fromkeys(unmapped),
+            **{name: (value or "").strip() or None for name, value in data.items()},
+        }
+
+    async def learn(self, page: Page, fingerprint: str, data: dict[str, Any]) -> None:
+        """Update the layout's mapping from an AI extraction of the current page."""
+        fields = await derive_field_map(page, data)
+        if self.required_field not in fields:
+            return
+        extracted = {name for name, value in data.items() if _normalize(value)}
+
+        key = self._key(fingerprint)
+        template: LayoutTemplate | None = await persistent_store.get(key)
+        if template and template["confirmations"] < LEARN_PAGES:
+            agreed = {
+                name: selector
+                for name, selector in template["fields"].items()
+                if fields.get(name) == selector
+            }
+            if self.required_field in agreed:
+                unmapped = set(template.get("unmapped", [])) | extracted
+                template = {
+                    "fields": agreed,
+                    "confirmations": template["confirmations"] + 1,
+                    "unmapped": sorted(unmapped - set(agreed)),
+                }
+                await persistent_store.set(key, template)
+                return
+
+        # New layout, or the learned mapping no longer works: start over
+        await persistent_store.set(
+            key,
+            {
+                "fields": fields,
+                "confirmations": 1,
+                "unmapped": sorted(extracted - set(fields)),
+            },
+        )
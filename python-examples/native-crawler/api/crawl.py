@@ -1,17 +1,54 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import aclosing
 from typing import TypedDict
 
-from intuned_browser import go_to_url, save_file_to_s3
-from intuned_runtime import extend_payload, persistent_store
+from intuned_runtime import extend_payload
 from playwright.async_api import BrowserContext, Page
 from utils import (
+    AttachmentPipeline,
+    BlockResourcesParams,
+    Frontier,
+    MarkdownOutput,
+    MarkdownOutputParams,
+    NearDuplicateIndex,
+    PageRecord,
+    PolitenessParams,
+    PolitenessScheduler,
+    SectionBudget,
+    SectionBudgetParams,
+    SiteIndex,
+    SitemapParams,
+    UrlRules,
+    block_resources,
+    build_record,
+    content_digest,
+    crawl_key,
+    discover_sitemaps,
     extract_links,
     extract_page_content,
     get_base_domain,
+    get_canonicalizer,
+    get_origin,
+    go_to_url_with_response,
     is_file_url,
-    normalize_url,
-    sanitize_key,
+    is_not_modified,
+    iter_sitemap_urls,
+    resolve_links,
+    simhash,
 )
-from utils.helpers import get_job_run_id
+from utils.claims import claim_page, new_claim_token, page_slots
+from utils.helpers import get_job_run_id, legacy_crawl_key
+from utils.telemetry import collect, count, merge_summaries, persistent_store, span
+
+# Sitemap URLs are filtered, deduplicated and queued in chunks of this size
+SEED_CHUNK_SIZE = 1000
+
+# Result `reason` of a page re-queued by `section_budget`
+DEFERRED = "deferred by section budget"
+
+# Result `reason` of a page re-queued to wait longer for its host slot
+RESCHEDULED = "rescheduled for host slot"
 
 
 class Params(TypedDict, total=False):
@@ -20,8 +57,26 @@ class Params(TypedDict, total=False):
     max_pages: int
     include_external: bool
     include_attachments: bool
+    url_rules: UrlRules  # URL canonicalization rules (see utils/canonical.py)
+    politeness: PolitenessParams  # Per-host rate limits + robots.txt (off if unset)
+    skip_near_duplicates: bool  # Skip pages whose text SimHash matches a crawled page
+    near_duplicate_distance: int  # Max SimHash bit distance for a near duplicate
+    incremental: bool  # Reuse results of previous runs for unchanged pages
+    index_name: str  # Name of the durable page index (default: base domain)
+    sitemap: SitemapParams  # Seed the frontier from sitemaps (off if unset)
+    batch_size: int  # URLs per queued payload; > 1 enables batch mode (default: 1)
+    tabs: int  # Pages crawling a batch concurrently (default: 4)
+    block_resources: BlockResourcesParams | bool  # Skip images, fonts, trackers
+    telemetry: bool  # Per-stage timings and counters in the result
+    markdown_output: MarkdownOutputParams | bool  # Store markdown, return a reference
+    section_budget: SectionBudgetParams | bool  # Share max_pages across sub-trees
     schema: dict
+    urls: list[str]  # Batch of URLs to crawl (internal, set by extend_payload)
     depth: int  # Current depth (internal, set by extend_payload)
+    not_before: float  # Host slot start time (internal, set by extend_payload)
+    url_not_before: dict[str, float]  # not_before per URL of a batch (internal)
+    claim_token: str  # Token holding the URL's claim (internal, deferred pages)
+    deferrals: int  # Times the URL was deferred by section_budget (internal)
 
 
 async def automation(
@@ -38,7 +93,29 @@ async def automation(
     2. Extracts the page content as markdown
     3. Extracts all internal links
     4. For each new link, extends payload to crawl it (if under depth limit)
-    5. Uses persistent_store to deduplicate URLs across all job payloads
+    5. Uses persistent_store to deduplicate URLs across all job payloads,
+       checking all discovered links in one concurrent batch (see utils/frontier.py)
+    6. With `politeness` set, skips URLs disallowed by robots.txt and spreads
+       requests to each host over time (see utils/politeness.py)
+    7. With `skip_near_duplicates`, pages whose text is a near duplicate of an
+       already crawled page are not extracted or expanded (see utils/fingerprint.py)
+    8. With `incremental`, pages unchanged since a previous job run (304 on a
+       conditional request, or same text digest) return their previous
+       extraction and re-queue their stored links (see utils/incremental.py)
+    9. With `sitemap` set, the seed payload also queues every URL listed in the
+       site's sitemaps at depth 1 (see utils/sitemap.py)
+    10. With `batch_size` > 1, links are queued `batch_size` per payload, and
+        each batch payload crawls its URLs on `tabs` pages of its browser
+        context concurrently
+    11. With `telemetry`, the result has per-stage timings and counters
+        (see utils/telemetry.py)
+    12. With `markdown_output`, markdown is written to S3 or a local spool and
+        the result has a `markdown_ref` (digest + location) instead; pages
+        with the same content share one copy (see utils/content.py)
+    13. With `section_budget`, `max_pages` is shared across the site's
+        sections (top-level path prefixes) instead of going to whichever
+        sub-tree is reached first; the share of finished sections goes to the
+        others (see utils/budget.py)
 
     Example params:
     {
@@ -52,6 +129,98 @@ async def automation(
     - Payloads 2-51: crawl(link) → each finds more links → extend_payload x N
     - All payloads share the same persistent_store, preventing duplicate work
     """
+    if "urls" in params:
+        return await crawl_batch(page, context or page.context, params)
+    return await crawl_page(page, params)
+
+
+async def crawl_batch(page: Page, context: BrowserContext, params: Params) -> dict:
+    """
+    Crawl a batch of URLs with up to `tabs` pages of `context` at a time.
+
+    A failing URL does not fail the batch: its result has `success: False`.
+    Results are logged as they complete and returned in completion order.
+    """
+    urls = params["urls"]
+    url_not_before = params.get("url_not_before") or {}
+    tabs = max(1, min(params.get("tabs", 4), len(urls)))
+
+    extra_pages = [await context.new_page() for _ in range(tabs - 1)]
+    idle_pages: asyncio.Queue[Page] = asyncio.Queue()
+    for tab in [page, *extra_pages]:
+        idle_pages.put_nowait(tab)
+
+    async def crawl_on_idle_page(url: str) -> dict:
+        url_params = {k: v for k, v in params.items() if k != "urls"}
+        url_params.update(url=url, not_before=url_not_before.get(url))
+        tab = await idle_pages.get()
+        try:
+            return await crawl_page(tab, url_params)
+        except Exception as e:
+            print(f"[crawl] Failed to crawl {url}: {e}")
+            return {"success": False, "url": url, "error": str(e)}
+        finally:
+            idle_pages.put_nowait(tab)
+
+    results = []
+    try:
+        for task in asyncio.as_completed([crawl_on_idle_page(url) for url in urls]):
+            result = await task
+            results.append(result)
+            print(f"[crawl] Batch progress {len(results)}/{len(urls)}: {result['url']}")
+    finally:
+        for tab in extra_pages:
+            await tab.close()
+
+    result = {
+        "success": True,
+        "urls": urls,
+        "pages_crawled": sum(
+            1 for r in results if r["success"] and not r.get("skipped")
+        ),
+        "results": results,
+    }
+    if params.get("telemetry"):
+        result["telemetry"] = merge_summaries(
+            r["telemetry"] for r in results if "telemetry" in r
+        )
+    return result
+
+
+async def crawl_page(page: Page, params: Params) -> dict:
+    """Crawl one URL (see `automation`), recording telemetry if enabled."""
+    with collect(params.get("telemetry", False)) as telemetry:
+        result = None
+        try:
+            result = await crawl_url(page, params)
+        finally:
+            # A failed page is done too; a re-queued one is not (yet)
+            if result is None or result.get("reason") not in (DEFERRED, RESCHEDULED):
+                await mark_section_done(params)
+    if telemetry:
+        result["telemetry"] = telemetry.summary()
+    return result
+
+
+def get_section_budget(params: Params) -> SectionBudget | None:
+    """The job's SectionBudget, if `section_budget` is set."""
+    if not params.get("section_budget"):
+        return None
+    return SectionBudget(
+        str(get_job_run_id()), params.get("max_pages", 50), params["section_budget"]
+    )
+
+
+async def mark_section_done(params: Params) -> None:
+    """Count a queued URL as done in its section (the seed page is not queued)."""
+    budget = get_section_budget(params)
+    if budget and params.get("depth", 0) > 0:
+        canonicalize = get_canonicalizer(params.get("url_rules"))
+        await budget.mark_done(canonicalize(params["url"]))
+
+
+async def crawl_url(page: Page, params: Params) -> dict:
+    """Crawl one URL (see `automation`)."""
     url = params["url"]
     max_depth = params.get("max_depth", 2)
     max_pages = params.get("max_pages", 50)
@@ -59,9 +228,50 @@ async def automation(
     include_attachments = params.get("include_attachments", False)
     schema = params.get("schema")
     depth = params.get("depth", 0)
+    url_rules = params.get("url_rules")
+    politeness = params.get("politeness")
+    skip_near_duplicates = params.get("skip_near_duplicates", False)
+    near_duplicate_distance = params.get("near_duplicate_distance", 3)
+    incremental = params.get("incremental", False)
+    index_name = params.get("index_name")
+    sitemap = params.get("sitemap")
+    batch_size = params.get("batch_size", 1)
+    tabs = params.get("tabs", 4)
+    blocking = params.get("block_resources")
+    markdown_output = params.get("markdown_output")
+    section_budget = params.get("section_budget")
 
     key_prefix = str(get_job_run_id())
-    normalized_url = normalize_url(url)
+    canonicalize = get_canonicalizer(url_rules)
+    normalized_url = canonicalize(url)
+    frontier = Frontier(key_prefix)
+    scheduler = (
+        PolitenessScheduler(page, key_prefix, politeness)
+        if politeness is not None
+        else None
+    )
+    budget = get_section_budget(params)
+
+    # Parameters forwarded to every child payload
+    child_params = {
+        "max_depth": max_depth,
+        "max_pages": max_pages,
+        "include_external": include_external,
+        "url_rules": url_rules,
+        "politeness": politeness,
+        "skip_near_duplicates": skip_near_duplicates,
+        "near_duplicate_distance": near_duplicate_distance,
+        "incremental": incremental,
+        "index_name": index_name,
+        "batch_size": batch_size,
+        "tabs": tabs,
+        "block_resources": blocking,
+        "telemetry": params.get("telemetry", False),
+        "markdown_output": markdown_output,
+        "section_budget": section_budget,
+        "schema": schema,
+    }
+    next_depth = depth + 1
 
     # Store config for child payloads (only on first call)
     base_domain = get_base_domain(url)
@@ -72,9 +282,57 @@ async def automation(
             await persistent_store.get(f"{key_prefix}__base_domain__") or base_domain
         )
 
-    # Deduplicate
-    visited_key = sanitize_key(f"{key_prefix}_visited_{normalized_url}")
-    if await persistent_store.get(visited_key):
+    if scheduler and not await scheduler.is_allowed(url):
+        return {
+            "success": True,
+            "url": url,
+            "skipped": True,
+            "reason": "disallowed by robots.txt",
+        }
+
+    # A host slot further out than `max_wait_seconds`: wait that long, then
+    # re-queue the URL to wait for the rest (nothing is claimed yet)
+    not_before = params.get("not_before")
+    if scheduler and scheduler.is_far(not_before):
+        with span("politeness_wait"):
+            await scheduler.wait_for_turn(not_before)
+        extend_payload(
+            {
+                "api": "crawl",
+                "parameters": {
+                    **child_params,
+                    "url": url,
+                    "depth": depth,
+                    "not_before": not_before,
+                },
+            }
+        )
+        return {"success": True, "url": url, "skipped": True, "reason": RESCHEDULED}
+
+    # Claim the URL, a page of its section's share (with section_budget) and a
+    # unit of page budget, in a single claim round. Claims are best-effort
+    # under maxConcurrentRequests > 1: of N payloads racing, one wins unless
+    # a store write is delayed past the settle window (see utils/claims.py).
+    claim_token = params.get("claim_token") or new_claim_token()
+    visited_key = crawl_key(key_prefix, "visited", normalized_url)
+    pages = page_slots(key_prefix, max_pages)
+    with span("claim"):
+        # A full section is retried with fresh stats (its cached share may be
+        # stale) before the page is deferred
+        for fresh in (False, True):
+            ranges = [pages]
+            if budget:
+                ranges.insert(0, await budget.slots(normalized_url, fresh))
+            claimed, full = await claim_page(
+                visited_key,
+                claim_token,
+                ranges,
+                legacy_key=legacy_crawl_key(key_prefix, "visited", normalized_url),
+            )
+            if not (budget and full == 0):
+                break
+    # A full page budget is reported below, even if the URL was not claimed
+    if not claimed and full is None:
         return {
             "success": True,
             "url": url,
@@ -82,9 +340,35 @@ async def automation(
             "reason": "already visited",
         }
 
-    # Page limit check
-    page_count = await persistent_store.get(f"{key_prefix}__page_count__") or 0
-    if page_count >= max_pages:
+    # A section over its share defers the page while other sections are still
+    # crawling: it is re-queued with its claim, to run again once finished
+    # sections may have freed budget
+    if budget and full == 0:
+        deferrals = params.get("deferrals", 0)
+        deferred = deferrals < budget.max_deferrals and await budget.may_grow(
+            normalized_url
+        )
+        if deferred:
+            extend_payload(
+                {
+                    "api": "crawl",
+                    "parameters": {
+                        **child_params,
+                        "url": url,
+                        "depth": depth,
+                        "claim_token": claim_token,
+                        "deferrals": deferrals + 1,
+                    },
+                }
+            )
+        return {
+            "success": True,
+            "url": url,
+            "skipped": True,
+            "reason": DEFERRED if deferred else "section budget reached",
+            "section": await budget.resolve(normalized_url),
+        }
+    if full is not None:
         return {
             "success": True,
             "url": url,
@@ -92,53 +376,146 @@ async def automation(
             "reason": "max_pages limit reached",
         }
 
-    # Mark as visited and increment counter
-    await persistent_store.set(visited_key, True)
-    await persistent_store.set(f"{key_prefix}__page_count__", page_count + 1)
+    await frontier.mark_seen([normalized_url])
+
+    # Seed the frontier from the site's sitemaps (seed payload only)
+    links_seeded = 0
+    if sitemap is not None and depth == 0 and next_depth <= max_depth:
+        with span("sitemap"):
+            links_seeded = await seed_from_sitemaps(
+                page,
+                sitemap,
+                origin=get_origin(url),
+                max_urls=sitemap.get("max_urls", max_pages),
+                resolve=lambda locs: resolve_links(
+                    locs, url, base_domain, include_external, canonicalize
+                ),
+                frontier=frontier,
+                scheduler=scheduler,
+                child_params=child_params,
+                budget=budget,
+            )
+        print(f"[crawl] Queued {links_seeded} links from sitemaps")
 
-    # Navigate
+    # Wait for this host's rate-limit slot
+    if scheduler:
+        with span("politeness_wait"):
+            await scheduler.wait_for_turn(not_before)
+
+    # Incremental mode: a page unchanged since the last run returns its previous
+    # extraction and re-queues its stored links without being extracted again
+    site_index = SiteIndex(index_name or base_domain) if incremental else None
+    record = await site_index.get(normalized_url) if site_index else None
+    not_modified = False
+    if record:
+        with span("navigation"):
+            not_modified = await is_not_modified(page, url, record)
+    if not_modified:
+        print(f"[crawl] Not modified since last run: {url}")
+        links_queued = 0
+        if next_depth <= max_depth:
+            links_queued = await queue_links(
+                record.get("links", []),
+                next_depth,
+                frontier,
+                scheduler,
+                child_params,
+                budget,
+            )
+        return unchanged_result(url, depth, record, links_queued + links_seeded)
+
+    # Navigate (without images, fonts and trackers if `block_resources` is set)
+    await block_resources(page, blocking)
     print(f"[crawl] Depth {depth}/{max_depth}: {url}")
-    await go_to_url(page, url)
+    with span("navigation"):
+        response = await go_to_url_with_response(page, url)
+
+    page_text = None
+    if skip_near_duplicates or site_index:
+        page_text = await page.inner_text("body")
+
+    digest = None
+    if site_index:
+        digest = content_digest(page_text)
+        if record and record.get("digest") == digest:
+            print(f"[crawl] Content unchanged since last run: {url}")
+            record = await build_record(
+                response, digest, record.get("content"), record.get("links", [])
+            )
+            await site_index.set(normalized_url, record)
+            links_queued = 0
+            if next_depth <= max_depth:
+                links_queued = await queue_links(
+                    record["links"],
+                    next_depth,
+                    frontier,
+                    scheduler,
+                    child_params,
+                    budget,
+                )
+            return unchanged_result(url, depth, record, links_queued + links_seeded)
+
+    # Near-duplicate pages (session IDs, sort orders, print views) are neither
+    # extracted nor expanded
+    if skip_near_duplicates:
+        fingerprint = simhash(page_text)
+        duplicates = NearDuplicateIndex(key_prefix, near_duplicate_distance)
+        duplicate_of = fingerprint and await duplicates.find_or_add(
+            normalized_url, fingerprint
+        )
+        if duplicate_of:
+            print(f"[crawl] {url} is a near duplicate of {duplicate_of}")
+            return {
+                "success": True,
+                "url": url,
+                "skipped": True,
+                "reason": "near duplicate",
+                "duplicate_of": duplicate_of,
+            }
 
     # Extract page content
-    content = await extract_page_content(page, schema=schema)
+    with span("extraction"):
+        content = await extract_page_content(
+            page,
+            schema=schema,
+            output=(
+                MarkdownOutput(key_prefix, markdown_output) if markdown_output else None
+            ),
+        )
 
     # Find all internal links
-    links = await extract_links(page, base_domain, include_external=include_external)
+    with span("links"):
+        links = await extract_links(
+            page,
+            base_domain,
+            include_external=include_external,
+            normalize=canonicalize,
+        )
     print(f"[crawl] Found {len(links)} links on {url}")
+    count("links_found", len(links))
     attachments = []
+    attachment_stats = []
 
     # Queue new links for crawling (if under depth limit)
     links_queued = 0
-    next_depth = depth + 1
+    page_links = [link for link in links if not is_file_url(link)]
 
     if next_depth <= max_depth:
-        for link in links:
-            if not is_file_url(link):
-                # Only queue if not already visited
-                link_key = sanitize_key(f"{key_prefix}_visited_{link}")
-                if not await persistent_store.get(link_key):
-                    extend_payload(
-                        {
-                            "api": "crawl",
-                            "parameters": {
-                                "url": link,
-                                "depth": next_depth,
-                                "include_external": include_external,
-                                "schema": schema,
-                            },
-                        }
-                    )
-                    links_queued += 1
-            elif include_attachments:
-                try:
-                    uploaded = await save_file_to_s3(
-                        page=page,
-                        trigger=link,
-                    )
-                    attachments.append(uploaded)
-                except Exception as e:
-                    print(f"[crawl] Failed to download {link}: {e}")
+        links_queued = await queue_links(
+            page_links, next_depth, frontier, scheduler, child_params, budget
+        )
+
+        if include_attachments:
+            file_links = [link for link in links if is_file_url(link)]
+            pipeline = AttachmentPipeline(page, key_prefix)
+            with span("attachments"):
+                attachments, attachment_stats = await pipeline.save_all(file_links)
+            count("attachments", len(attachments))
+
+    if site_index:
+        await site_index.set(
+            normalized_url, await build_record(response, digest, content, page_links)
+        )
 
     return {
         "success": True,
@@ -146,6 +523,143 @@ async def automation(
         "depth": depth,
         "content": content,
         "links_found": len(links),
-        "links_queued": links_queued,
+        "links_queued": links_queued + links_seeded,
         "attachments": attachments,
+        "attachment_stats": attachment_stats,
+    }
+
+
+async def queue_links(
+    links: list[str],
+    depth: int,
+    frontier: Frontier,
+    scheduler: PolitenessScheduler | None,
+    child_params: dict,
+    budget: SectionBudget | None = None,
+) -> int:
+    """Queue a crawl payload for each link no other payload has queued or visited."""
+    with span("enqueue"):
+        return await _queue_links(
+            links, depth, frontier, scheduler, child_params, budget
+        )
+
+
+async def _queue_links(
+    links: list[str],
+    depth: int,
+    frontier: Frontier,
+    scheduler: PolitenessScheduler | None,
+    child_params: dict,
+    budget: SectionBudget | None = None,
+) -> int:
+    new_links = await frontier.claim_new(links)
+    not_before: dict[str, float] = {}
+    if scheduler:
+        new_links = await scheduler.filter_allowed(new_links)
+        not_before = await scheduler.schedule(new_links)
+    if budget:
+        await budget.add_queued(new_links)
+
+    batch_size = child_params.get("batch_size", 1)
+    if new_links and batch_size > 1:
+        batches = [
+            new_links[i : i + batch_size] for i in range(0, len(new_links), batch_size)
+        ]
+        extend_payload(
+            *(
+                {
+                    "api": "crawl",
+                    "parameters": {
+                        **child_params,
+                        "urls": batch,
+                        "depth": depth,
+                        "url_not_before": {
+                            link: not_before[link]
+                            for link in batch
+                            if link in not_before
+                        },
+                    },
+                }
+                for batch in batches
+            )
+        )
+    elif new_links:
+        extend_payload(
+            *(
+                {
+                    "api": "crawl",
+                    "parameters": {
+                        **child_params,
+                        "url": link,
+                        "depth": depth,
+                        "not_before": not_before.get(link),
+                    },
+                }
+                for link in new_links
+            )
+        )
+    count("links_queued", len(new_links))
+    return len(new_links)
+
+
+async def seed_from_sitemaps(
+    page: Page,
+    sitemap: SitemapParams,
+    origin: str,
+    max_urls: int,
+    resolve: Callable[[list[str]], list[str]],
+    frontier: Frontier,
+    scheduler: PolitenessScheduler | None,
+    child_params: dict,
+    budget: SectionBudget | None = None,
+) -> int:
+    """
+    Queue the URLs listed in the site's sitemaps at depth 1, in chunks.
+
+    Sitemaps default to those listed in `origin`'s robots.txt. `resolve` filters
+    and canonicalizes a chunk of sitemap URLs the same way page links are.
+    Returns the number of URLs queued.
+    """
+    sitemap_urls = sitemap.get("urls") or await discover_sitemaps(page, origin)
+    seeded = 0
+    chunk: list[str] = []
+
+    async def flush() -> None:
+        nonlocal seeded
+        links = [link for link in resolve(chunk) if not is_file_url(link)]
+        seeded += await queue_links(
+            links[: max_urls - seeded], 1, frontier, scheduler, child_params, budget
+        )
+        chunk.clear()
+
+    # aclosing: stopping early closes the sitemap download in flight
+    async with aclosing(
+        iter_sitemap_urls(page, sitemap_urls, sitemap.get("max_sitemaps", 100))
+    ) as locs:
+        async for loc in locs:
+            chunk.append(loc)
+            if len(chunk) >= SEED_CHUNK_SIZE:
+                await flush()
+                if seeded >= max_urls:
+                    return seeded
+
+    if chunk:
+        await flush()
+    return seeded
+
+
+def unchanged_result(
+    url: str, depth: int, record: PageRecord, links_queued: int
+) -> dict:
+    """Result for a page that has not changed since the previous job run."""
+    return {
+        "success": True,
+        "url": url,
+        "depth": depth,
+        "content": record.get("content"),
+        "unchanged": True,
+        "last_crawled_at": record.get("crawled_at"),
+        "links_found": len(record.get("links", [])),
+        "links_queued": links_queued,
+        "attachments": [],
     }
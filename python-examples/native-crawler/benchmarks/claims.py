@@ -0,0 +1,194 @@
+"""
+Concurrent-payload harness for `utils/claims.py`: many simulated payloads
+claim overlapping URLs and page slots against an in-memory store.
+
+Run from the project root:
+
+    uv run python -m benchmarks.claims --payloads 500 --urls 100 --concurrency 20
+    uv run python -m benchmarks.claims --store-latency-ms 20 --jitter-ms 300
+
+Reports pages admitted, duplicate URL claims, page slots held past
+`max_pages` and claim latency, and exits with an error unless exactly
+min(distinct URLs, max_pages) URLs were admitted. Claims are best-effort: a
+`--jitter-ms` beyond the settle window (CLAIM_SETTLE_SECONDS) is expected to
+produce duplicates, so the check is skipped then.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from intuned_runtime import persistent_store
+from utils.claims import (
+    CLAIM_SETTLE_SECONDS,
+    claim_page,
+    new_claim_token,
+    page_slots,
+    settle_seconds,
+)
+
+
+class JitteryStore:
+    """
+    In-memory `persistent_store` whose calls take `latency_ms` plus up to
+    `jitter_ms` more, counting operations.
+    """
+
+    def __init__(self, latency_ms: float, jitter_ms: float = 0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.rng = random.Random(seed)
+        self.data: dict[str, Any] = {}
+        self.gets = 0
+        self.sets = 0
+
+    async def _delay(self) -> None:
+        await asyncio.sleep(self.latency + self.rng.random() * self.jitter)
+
+    async def get(self, key: str) -> Any:
+        self.gets += 1
+        await self._delay()
+        return self.data.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self.sets += 1
+        await self._delay()
+        self.data[key] = value
+
+
+@contextmanager
+def use_store(store: JitteryStore) -> Iterator[JitteryStore]:
+    """Route `intuned_runtime.persistent_store` calls to `store` inside the block."""
+    original = persistent_store.__dict__.copy()
+    persistent_store.get = store.get
+    persistent_store.set = store.set
+    try:
+        yield store
+    finally:
+        persistent_store.__dict__.clear()
+        persistent_store.__dict__.update(original)
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+async def simulate(
+    payloads: int,
+    urls: int,
+    max_pages: int,
+    concurrency: int,
+    store: JitteryStore,
+    seed: int = 0,
+) -> dict:
+    """
+    Run `payloads` payloads, `concurrency` at a time (maxConcurrentRequests),
+    each claiming a random one of `urls` URLs and a page slot like
+    `api/crawl.py` does.
+    """
+    rng = random.Random(seed)
+    key_prefix = "claims-harness"
+    targets = [f"{key_prefix}_visited_{rng.randrange(urls)}" for _ in range(payloads)]
+    admitted: list[str] = []
+    latencies: list[float] = []
+    running = asyncio.Semaphore(concurrency)
+
+    async def payload(visited_key: str) -> None:
+        async with running:
+            started = time.perf_counter()
+            claimed, full = await claim_page(
+                visited_key, new_claim_token(), [page_slots(key_prefix, max_pages)]
+            )
+            latencies.append(time.perf_counter() - started)
+        if claimed and full is None:
+            admitted.append(visited_key)
+
+    started = time.perf_counter()
+    with use_store(store):
+        await asyncio.gather(*(payload(key) for key in targets))
+    seconds = time.perf_counter() - started
+
+    per_url = Counter(admitted)
+    distinct = len(set(targets))
+    slots_held = sum(
+        1
+        for key, value in store.data.items()
+        if key.startswith(f"{key_prefix}__page_slot_") and value
+    )
+    return {
+        "payloads": payloads,
+        "concurrency": concurrency,
+        "distinct_urls_requested": distinct,
+        "pages_admitted": len(per_url),
+        "expected_admitted": min(distinct, max_pages),
+        "duplicate_claims": sum(n - 1 for n in per_url.values()),
+        "max_pages": max_pages,
+        "over_budget": max(0, len(admitted) - max_pages),
+        "page_slots_held": slots_held,
+        "settle_seconds": round(settle_seconds(), 3),
+        "claim_p50_seconds": round(percentile(latencies, 50), 3),
+        "claim_p99_seconds": round(percentile(latencies, 99), 3),
+        "seconds": round(seconds, 3),
+        "store_gets": store.gets,
+        "store_sets": store.sets,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--payloads", type=int, default=500)
+    parser.add_argument("--urls", type=int, default=100, help="Distinct URLs")
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument(
+        "--concurrency", type=int, default=20, help="Payloads run at a time"
+    )
+    parser.add_argument(
+        "--store-latency-ms", type=float, default=5, help="Added per store call"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0, help="Random extra per store call"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = JitteryStore(args.store_latency_ms, args.jitter_ms, args.seed)
+    report = asyncio.run(
+        simulate(
+            args.payloads,
+            args.urls,
+            args.max_pages,
+            args.concurrency,
+            store,
+            args.seed,
+        )
+    )
+    print(json.dumps(report, indent=2))
+
+    if args.jitter_ms / 1000 < CLAIM_SETTLE_SECONDS:
+        problems = [
+            f"{name}: {report[name]}"
+            for name in ("duplicate_claims", "over_budget")
+            if report[name]
+        ]
+        if report["pages_admitted"] != report["expected_admitted"]:
+            problems.append(
+                f"pages_admitted: {report['pages_admitted']}, "
+                f"expected {report['expected_admitted']}"
+            )
+        if problems:
+            sys.exit("[claims] " + "; ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Link extraction benchmark for `utils/links.py`: times resolving the hrefs of a
+generated page with the previous per-href `intuned_browser.resolve_url` loop
+and with `resolve_links`.
+
+Run from the project root:
+
+    uv run python -m benchmarks.links --anchors 5000 --repeat 20
+
+Both run on the same hrefs (no browser is needed: `extract_links` only adds
+one `eval_on_selector_all` call to either), and the benchmark exits with an
+error if they return different links.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from intuned_browser import resolve_url
+from utils.links import get_base_domain, normalize_url, resolve_links
+
+BASE_URL = "https://shop.example.com/catalog/shoes/?page=3"
+
+
+def page_hrefs(anchors: int, seed: int = 0) -> list[str | None]:
+    """
+    The `href` attributes of a generated page: navigation repeated on every
+    page, relative and absolute product links, external and skipped links.
+    """
+    rng = random.Random(seed)
+    nav = [f"/{section}/" for section in ("men", "women", "kids", "sale", "help")]
+    kinds = [
+        lambda i: rng.choice(nav),
+        lambda i: f"../boots/item-{i}?color=red&utm_source=nav",
+        lambda i: f"item {i}.html#reviews",
+        lambda i: f"https://shop.example.com/catalog/item-{i}",
+        lambda i: f"https://partner{i % 20}.example.org/offer/{i}",
+        lambda i: rng.choice(["#top", "javascript:void(0)", "mailto:a@b.c", None]),
+    ]
+    return [rng.choice(kinds)(i) for i in range(anchors)]
+
+
+async def per_href_links(
+    hrefs: list[str | None], base_url: str, base_domain: str
+) -> list[str]:
+    """The link loop `extract_links` ran before `resolve_links`."""
+    links = []
+    for href in hrefs:
+        if not href:
+            continue
+
+        if href.startswith(("javascript:", "mailto:", "tel:", "#")):
+            continue
+
+        try:
+            full_url = await resolve_url(url=href, base_url=base_url)
+        except Exception:
+            print(f"Failed to resolve URL: {href}")
+            continue
+
+        link_domain = get_base_domain(full_url)
+        if link_domain == base_domain:
+            links.append(normalize_url(full_url))
+
+    return list(set(links))
+
+
+async def benchmark(anchors: int, repeat: int, seed: int = 0) -> dict:
+    hrefs = page_hrefs(anchors, seed)
+    base_domain = get_base_domain(BASE_URL)
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        before = await per_href_links(hrefs, BASE_URL, base_domain)
+    per_href_seconds = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        after = resolve_links(hrefs, BASE_URL, base_domain)
+    batched_seconds = (time.perf_counter() - started) / repeat
+
+    return {
+        "anchors": anchors,
+        "distinct_hrefs": len(set(hrefs)),
+        "links": len(after),
+        "same_links": sorted(before) == sorted(after),
+        "per_href_ms": round(per_href_seconds * 1000, 2),
+        "resolve_links_ms": round(batched_seconds * 1000, 2),
+        "speedup": round(per_href_seconds / batched_seconds, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--anchors", type=int, default=5000, help="Links on the page")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs of each")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = asyncio.run(benchmark(args.anchors, args.repeat, args.seed))
+    print(json.dumps(report, indent=2))
+    if not report["same_links"]:
+        sys.exit("[links] resolve_links and the per-href loop returned different links")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Politeness harness for `utils/politeness.py`: schedules and fetches pages of
+the synthetic site (`benchmarks/site.py`) through `PolitenessScheduler`,
+against a robots.txt with Disallow rules and a Crawl-delay.
+
+Run from the project root:
+
+    uv run python -m benchmarks.politeness --urls 8 --crawl-delay 1
+    uv run python -m benchmarks.politeness --max-wait-seconds 2
+
+Reports the URLs robots.txt filtered out, the host interval and the gaps
+between fetches, and exits with an error if a disallowed URL was kept, an
+allowed one dropped, two fetches came closer than the host interval or a
+fetch started before its `not_before`. Far slots (`is_far`) are re-queued with
+the same `not_before`, as `api/crawl.py` does. No browser is needed: robots.txt
+is fetched with a Playwright API request context standing in for `page.request`.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from types import SimpleNamespace
+
+from playwright.async_api import async_playwright
+from utils.local_job import MemoryStore, use_store
+from utils.politeness import PolitenessScheduler
+
+from .site import SiteParams, SyntheticSite, serve
+
+# Fetches may start this much early (timer and clock resolution)
+TOLERANCE_SECONDS = 0.05
+
+
+async def check(
+    site_params: SiteParams,
+    urls: int,
+    requests_per_second: float,
+    max_wait_seconds: float,
+) -> dict:
+    site = SyntheticSite(site_params)
+    paths = [site.path(i) for i in range(min(urls, site.pages))]
+    disallowed_paths = {
+        path
+        for path in paths
+        if any(path.startswith(prefix) for prefix in site.disallow)
+    }
+    store = MemoryStore()
+
+    with serve(site) as origin, use_store(store):
+        async with async_playwright() as playwright:
+            request = await playwright.request.new_context()
+            scheduler = PolitenessScheduler(
+                SimpleNamespace(request=request),
+                "politeness-harness",
+                {
+                    "requests_per_second": requests_per_second,
+                    "max_wait_seconds": max_wait_seconds,
+                },
+            )
+            candidates = [f"{origin}{path}" for path in paths]
+            allowed = await scheduler.filter_allowed(candidates)
+            interval = await scheduler.host_interval(origin)
+            not_before = await scheduler.schedule(allowed)
+
+            fetches: dict[str, float] = {}
+            requeued = 0
+
+            async def payload(url: str) -> None:
+                nonlocal requeued
+                # A payload whose slot is far waits max_wait_seconds, then is
+                # re-queued (here: runs again) with the same not_before
+                while scheduler.is_far(not_before[url]):
+                    requeued += 1
+                    await scheduler.wait_for_turn(not_before[url])
+                await scheduler.wait_for_turn(not_before[url])
+                fetches[url] = time.time()
+                await request.get(url)
+
+            await asyncio.gather(*(payload(url) for url in allowed))
+            await request.dispose()
+
+    kept = {url.removeprefix(origin) for url in allowed}
+    starts = sorted(fetches.values())
+    gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    return {
+        "urls": len(paths),
+        "disallowed": sorted(disallowed_paths),
+        "wrongly_kept": sorted(kept & disallowed_paths),
+        "wrongly_dropped": sorted(set(paths) - disallowed_paths - kept),
+        "host_interval_seconds": interval,
+        "min_gap_seconds": round(min(gaps, default=interval), 3),
+        "max_gap_seconds": round(max(gaps, default=interval), 3),
+        "early_fetches": sum(
+            1
+            for url, started in fetches.items()
+            if started < not_before[url] - TOLERANCE_SECONDS
+        ),
+        "requeued": requeued,
+        "seconds": round(starts[-1] - starts[0], 3) if starts else 0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--urls", type=int, default=8, help="Site pages scheduled")
+    parser.add_argument(
+        "--disallow",
+        nargs="*",
+        default=["/section-1/", "/section-3/page-3"],
+        help="Path prefixes disallowed by robots.txt",
+    )
+    parser.add_argument(
+        "--crawl-delay", type=int, default=1, help="robots.txt Crawl-delay (seconds)"
+    )
+    parser.add_argument("--requests-per-second", type=float, default=4)
+    parser.add_argument("--max-wait-seconds", type=float, default=60)
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        check(
+            {"disallow": args.disallow, "crawl_delay": args.crawl_delay},
+            args.urls,
+            args.requests_per_second,
+            args.max_wait_seconds,
+        )
+    )
+    print(json.dumps(report, indent=2))
+
+    problems = [
+        f"{name}: {report[name]}"
+        for name in ("wrongly_kept", "wrongly_dropped", "early_fetches")
+        if report[name]
+    ]
+    expected = max(1 / args.requests_per_second, args.crawl_delay)
+    if report["host_interval_seconds"] != expected:
+        problems.append(
+            f"host_interval_seconds: {report['host_interval_seconds']}, "
+            f"expected {expected}"
+        )
+    if report["min_gap_seconds"] < expected - TOLERANCE_SECONDS:
+        problems.append(f"min_gap_seconds: {report['min_gap_seconds']} < {expected}")
+    if problems:
+        sys.exit("[politeness] " + "; ".join(problems))
+
+
+if __name__ == "__main__":
+    main()
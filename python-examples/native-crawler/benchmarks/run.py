@@ -0,0 +1,155 @@
+"""
+Offline crawl benchmark: crawl a synthetic local site with `api/crawl.py`.
+
+Run from the project root:
+
+    uv run python -m benchmarks.run --pages 500 --concurrency 8
+    uv run python -m benchmarks.run --params '{"sitemap": {}, "batch_size": 10}'
+"""
+
+import argparse
+import asyncio
+import json
+from collections import Counter
+from typing import Any
+
+from playwright.async_api import async_playwright
+from utils.local_job import MemoryStore, PayloadRun, run_job, use_store
+from utils.telemetry import merge_summaries
+
+from .site import SiteParams, SyntheticSite, serve
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def page_results(runs: list[PayloadRun]) -> list[dict]:
+    """Per-URL crawl results, unpacking batch payloads."""
+    results = []
+    for run in runs:
+        result = run["result"] or {"success": False, "error": run["error"]}
+        results.extend(result.get("results", [result]))
+    return results
+
+
+def summarize(runs: list[PayloadRun], store: MemoryStore, seconds: float) -> dict:
+    results = page_results(runs)
+    crawled = [r for r in results if r.get("success") and not r.get("skipped")]
+    pages = max(1, len(crawled))
+    latencies = [r["telemetry"]["total_seconds"] for r in crawled if "telemetry" in r]
+    stages = merge_summaries(r["telemetry"] for r in results if "telemetry" in r)
+    return {
+        "payloads": len(runs),
+        "pages_crawled": len(crawled),
+        "skipped": dict(Counter(r["reason"] for r in results if r.get("skipped"))),
+        "errors": sum(1 for r in results if not r.get("success")),
+        "seconds": round(seconds, 3),
+        "pages_per_second": round(len(crawled) / seconds, 2) if seconds else 0.0,
+        "store_gets_per_page": round(store.gets / pages, 2),
+        "store_sets_per_page": round(store.sets / pages, 2),
+        "latency_p50_seconds": round(percentile(latencies, 50), 4),
+        "latency_p99_seconds": round(percentile(latencies, 99), 4),
+        "stage_seconds": {
+            stage: round(stats["seconds"], 3)
+            for stage, stats in sorted(
+                stages["stages"].items(), key=lambda item: -item[1]["seconds"]
+            )
+        },
+    }
+
+
+async def benchmark(
+    site_params: SiteParams,
+    crawl_params: dict[str, Any],
+    concurrency: int,
+    store_latency_ms: float,
+    runs: int,
+) -> list[dict]:
+    site = SyntheticSite(site_params)
+    store = MemoryStore(store_latency_ms)
+    reports = []
+    with serve(site) as origin, use_store(store):
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True)
+            pages = [
+                await (await browser.new_context()).new_page()
+                for _ in range(concurrency)
+            ]
+            params = {
+                "url": f"{origin}/",
+                "max_depth": 10,
+                "max_pages": site.pages,
+                **crawl_params,
+                "telemetry": True,
+            }
+            # Later runs share the store, e.g. to measure `incremental` recrawls
+            for run in range(runs):
+                store.gets = store.sets = 0
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                payload_runs = await run_job(
+                    [{"api": "crawl", "parameters": params}],
+                    pages,
+                    job_run_id=f"bench-run-{run}",
+                )
+                reports.append(summarize(payload_runs, store, loop.time() - started))
+            await browser.close()
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--fan-out", type=int, default=10)
+    parser.add_argument("--sections", type=int, default=5)
+    parser.add_argument("--duplicate-rate", type=float, default=0.1)
+    parser.add_argument("--near-duplicate-rate", type=float, default=0.05)
+    parser.add_argument("--no-sitemap", action="store_true")
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="Payloads run at a time"
+    )
+    parser.add_argument(
+        "--store-latency-ms", type=float, default=0, help="Added per store call"
+    )
+    parser.add_argument(
+        "--runs", type=int, default=1, help="Job runs sharing one store"
+    )
+    parser.add_argument(
+        "--params", type=json.loads, default={}, help="Extra crawl params (JSON)"
+    )
+    args = parser.parse_args()
+
+    site_params: SiteParams = {
+        "pages": args.pages,
+        "fan_out": args.fan_out,
+        "sections": args.sections,
+        "duplicate_rate": args.duplicate_rate,
+        "near_duplicate_rate": args.near_duplicate_rate,
+        "sitemap": not args.no_sitemap,
+        "slow_rate": args.slow_rate,
+        "slow_ms": args.slow_ms,
+        "seed": args.seed,
+    }
+    reports = asyncio.run(
+        benchmark(
+            site_params,
+            args.params,
+            args.concurrency,
+            args.store_latency_ms,
+            args.runs,
+        )
+    )
+    for report in reports:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import hashlib
+import random
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TypedDict
+
+WORDS = (
+    "crawl index page link store queue depth budget host robots sitemap "
+    "content markdown extract browser payload job worker latency cache "
+    "section article product review price stock order cart account help"
+).split()
+
+
+class SiteParams(TypedDict, total=False):
+    pages: int  # Distinct pages (default: 200)
+    fan_out: int  # Links per page (default: 10)
+    sections: int  # Top-level path sections (default: 5)
+    duplicate_rate: float  # Share of links to a URL variant (default: 0.1)
+    near_duplicate_rate: float  # Share of pages copying a page's text (default: 0.05)
+    sitemap: bool  # Serve a sitemap of every page, listed in robots.txt (default: True)
+    disallow: list[str]  # Path prefixes disallowed by robots.txt (default: none)
+    crawl_delay: int  # Crawl-delay of robots.txt, in seconds (default: unset)
+    slow_rate: float  # Share of pages answering after `slow_ms` (default: 0.05)
+    slow_ms: int  # Delay of slow pages (default: 500)
+    words: int  # Words of text per page (default: 300)
+    seed: int  # Random seed, same seed = same site (default: 0)
+
+
+class SyntheticSite:
+    """
+    Deterministic synthetic website for crawl benchmarks.
+
+    Page 0 is `/`, page i is `/section-{i % sections}/page-{i}`. Every page
+    links to its children in a tree (so all pages are reachable) plus random
+    pages, some through URL variants: `utm_*` variants (removed by the
+    default URL rules) and `?view=print` variants (same content under a
+    different URL, caught by near-duplicate detection). Pages send an ETag and
+    answer `304` to a matching `If-None-Match`.
+    """
+
+    def __init__(self, params: SiteParams | None = None):
+        params = params or {}
+        self.pages = max(1, params.get("pages", 200))
+        self.fan_out = params.get("fan_out", 10)
+        self.sections = max(1, params.get("sections", 5))
+        self.duplicate_rate = params.get("duplicate_rate", 0.1)
+        self.sitemap = params.get("sitemap", True)
+        self.disallow = params.get("disallow", [])
+        self.crawl_delay = params.get("crawl_delay")
+        self.slow_ms = params.get("slow_ms", 500)
+        rng = random.Random(params.get("seed", 0))
+
+        word_count = params.get("words", 300)
+        self.texts = [
+            " ".join(rng.choice(WORDS) for _ in range(word_count))
+            for _ in range(self.pages)
+        ]
+        near_duplicate_rate = params.get("near_duplicate_rate", 0.05)
+        for i in range(1, self.pages):
+            if rng.random() < near_duplicate_rate:
+                self.texts[i] = self.texts[rng.randrange(i)]
+
+        slow_rate = params.get("slow_rate", 0.05)
+        self.slow = {i for i in range(1, self.pages) if rng.random() < slow_rate}
+
+        tree_fan_out = max(1, self.fan_out // 2)
+        self.links: list[list[str]] = []
+        for i in range(self.pages):
+            children = range(i * tree_fan_out + 1, (i + 1) * tree_fan_out + 1)
+            targets = [child for child in children if child < self.pages]
+            while len(targets) < self.fan_out:
+                targets.append(rng.randrange(self.pages))
+            self.links.append([self._href(target, rng) for target in targets])
+
+    def path(self, index: int) -> str:
+        if index == 0:
+            return "/"
+        return f"/section-{index % self.sections}/page-{index}"
+
+    def _href(self, index: int, rng: random.Random) -> str:
+        path = self.path(index)
+        if rng.random() >= self.duplicate_rate:
+            return path
+        if rng.random() < 0.5:
+            return f"{path}?utm_source=bench&utm_campaign={rng.randrange(1000)}"
+        return f"{path}?view=print"
+
+    def index_of(self, path: str) -> int | None:
+        if path == "/":
+            return 0
+        try:
+            section, page = path.strip("/").split("/")
+            index = int(page.removeprefix("page-"))
+        except ValueError:
+            return None
+        if 0 < index < self.pages and section == f"section-{index % self.sections}":
+            return index
+        return None
+
+    def etag(self, index: int) -> str:
+        digest = hashlib.blake2b(self.texts[index].encode(), digest_size=8)
+        return f'"{digest.hexdigest()}"'
+
+    def html(self, index: int) -> str:
+        links = "".join(
+            f'<li><a href="{href}">Link {n}</a></li>'
+            for n, href in enumerate(self.links[index])
+        )
+        return (
+            f"<!doctype html><html><head><title>Page {index}</title></head><body>"
+            f'<nav><a href="/">Home</a></nav><h1>Page {index}</h1>'
+            f"<main><p>{self.texts[index]}</p></main><ul>{links}</ul></body></html>"
+        )
+
+    def robots_txt(self, origin: str) -> str:
+        rules = "".join(f"Disallow: {path}\n" for path in self.disallow)
+        if self.crawl_delay is not None:
+            rules += f"Crawl-delay: {self.crawl_delay}\n"
+        sitemap = f"Sitemap: {origin}/sitemap.xml\n" if self.sitemap else ""
+        return f"User-agent: *\n{rules}Allow: /\n{sitemap}"
+
+    def sitemap_xml(self, origin: str) -> str:
+        urls = "".join(
+            f"<url><loc>{origin}{self.path(i)}</loc></url>" for i in range(self.pages)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+        )
+
+
+def _handler(site: SyntheticSite) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            origin = f"http://{self.headers.get('Host')}"
+            path = self.path.split("?", 1)[0]
+            if path == "/robots.txt":
+                return self._send(200, "text/plain", site.robots_txt(origin))
+            if path == "/sitemap.xml" and site.sitemap:
+                return self._send(200, "application/xml", site.sitemap_xml(origin))
+
+            index = site.index_of(path)
+            if index is None:
+                return self._send(404, "text/plain", "Not found")
+            if index in site.slow:
+                time.sleep(site.slow_ms / 1000)
+            etag = site.etag(index)
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, None, "", {"ETag": etag})
+            return self._send(200, "text/html", site.html(index), {"ETag": etag})
+
+        def _send(
+            self,
+            status: int,
+            content_type: str | None,
+            body: str,
+            headers: dict[str, str] | None = None,
+        ) -> None:
+            data = body.encode()
+            self.send_response(status)
+            if content_type:
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *_args) -> None:
+            pass
+
+    return Handler
+
+
+@contextmanager
+def serve(site: SyntheticSite) -> Iterator[str]:
+    """Serve `site` on a free local port in a background thread. Yields its origin."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(site))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        host, port = server.server_address[:2]
+        yield f"http://{host}:{port}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,13 +1,69 @@
-from .content import extract_page_content
-from .helpers import get_job_run_id, sanitize_key
-from .links import extract_links, get_base_domain, is_file_url, normalize_url
+from .attachments import AttachmentPipeline, AttachmentReport
+from .budget import SectionBudget, SectionBudgetParams, section_of
+from .canonical import UrlRules, get_canonicalizer
+from .content import (
+    MarkdownOutput,
+    MarkdownOutputParams,
+    MarkdownRef,
+    extract_page_content,
+)
+from .fingerprint import NearDuplicateIndex, simhash
+from .frontier import Frontier
+from .helpers import crawl_key, get_job_run_id, sanitize_key
+from .incremental import (
+    PageRecord,
+    SiteIndex,
+    build_record,
+    content_digest,
+    go_to_url_with_response,
+    is_not_modified,
+)
+from .links import (
+    extract_links,
+    get_base_domain,
+    is_file_url,
+    normalize_url,
+    resolve_links,
+)
+from .politeness import PolitenessParams, PolitenessScheduler, get_origin
+from .resource_blocking import BlockResourcesParams, block_resources
+from .sitemap import SitemapParams, discover_sitemaps, iter_sitemap_urls
 
 __all__ = [
     "extract_links",
     "normalize_url",
+    "get_canonicalizer",
+    "UrlRules",
     "get_base_domain",
     "extract_page_content",
+    "MarkdownOutput",
+    "MarkdownOutputParams",
+    "MarkdownRef",
+    "Frontier",
+    "SectionBudget",
+    "SectionBudgetParams",
+    "section_of",
+    "NearDuplicateIndex",
+    "simhash",
+    "PolitenessScheduler",
+    "PolitenessParams",
     "is_file_url",
+    "AttachmentPipeline",
+    "AttachmentReport",
+    "SiteIndex",
+    "PageRecord",
+    "build_record",
+    "content_digest",
+    "go_to_url_with_response",
+    "is_not_modified",
+    "SitemapParams",
+    "discover_sitemaps",
+    "iter_sitemap_urls",
+    "get_origin",
+    "resolve_links",
+    "BlockResourcesParams",
+    "block_resources",
+    "crawl_key",
     "sanitize_key",
     "get_job_run_id",
 ]
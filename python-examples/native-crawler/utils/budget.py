@@ -0,0 +1,243 @@
+import asyncio
+import math
+import time
+from typing import TypedDict
+from urllib.parse import urlsplit
+
+from .claims import SlotRange, claim_key, page_slots_claimed
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+# Section counters are re-read from the store at most this often per process
+STATS_TTL_SECONDS = 2.0
+
+# Section shared by the pages of every section past `max_sections`
+OVERFLOW_SECTION = "*"
+
+
+class SectionBudgetParams(TypedDict, total=False):
+    path_depth: int  # Path segments naming a section, 1: /docs/... (default: 1)
+    max_sections: int  # Sections with their own share, others share "*" (default: 50)
+    max_deferrals: int  # Times a page over its share is re-queued (default: 2)
+
+
+class SectionStats(TypedDict):
+    used: int  # Pages crawled
+    pending: int  # Pages queued and not done yet
+
+
+def section_of(url: str, path_depth: int = 1) -> str:
+    """
+    The sub-tree `url` belongs to: its host and up to `path_depth` parent path
+    segments, e.g. `example.com/docs` for `https://example.com/docs/intro`.
+    Top-level pages (`/about`) belong to the host's root section.
+    """
+    parts = urlsplit(url)
+    segments = [segment for segment in parts.path.split("/") if segment][:-1]
+    return "/".join([parts.netloc, *segments[:path_depth]])
+
+
+# Per job run: the registry slots read so far, and the last section stats
+# read with their read time, shared by the payloads running in this process
+_registries: dict[str, list[str | None]] = {}
+_stats: dict[str, tuple[float, dict[str, SectionStats]]] = {}
+
+
+class SectionBudget:
+    """
+    Splits a job's `max_pages` across the sub-trees (sections) of a site.
+
+    Every section found gets an equal share of the budget. When a section
+    finishes (all its queued pages are done) below its share, the rest of its
+    share is split across the sections still crawling, so one large sub-tree
+    reached first cannot use up the whole budget.
+
+    State lives in `persistent_store`, scoped to the job run:
+    - sections are registered in numbered slots taken with `claim_key`, all
+      new sections of a call in the same settle round
+    - each section has its own page slots (`slots`), claimed with the page
+      by `claim_page`, so a section never goes over its share (up to the
+      `claim_keys` caveat)
+    - queued / done page counts per section tell which sections finished.
+      They are read-modify-write counters, so concurrent updates can be lost;
+      that only delays or advances a redistribution. `max_pages` itself stays
+      exact through the job's page slots.
+    """
+
+    def __init__(
+        self, key_prefix: str, max_pages: int, params: SectionBudgetParams | bool
+    ):
+        options: SectionBudgetParams = params if isinstance(params, dict) else {}
+        self.key_prefix = key_prefix
+        self.max_pages = max_pages
+        self.path_depth = options.get("path_depth", 1)
+        self.max_sections = options.get("max_sections", 50)
+        self.max_deferrals = options.get("max_deferrals", 2)
+
+    def _key(self, kind: str, section: str) -> str:
+        return crawl_key(self.key_prefix, f"section_{kind}", section)
+
+    async def sections(self) -> list[str]:
+        """Sections registered so far, in registration order."""
+        slots = _registries.setdefault(self.key_prefix, [])
+        count = await persistent_store.get(f"{self.key_prefix}__section_count__") or 0
+        if count > len(slots):
+            slots.extend(
+                await asyncio.gather(
+                    *(
+                        persistent_store.get(f"{self.key_prefix}__section_{i}__")
+                        for i in range(len(slots), count)
+                    )
+                )
+            )
+        return [name for name in dict.fromkeys(slots) if name is not None]
+
+    async def resolve(self, url: str) -> str:
+        """The section `url` counts against, registering it if it is new."""
+        section = section_of(url, self.path_depth)
+        return (await self._register([section]))[section]
+
+    async def _register(self, names: list[str]) -> dict[str, str]:
+        """
+        Register the new sections among `names`.
+
+        Returns:
+            The section each of `names` counts against (past `max_sections`,
+            the shared OVERFLOW_SECTION)
+        """
+        sections = await self.sections()
+        new = [name for name in dict.fromkeys(names) if name not in sections]
+        room = max(0, self.max_sections - len(sections))
+        resolved = {name: name for name in names}
+        resolved.update((name, OVERFLOW_SECTION) for name in new[room:])
+        pending = new[:room]
+        if len(new) > room and OVERFLOW_SECTION not in sections:
+            pending.append(OVERFLOW_SECTION)
+
+        # Take the first free registry slots, one per section, all claimed in
+        # the same settle round. Slots are claimed with the section as token,
+        # so payloads registering the same section share one slot, and a slot
+        # already holding it is won without waiting. Sections that lost their
+        # slot try the next free ones.
+        index = len(_registries[self.key_prefix])
+        last = None
+        while pending:
+            indexes = range(index, index + len(pending))
+            won = await asyncio.gather(
+                *(
+                    claim_key(f"{self.key_prefix}__section_{i}__", section)
+                    for i, section in zip(indexes, pending)
+                )
+            )
+            last = max([i for i, ok in zip(indexes, won) if ok], default=last)
+            pending = [section for section, ok in zip(pending, won) if not ok]
+            index = indexes.stop
+        if last is not None:
+            # Only ever raise the count: a lower one would hide sections
+            # registered concurrently in the slots above it
+            count_key = f"{self.key_prefix}__section_count__"
+            if last + 1 > (await persistent_store.get(count_key) or 0):
+                await persistent_store.set(count_key, last + 1)
+            await self.sections()
+        return resolved
+
+    async def stats(self, fresh: bool = False) -> dict[str, SectionStats]:
+        """
+        Crawled and pending pages per section, cached for STATS_TTL_SECONDS
+        unless new sections were registered since (or `fresh` is set).
+        """
+        sections = await self.sections()
+        cached = _stats.get(self.key_prefix)
+        if (
+            not fresh
+            and cached
+            and time.monotonic() - cached[0] < STATS_TTL_SECONDS
+            and len(cached[1]) == len(sections)
+        ):
+            return cached[1]
+
+        values = await asyncio.gather(
+            *(
+                persistent_store.get(self._key(kind, section))
+                for section in sections
+                for kind in ("used", "queued", "done")
+            )
+        )
+        stats: dict[str, SectionStats] = {}
+        for i, section in enumerate(sections):
+            used, queued, done = (value or 0 for value in values[3 * i : 3 * i + 3])
+            stats[section] = {"used": used, "pending": queued - done}
+        _stats[self.key_prefix] = (time.monotonic(), stats)
+        return stats
+
+    def share(self, section: str, stats: dict[str, SectionStats]) -> int:
+        """
+        Pages `section` may crawl: the budget not used by finished sections,
+        split evenly across the sections still crawling (`section` included).
+        """
+        finished = [
+            name
+            for name, section_stats in stats.items()
+            if name != section and section_stats["pending"] <= 0
+        ]
+        available = self.max_pages - sum(stats[name]["used"] for name in finished)
+        crawling = len(set(stats) | {section}) - len(finished)
+        return math.ceil(max(0, available) / crawling)
+
+    async def slots(self, url: str, fresh: bool = False) -> SlotRange:
+        """
+        The page slots of `url`'s section share, to claim with `claim_page`.
+        The share is computed from cached stats unless `fresh` is set: when
+        the section looks full, retry with fresh stats before giving up.
+        """
+        section = await self.resolve(url)
+        slot_key = self._key("slot", section)
+        return SlotRange(
+            lambda slot: f"{slot_key}_{slot}",
+            self._key("used", section),
+            self.share(section, await self.stats(fresh)),
+        )
+
+    async def may_grow(self, url: str) -> bool:
+        """
+        Whether `url`'s section share can still grow: other sections are still
+        crawling (and may finish below their share) and `max_pages` is not used up.
+        """
+        if await page_slots_claimed(self.key_prefix) >= self.max_pages:
+            return False
+        section = await self.resolve(url)
+        stats = await self.stats(fresh=True)
+        return any(
+            section_stats["pending"] > 0
+            for name, section_stats in stats.items()
+            if name != section
+        )
+
+    async def add_queued(self, urls: list[str]) -> None:
+        """Count `urls` (just queued) as pending in their sections."""
+        counts: dict[str, int] = {}
+        for url in urls:
+            section = section_of(url, self.path_depth)
+            counts[section] = counts.get(section, 0) + 1
+        resolved = await self._register(list(counts))
+        tracked: dict[str, int] = {}
+        for section, n in counts.items():
+            tracked[resolved[section]] = tracked.get(resolved[section], 0) + n
+        await asyncio.gather(
+            *(self._add("queued", section, n) for section, n in tracked.items())
+        )
+
+    async def mark_done(self, url: str) -> None:
+        """
+        Count a queued page as done (crawled, skipped or failed), once per URL:
+        a retried payload does not count its page again.
+        """
+        done_key = self._key("page_done", url)
+        if await persistent_store.get(done_key):
+            return
+        await persistent_store.set(done_key, True)
+        await self._add("done", await self.resolve(url), 1)
+
+    async def _add(self, kind: str, section: str, value: int) -> None:
+        key = self._key(kind, section)
+        await persistent_store.set(key, (await persistent_store.get(key) or 0) + value)
@@ -1,11 +1,138 @@
-from intuned_browser import extract_markdown
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import Literal, TypedDict
+
+from intuned_browser import Attachment, extract_markdown, upload_file_to_s3
 from intuned_browser.ai import extract_structured_data
 from playwright.async_api import Page
 
+from .helpers import crawl_key
+from .telemetry import count, persistent_store, span
+
+# Characters of markdown encoded, hashed or written at a time
+DEFAULT_CHUNK_SIZE = 256 * 1024
+DEFAULT_SPOOL_DIR = "markdown-spool"
+
+
+class MarkdownOutputParams(TypedDict, total=False):
+    storage: Literal["s3", "spool"]  # Where markdown is written (default: "s3")
+    spool_dir: str  # Directory of the local spool (default: "markdown-spool")
+    chunk_size: int  # Characters written per chunk (default: 256 KiB)
+    min_length: int  # Shorter markdown stays inline in the result (default: 0)
+
+
+class MarkdownRef(TypedDict, total=False):
+    storage: str  # "s3" or "spool"
+    digest: str  # blake2b of the UTF-8 markdown, also the cache key
+    bytes: int
+    attachment: dict  # Attachment.to_dict() of the S3 object
+    path: str  # Spool file
+
+
+# Writes in flight by cache key, so identical pages crawled at the same time
+# (e.g. by the tabs of a batch) are written once
+_pending: dict[str, asyncio.Task[MarkdownRef]] = {}
+
+
+class MarkdownOutput:
+    """
+    Writes page markdown outside of the payload result.
+
+    Markdown goes to S3 (`upload_file_to_s3`, one object per distinct page
+    content) or to a local spool directory, where files are named by digest
+    and written in chunks. The result keeps a `MarkdownRef` instead. Pages with
+    the same content share one stored copy: the digest is looked up in
+    `persistent_store` (per job run) and, for the spool, on disk, before
+    anything is encoded or uploaded.
+    """
+
+    def __init__(self, key_prefix: str, params: MarkdownOutputParams | bool):
+        options: MarkdownOutputParams = params if isinstance(params, dict) else {}
+        self.key_prefix = key_prefix
+        self.storage = options.get("storage", "s3")
+        self.spool_dir = Path(options.get("spool_dir", DEFAULT_SPOOL_DIR))
+        self.chunk_size = max(1, options.get("chunk_size", DEFAULT_CHUNK_SIZE))
+        self.min_length = options.get("min_length", 0)
+
+    async def write(self, markdown: str) -> MarkdownRef:
+        digest = _digest(markdown, self.chunk_size)
+        cache_key = crawl_key(self.key_prefix, f"markdown_{self.storage}", digest)
+        task = _pending.get(cache_key)
+        if task is None:
+            task = _pending[cache_key] = asyncio.create_task(
+                self._write(cache_key, digest, markdown)
+            )
+            task.add_done_callback(lambda _: _pending.pop(cache_key, None))
+        else:
+            count("markdown_reused")
+        return await task
+
+    async def _write(self, cache_key: str, digest: str, markdown: str) -> MarkdownRef:
+        saved = await persistent_store.get(cache_key)
+        if saved and (self.storage != "spool" or Path(saved["path"]).exists()):
+            count("markdown_reused")
+            return saved
+
+        if self.storage == "spool":
+            path = self.spool_dir / f"{digest}.md"
+            if path.exists():
+                count("markdown_reused")
+                size = path.stat().st_size
+            else:
+                size = await asyncio.to_thread(
+                    _write_chunks, path, markdown, self.chunk_size
+                )
+            ref: MarkdownRef = {
+                "storage": "spool",
+                "digest": digest,
+                "bytes": size,
+                "path": str(path),
+            }
+        else:
+            body = markdown.encode()
+            attachment: Attachment = await upload_file_to_s3(
+                body,
+                file_name_override=f"{digest}.md",
+                content_type="text/markdown; charset=utf-8",
+            )
+            ref = {
+                "storage": "s3",
+                "digest": digest,
+                "bytes": len(body),
+                "attachment": attachment.to_dict(),
+            }
+
+        await persistent_store.set(cache_key, ref)
+        return ref
+
+
+def _digest(markdown: str, chunk_size: int) -> str:
+    """blake2b of the UTF-8 markdown, encoded a chunk at a time."""
+    digest = hashlib.blake2b(digest_size=16)
+    for start in range(0, len(markdown), chunk_size):
+        digest.update(markdown[start : start + chunk_size].encode())
+    return digest.hexdigest()
+
+
+def _write_chunks(path: Path, markdown: str, chunk_size: int) -> int:
+    """Write `markdown` to `path` in chunks, atomically. Returns its size in bytes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    size = 0
+    with open(temp, "wb") as file:
+        for start in range(0, len(markdown), chunk_size):
+            size += file.write(markdown[start : start + chunk_size].encode())
+    os.replace(temp, path)
+    return size
+
 
 async def extract_page_content(
     page: Page,
     schema: dict | None = None,
+    output: MarkdownOutput | None = None,
 ) -> dict:
     if schema:
         return await extract_structured_data(
@@ -14,9 +141,20 @@ async def extract_page_content(
 
     title = await page.title()
     markdown = await extract_markdown(page)
+    markdown_length = len(markdown) if markdown else 0
+
+    # With `output`, the result references the stored markdown instead
+    if output and markdown and markdown_length >= output.min_length:
+        with span("markdown_output"):
+            ref = await output.write(markdown)
+        return {
+            "title": title,
+            "markdown_ref": ref,
+            "markdown_length": markdown_length,
+        }
 
     return {
         "title": title,
         "markdown": markdown,
-        "markdown_length": len(markdown) if markdown else 0,
+        "markdown_length": markdown_length,
     }
@@ -0,0 +1,90 @@
+import hashlib
+import re
+
+from .frontier import gather_bounded
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+# Pages with fewer words than this are too small to fingerprint reliably
+MIN_WORDS = 20
+
+# Max fingerprints kept per LSH bucket
+MAX_BUCKET_SIZE = 50
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int | None:
+    """
+    64-bit SimHash of `text` over word 3-shingles.
+
+    Near-identical texts get fingerprints with a small Hamming distance.
+
+    Returns:
+        The fingerprint, or None if the text has fewer than MIN_WORDS words
+    """
+    words = _WORD.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        shingle = " ".join(words[i : i + SHINGLE_SIZE]).encode()
+        value = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest())
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+class NearDuplicateIndex:
+    """
+    Job-wide index of page fingerprints in persistent_store.
+
+    Fingerprints are split into `max_distance + 1` bands. Two fingerprints
+    within `max_distance` bits of each other must share at least one band
+    exactly, so a lookup only reads one bucket per band.
+    """
+
+    def __init__(self, key_prefix: str, max_distance: int = 3):
+        self.key_prefix = key_prefix
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+
+    def _bucket_keys(self, fingerprint: int) -> list[str]:
+        mask = (1 << self.band_bits) - 1
+        return [
+            crawl_key(
+                self.key_prefix,
+                "simhash",
+                f"{band}-{fingerprint >> (band * self.band_bits) & mask:x}",
+            )
+            for band in range(self.bands)
+        ]
+
+    async def find_or_add(self, url: str, fingerprint: int) -> str | None:
+        """
+        Look up a near duplicate of `fingerprint`, and index it if there is none.
+
+        Returns:
+            URL of a previously indexed near-duplicate page, or None
+        """
+        keys = self._bucket_keys(fingerprint)
+        buckets = await gather_bounded(persistent_store.get(key) for key in keys)
+
+        for bucket in buckets:
+            for other_fingerprint, other_url in bucket or []:
+                distance = (int(other_fingerprint, 16) ^ fingerprint).bit_count()
+                if other_url != url and distance <= self.max_distance:
+                    return other_url
+
+        entry = [f"{fingerprint:x}", url]
+        await gather_bounded(
+            persistent_store.set(key, [*(bucket or [])[-MAX_BUCKET_SIZE + 1 :], entry])
+            for key, bucket in zip(keys, buckets)
+        )
+        return None
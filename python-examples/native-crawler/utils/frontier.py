@@ -0,0 +1,98 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Iterable
+from typing import Any
+
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+# Max number of "already seen" keys kept in the in-process front cache
+FRONT_CACHE_SIZE = 100_000
+
+# Max number of persistent_store requests in flight for one batch
+STORE_CONCURRENCY = 32
+
+# Keys known to be seen, shared by every payload running in this process.
+# Only positive answers are cached: a key that is not here may still be in the store.
+_front_cache: OrderedDict[str, None] = OrderedDict()
+
+
+def _remember(key: str) -> None:
+    _front_cache[key] = None
+    _front_cache.move_to_end(key)
+    if len(_front_cache) > FRONT_CACHE_SIZE:
+        _front_cache.popitem(last=False)
+
+
+def _is_cached(key: str) -> bool:
+    if key in _front_cache:
+        _front_cache.move_to_end(key)
+        return True
+    return False
+
+
+async def gather_bounded(
+    awaitables: Iterable[Awaitable[Any]],
+    limit: int = STORE_CONCURRENCY,
+) -> list[Any]:
+    """Run awaitables concurrently with at most `limit` in flight, preserving order."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(awaitable: Awaitable[Any]) -> Any:
+        async with semaphore:
+            return await awaitable
+
+    return await asyncio.gather(*(run(a) for a in awaitables))
+
+
+class Frontier:
+    """
+    Batched URL deduplication for the crawl frontier.
+
+    A URL is "seen" once it has been queued or crawled by any payload in the job.
+    Lookups hit the in-process front cache first and only go to persistent_store
+    for the remaining URLs, all of which are fetched concurrently.
+    """
+
+    def __init__(self, key_prefix: str):
+        self.key_prefix = key_prefix
+
+    def seen_key(self, url: str) -> str:
+        return crawl_key(self.key_prefix, "seen", url)
+
+    async def filter_new(self, urls: Iterable[str]) -> list[str]:
+        """Return the URLs (deduplicated, order preserved) not seen yet in this job."""
+        candidates = {}
+        for url in urls:
+            key = self.seen_key(url)
+            if url not in candidates and not _is_cached(key):
+                candidates[url] = key
+
+        if not candidates:
+            return []
+
+        values = await gather_bounded(
+            persistent_store.get(key) for key in candidates.values()
+        )
+
+        new_urls = []
+        for (url, key), value in zip(candidates.items(), values):
+            if value:
+                _remember(key)
+            else:
+                new_urls.append(url)
+        return new_urls
+
+    async def mark_seen(self, urls: Iterable[str]) -> None:
+        """Mark URLs as seen, both in the front cache and in persistent_store."""
+        keys = [self.seen_key(url) for url in urls]
+        for key in keys:
+            _remember(key)
+        await gather_bounded(persistent_store.set(key, True) for key in keys)
+
+    async def claim_new(self, urls: Iterable[str]) -> list[str]:
+        """Filter out seen URLs and mark the remaining ones as seen in one pass."""
+        new_urls = await self.filter_new(urls)
+        if new_urls:
+            await self.mark_seen(new_urls)
+        return new_urls
@@ -1,8 +1,25 @@
+import hashlib
 import uuid
 
 from intuned_runtime import IntunedContext
 
 
+def crawl_key(key_prefix: str, kind: str, url: str) -> str:
+    """
+    persistent_store key for per-URL crawl state, e.g. `{job_run_id}_visited_{digest}`.
+
+    The URL is hashed with blake2b (128-bit), so keys are short, fixed-length,
+    collision-free in practice and cheap to build. `url` should be canonical.
+    """
+    digest = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
+    return f"{key_prefix}_{kind}_{digest}"
+
+
+def legacy_crawl_key(key_prefix: str, kind: str, url: str) -> str:
+    """Pre-`crawl_key` key for the same state, kept so old keys can still be read."""
+    return sanitize_key(f"{key_prefix}_{kind}_{url}")
+
+
 def sanitize_key(key: str) -> str:
     for char in ["://", "/", ":", "#", "?", "&", "=", ".", "-"]:
         key = key.replace(char, "_")
@@ -0,0 +1,95 @@
+import hashlib
+import time
+from typing import Any, TypedDict
+
+from intuned_browser import go_to_url
+from playwright.async_api import Page, Response
+
+from .helpers import crawl_key, sanitize_key
+from .telemetry import persistent_store
+
+CONDITIONAL_TIMEOUT_MS = 15_000
+
+
+class PageRecord(TypedDict, total=False):
+    etag: str | None
+    last_modified: str | None
+    digest: str  # blake2b of the page's visible text
+    content: Any  # Output of extract_page_content for this version of the page
+    links: list[str]  # Crawlable links found on this version of the page
+    crawled_at: float
+
+
+def content_digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class SiteIndex:
+    """
+    Durable URL -> PageRecord index for incremental recrawls.
+
+    Unlike the rest of the crawl state, keys are not prefixed with the job run
+    ID, so records survive across job runs (e.g. nightly recrawls of a site).
+    """
+
+    def __init__(self, name: str):
+        self.key_prefix = sanitize_key(f"index_{name}")
+
+    async def get(self, url: str) -> PageRecord | None:
+        return await persistent_store.get(crawl_key(self.key_prefix, "page", url))
+
+    async def set(self, url: str, record: PageRecord) -> None:
+        await persistent_store.set(crawl_key(self.key_prefix, "page", url), record)
+
+
+async def is_not_modified(page: Page, url: str, record: PageRecord) -> bool:
+    """Conditional GET with the stored validators. True on a 304 response."""
+    headers = {}
+    if record.get("etag"):
+        headers["If-None-Match"] = record["etag"]
+    if record.get("last_modified"):
+        headers["If-Modified-Since"] = record["last_modified"]
+    if not headers:
+        return False
+
+    try:
+        response = await page.request.get(
+            url, headers=headers, timeout=CONDITIONAL_TIMEOUT_MS
+        )
+    except Exception as e:
+        print(f"[incremental] Conditional request failed for {url}: {e}")
+        return False
+    return response.status == 304
+
+
+async def go_to_url_with_response(page: Page, url: str) -> Response | None:
+    """`go_to_url`, also returning the main document response (for its headers)."""
+    responses: list[Response] = []
+
+    def on_response(response: Response) -> None:
+        if (
+            response.request.is_navigation_request()
+            and response.frame == page.main_frame
+        ):
+            responses.append(response)
+
+    page.on("response", on_response)
+    try:
+        await go_to_url(page, url)
+    finally:
+        page.remove_listener("response", on_response)
+    return responses[-1] if responses else None
+
+
+async def build_record(
+    response: Response | None, digest: str, content: Any, links: list[str]
+) -> PageRecord:
+    headers = await response.all_headers() if response else {}
+    return {
+        "etag": headers.get("etag"),
+        "last_modified": headers.get("last-modified"),
+        "digest": digest,
+        "content": content,
+        "links": links,
+        "crawled_at": time.time(),
+    }
@@ -1,8 +1,12 @@
-from urllib.parse import urlparse
+from typing import Callable
+from urllib.parse import ParseResult, quote, urljoin, urlparse
 
-from intuned_browser import resolve_url
 from playwright.async_api import Page
 
+from .canonical import get_canonicalizer
+
+SKIPPED_HREF_PREFIXES = ("javascript:", "mailto:", "tel:", "#")
+
 
 def get_base_domain(url: str) -> str:
     parsed = urlparse(url)
@@ -11,59 +15,97 @@ def get_base_domain(url: str) -> str:
 
 def normalize_url(url: str) -> str:
     """
-    Normalize URL to prevent duplicates.
+    Normalize URL to prevent duplicates, using the default `UrlRules`.
 
-    - Removes fragments (#section)
-    - Normalizes trailing slashes
-    - Lowercases domain
+    - Removes fragments (#section) and tracking params (utm_*, fbclid, ...)
+    - Sorts the remaining query params
+    - Normalizes trailing slashes, default ports and percent-encoding
+    - Lowercases scheme and domain (IDNA-encoded)
     """
-    parsed = urlparse(url)
-    path = parsed.path.rstrip("/") or "/"
-    return f"{parsed.scheme}://{parsed.netloc.lower()}{path}"
+    return get_canonicalizer()(url)
 
 
-async def extract_links(
-    page: Page,
+def _resolve_href(href: str, base_url: str) -> ParseResult:
+    """
+    Resolve `href` against `base_url`, same rules as `intuned_browser.resolve_url`:
+    absolute URLs are kept as-is, relative ones are joined and have their
+    path and query percent-encoded.
+    """
+    parsed = urlparse(href)
+    if parsed.scheme and parsed.netloc:
+        return parsed
+
+    full = urlparse(urljoin(base_url, href))
+    return full._replace(
+        path=quote(full.path, safe="/%"),
+        query=quote(full.query, safe="=&%"),
+    )
+
+
+def resolve_links(
+    hrefs: list[str | None],
+    base_url: str,
     base_domain: str,
     include_external: bool = False,
+    normalize: Callable[[str], str] = normalize_url,
 ) -> list[str]:
     """
-    Extract all links from the current page.
+    Resolve, filter and normalize raw hrefs in one synchronous pass.
 
-    Args:
-        page: Playwright page object (already navigated)
-        base_domain: Domain to filter links
-        include_external: Whether to include external links (ignores base_domain)
+    Each distinct href is resolved and parsed once (pages repeat nav links
+    many times), and `normalize` is only called for links that pass the filter.
 
     Returns:
         List of normalized, deduplicated URLs
     """
-    current_url = page.url
-
-    hrefs = await page.eval_on_selector_all(
-        "a[href]", "elements => elements.map(e => e.getAttribute('href'))"
-    )
+    resolved: dict[str, str | None] = {}
 
-    links = []
     for href in hrefs:
-        if not href:
+        if not href or href in resolved:
             continue
 
-        if href.startswith(("javascript:", "mailto:", "tel:", "#")):
+        if href.startswith(SKIPPED_HREF_PREFIXES):
+            resolved[href] = None
             continue
 
         try:
-            full_url = await resolve_url(url=href, base_url=current_url)
-        except Exception:
+            parsed = _resolve_href(href, base_url)
+        except ValueError:
             print(f"Failed to resolve URL: {href}")
+            resolved[href] = None
             continue
 
-        link_domain = get_base_domain(full_url)
-        if link_domain == base_domain or include_external:
-            normalized = normalize_url(full_url)
-            links.append(normalized)
+        if parsed.netloc.lower() == base_domain or include_external:
+            resolved[href] = normalize(parsed.geturl())
+        else:
+            resolved[href] = None
+
+    return list({link for link in resolved.values() if link})
+
+
+async def extract_links(
+    page: Page,
+    base_domain: str,
+    include_external: bool = False,
+    normalize: Callable[[str], str] = normalize_url,
+) -> list[str]:
+    """
+    Extract all links from the current page.
+
+    Args:
+        page: Playwright page object (already navigated)
+        base_domain: Domain to filter links
+        include_external: Whether to include external links (ignores base_domain)
+        normalize: URL canonicalizer, e.g. `get_canonicalizer(params["url_rules"])`
+
+    Returns:
+        List of normalized, deduplicated URLs
+    """
+    hrefs = await page.eval_on_selector_all(
+        "a[href]", "elements => elements.map(e => e.getAttribute('href'))"
+    )
 
-    return list(set(links))
+    return resolve_links(hrefs, page.url, base_domain, include_external, normalize)
 
 
 FILE_EXTENSIONS = {
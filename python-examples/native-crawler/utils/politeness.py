@@ -0,0 +1,178 @@
+import asyncio
+import time
+from collections import OrderedDict, defaultdict
+from typing import TypedDict
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from playwright.async_api import Page
+
+from .frontier import gather_bounded
+from .helpers import crawl_key
+from .telemetry import persistent_store
+
+# robots.txt files larger than this are truncated (same limit as RFC 9309)
+ROBOTS_MAX_BYTES = 500 * 1024
+ROBOTS_TIMEOUT_MS = 10_000
+
+# Max number of parsed robots.txt files kept in the in-process cache
+ROBOTS_CACHE_SIZE = 1000
+
+
+class PolitenessParams(TypedDict, total=False):
+    requests_per_second: float  # Per host (default: 1.0)
+    burst: int  # Requests a host may receive back to back (default: 1)
+    respect_robots: bool  # Skip URLs disallowed by robots.txt (default: True)
+    user_agent: str  # User agent matched against robots.txt (default: "*")
+    max_wait_seconds: float  # Wait per payload for a host slot (default: 60)
+
+
+# Parsed robots.txt per (job, origin), shared by payloads running in this process.
+# Least recently used first, so hosts (and jobs) no longer crawled are evicted.
+_robots_cache: OrderedDict[tuple[str, str], RobotFileParser] = OrderedDict()
+
+
+def get_origin(url: str) -> str:
+    parsed = urlsplit(url)
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+# robots.txt of a host answering 401 or 403 for it
+DISALLOW_ALL = "User-agent: *\nDisallow: /"
+
+
+async def fetch_robots_text(page: Page, origin: str) -> str:
+    """
+    Fetch robots.txt with the context's cookies. 401 and 403 disallow the
+    whole host; any other non-2xx status (or a failed request) allows all.
+    """
+    try:
+        response = await page.request.get(
+            f"{origin}/robots.txt", timeout=ROBOTS_TIMEOUT_MS
+        )
+        if response.status in (401, 403):
+            print(f"[politeness] robots.txt of {origin} is forbidden, skipping host")
+            return DISALLOW_ALL
+        if not response.ok:
+            return ""
+        body = await response.body()
+    except Exception as e:
+        print(f"[politeness] Failed to fetch robots.txt for {origin}: {e}")
+        return ""
+    return body[:ROBOTS_MAX_BYTES].decode("utf-8", errors="replace")
+
+
+class PolitenessScheduler:
+    """
+    Per-host rate limiting and robots.txt rules for the crawl frontier.
+
+    Each host has a token bucket (stored as a GCRA "theoretical arrival time"
+    in persistent_store, so all payloads share it). Instead of blocking the
+    parent, `schedule` hands each queued URL a `not_before` timestamp; the child
+    payload waits for it with `wait_for_turn` before navigating. A payload
+    waits at most `max_wait_seconds`: for a slot further out (`is_far`), it is
+    re-queued with the same `not_before` after waiting that long.
+
+    Bookings are approximate: `schedule` reads a host's arrival time and writes
+    it back, so parents scheduling links of the same host at the same moment
+    can book the same slots, sending up to that many requests at once.
+
+    robots.txt is fetched once per host per job, stored in persistent_store
+    and parsed once per process (up to ROBOTS_CACHE_SIZE hosts, least
+    recently used evicted first).
+    """
+
+    def __init__(self, page: Page, key_prefix: str, params: PolitenessParams):
+        self.page = page
+        self.key_prefix = key_prefix
+        self.requests_per_second = params.get("requests_per_second", 1.0)
+        self.burst = max(1, params.get("burst", 1))
+        self.respect_robots = params.get("respect_robots", True)
+        self.user_agent = params.get("user_agent", "*")
+        self.max_wait_seconds = params.get("max_wait_seconds", 60)
+
+    async def robots_for(self, origin: str) -> RobotFileParser:
+        cache_key = (self.key_prefix, origin)
+        if cache_key in _robots_cache:
+            _robots_cache.move_to_end(cache_key)
+            return _robots_cache[cache_key]
+
+        store_key = crawl_key(self.key_prefix, "robots", origin)
+        text = await persistent_store.get(store_key)
+        if text is None:
+            text = await fetch_robots_text(self.page, origin)
+            await persistent_store.set(store_key, text)
+
+        parser = RobotFileParser()
+        parser.parse(text.splitlines())
+        _robots_cache[cache_key] = parser
+        if len(_robots_cache) > ROBOTS_CACHE_SIZE:
+            _robots_cache.popitem(last=False)
+        return parser
+
+    async def is_allowed(self, url: str) -> bool:
+        if not self.respect_robots:
+            return True
+        robots = await self.robots_for(get_origin(url))
+        return robots.can_fetch(self.user_agent, url)
+
+    async def filter_allowed(self, urls: list[str]) -> list[str]:
+        if not self.respect_robots:
+            return urls
+        origins = list({get_origin(url) for url in urls})
+        robots = dict(
+            zip(origins, await gather_bounded(self.robots_for(o) for o in origins))
+        )
+        return [
+            url
+            for url in urls
+            if robots[get_origin(url)].can_fetch(self.user_agent, url)
+        ]
+
+    async def host_interval(self, origin: str) -> float:
+        """Seconds between two requests to a host: the rate limit or Crawl-delay."""
+        interval = 1 / self.requests_per_second
+        robots = await self.robots_for(origin)
+        crawl_delay = robots.crawl_delay(self.user_agent)
+        return max(interval, float(crawl_delay or 0))
+
+    async def schedule(self, urls: list[str]) -> dict[str, float]:
+        """
+        Reserve a request slot for every URL on its host's token bucket.
+
+        Returns:
+            Map of URL to the epoch time before which it must not be fetched
+        """
+        by_origin: dict[str, list[str]] = defaultdict(list)
+        for url in urls:
+            by_origin[get_origin(url)].append(url)
+
+        not_before: dict[str, float] = {}
+
+        async def schedule_host(origin: str, host_urls: list[str]) -> None:
+            interval = await self.host_interval(origin)
+            tat_key = crawl_key(self.key_prefix, "host_tat", origin)
+            now = time.time()
+            tat = max(await persistent_store.get(tat_key) or now, now)
+            for url in host_urls:
+                not_before[url] = max(now, tat - (self.burst - 1) * interval)
+                tat += interval
+            await persistent_store.set(tat_key, tat)
+
+        await gather_bounded(
+            schedule_host(origin, host_urls) for origin, host_urls in by_origin.items()
+        )
+        return not_before
+
+    def is_far(self, not_before: float | None) -> bool:
+        """Whether `not_before` is more than `max_wait_seconds` away."""
+        return bool(not_before) and not_before - time.time() > self.max_wait_seconds
+
+    async def wait_for_turn(self, not_before: float | None) -> None:
+        """Sleep until `not_before`, for at most `max_wait_seconds`."""
+        if not not_before:
+            return
+        delay = min(not_before - time.time(), self.max_wait_seconds)
+        if delay > 0:
+            print(f"[politeness] Waiting {delay:.1f}s for host slot")
+            await asyncio.sleep(delay)
@@ -0,0 +1,190 @@
+import zlib
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import aclosing
+from typing import TypedDict
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import httpx
+from playwright.async_api import Page
+
+from .politeness import fetch_robots_text
+
+SITEMAP_TIMEOUT_MS = 30_000
+
+# Read, decompressed and parsed in chunks of this size, so memory stays bounded
+CHUNK_SIZE = 64 * 1024
+
+# Sitemaps larger than this are truncated (50 MB uncompressed, per sitemaps.org)
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class SitemapParams(TypedDict, total=False):
+    urls: list[str]  # Sitemap URLs (default: robots.txt Sitemap lines, or /sitemap.xml)
+    max_urls: int  # Max URLs to seed from sitemaps (default: max_pages)
+    max_sitemaps: int  # Max sitemap files fetched, indexes included (default: 100)
+
+
+async def discover_sitemaps(page: Page, origin: str) -> list[str]:
+    """Sitemaps listed in the origin's robots.txt, or `/sitemap.xml` if none are."""
+    robots = RobotFileParser()
+    robots.parse((await fetch_robots_text(page, origin)).splitlines())
+    return robots.site_maps() or [f"{origin}/sitemap.xml"]
+
+
+class _SitemapStream:
+    """
+    Incremental `<urlset>` / `<sitemapindex>` parser, fed the raw (optionally
+    gzipped) body a chunk at a time. Gzip is detected from the first bytes.
+    """
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self._root: ElementTree.Element | None = None
+        self._decompressor = None
+        self._head: bytes | None = b""
+        self.size = 0  # Uncompressed bytes parsed
+
+    @property
+    def truncated(self) -> bool:
+        return self.size >= SITEMAP_MAX_BYTES
+
+    def feed(self, chunk: bytes) -> Iterator[tuple[str, str]]:
+        if self._head is not None:
+            # Wait for enough bytes to recognise gzip
+            self._head += chunk
+            if len(self._head) < len(GZIP_MAGIC):
+                return
+            chunk, self._head = self._head, None
+            if chunk.startswith(GZIP_MAGIC):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+        for data in self._decompress(chunk):
+            data = data[: SITEMAP_MAX_BYTES - self.size]
+            self.size += len(data)
+            self._parser.feed(data)
+            yield from self._read_entries()
+            if self.truncated:
+                return
+
+    def close(self) -> Iterator[tuple[str, str]]:
+        """Parse what is left of a body shorter than the gzip magic."""
+        if self._head:
+            self._parser.feed(self._head)
+            self._head = None
+            yield from self._read_entries()
+
+    def _decompress(self, chunk: bytes) -> Iterator[bytes]:
+        if self._decompressor is None:
+            for start in range(0, len(chunk), CHUNK_SIZE):
+                yield chunk[start : start + CHUNK_SIZE]
+            return
+        # Inflate at most CHUNK_SIZE bytes at a time, so a small compressed
+        # chunk cannot expand into one huge buffer
+        data = chunk
+        while data and not self._decompressor.eof and not self.truncated:
+            yield self._decompressor.decompress(data, CHUNK_SIZE)
+            data = self._decompressor.unconsumed_tail
+
+    def _read_entries(self) -> Iterator[tuple[str, str]]:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                self._root = self._root if self._root is not None else element
+                continue
+
+            kind = element.tag.rsplit("}", 1)[-1]
+            if kind in ("url", "sitemap"):
+                loc = element.findtext("{*}loc")
+                if loc and loc.strip():
+                    yield kind, loc.strip()
+                self._root.clear()
+
+
+def parse_sitemap(body: bytes) -> Iterator[tuple[str, str]]:
+    """
+    Stream-parse a `<urlset>` or `<sitemapindex>` document.
+
+    Elements are dropped as soon as they are read, so memory does not grow
+    with the number of entries.
+
+    Yields:
+        ("url", loc) for page entries, ("sitemap", loc) for sitemap index entries
+    """
+    stream = _SitemapStream()
+    yield from stream.feed(body)
+    yield from stream.close()
+
+
+def sitemap_client(user_agent: str | None = None) -> httpx.AsyncClient:
+    """HTTP client for the sitemap fetches of a crawl."""
+    return httpx.AsyncClient(
+        headers={"User-Agent": user_agent} if user_agent else None,
+        timeout=SITEMAP_TIMEOUT_MS / 1000,
+        follow_redirects=True,
+    )
+
+
+async def _stream_sitemap(
+    page: Page, client: httpx.AsyncClient, url: str
+) -> AsyncIterator[tuple[str, str]]:
+    """
+    Entries of one sitemap, parsed while it downloads, a chunk at a time, so
+    neither the body nor the inflated XML is held whole. The request carries
+    the browser context's cookies for `url`.
+    """
+    cookies = await page.context.cookies([url])
+    headers = (
+        {"Cookie": "; ".join(f"{c['name']}={c['value']}" for c in cookies)}
+        if cookies
+        else None
+    )
+    stream = _SitemapStream()
+    try:
+        async with client.stream("GET", url, headers=headers) as response:
+            if not response.is_success:
+                print(f"[sitemap] {url} returned HTTP {response.status_code}")
+                return
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                for entry in stream.feed(chunk):
+                    yield entry
+                if stream.truncated:
+                    print(f"[sitemap] {url} truncated at {SITEMAP_MAX_BYTES} bytes")
+                    return
+        for entry in stream.close():
+            yield entry
+    except (httpx.HTTPError, httpx.InvalidURL) as e:
+        print(f"[sitemap] Failed to fetch {url}: {e}")
+    except (ElementTree.ParseError, zlib.error) as e:
+        print(f"[sitemap] Invalid sitemap {url}: {e}")
+
+
+async def iter_sitemap_urls(
+    page: Page, sitemap_urls: list[str], max_sitemaps: int = 100
+) -> AsyncIterator[str]:
+    """
+    Yield every page URL listed in `sitemap_urls`, recursing into sitemap indexes.
+
+    Each sitemap is fetched once, and at most `max_sitemaps` are fetched in total.
+    Sitemaps are fetched with httpx, as `page.request` cannot stream a body,
+    with the browser's user agent and cookies.
+    """
+    pending = deque(sitemap_urls)
+    fetched: set[str] = set()
+    user_agent = await page.evaluate("navigator.userAgent")
+
+    async with sitemap_client(user_agent) as client:
+        while pending and len(fetched) < max_sitemaps:
+            sitemap_url = pending.popleft()
+            if sitemap_url in fetched:
+                continue
+            fetched.add(sitemap_url)
+
+            async with aclosing(_stream_sitemap(page, client, sitemap_url)) as entries:
+                async for kind, loc in entries:
+                    if kind == "sitemap":
+                        pending.append(loc)
+                    else:
+                        yield loc